@@ -0,0 +1,71 @@
+# 事件对象分配速率与排队内存基准
+# 用法: python benchmarks/bench_event.py [事件数量]
+
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# 不随包发布，直接以脚本运行；项目根目录的上一级加入 sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from Fcatbot.plugins.abc import Event
+
+
+@dataclass
+class _DictEvent:
+    """旧版事件布局（普通 dataclass，带 __dict__），仅作对照"""
+    event: str
+    data: Any = None
+    source: Optional[Any] = None
+    target: Optional[Any] = None
+    timestamp: float = field(default_factory=time.time)
+    priority: int = 0
+
+
+def _alloc_rate(factory: Callable[[int], Any], count: int) -> float:
+    """每秒可创建的事件数"""
+    gc.collect()
+    start = time.perf_counter()
+    for i in range(count):
+        factory(i)
+    return count / (time.perf_counter() - start)
+
+
+def _queued_bytes(factory: Callable[[int], Any], count: int) -> float:
+    """排队事件的平均内存占用（字节/个），不含共享的 data"""
+    gc.collect()
+    queue: deque = deque()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(count):
+        queue.append(factory(i))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+def main(count: int = 200_000) -> None:
+    payload = {"raw_message": "hello"}
+    # 事件名模拟运行时拼接的字符串，未驻留时每个事件持有自己的副本
+    names = [f"system.bot.group.{kind}" for kind in ("message", "command")]
+    factories = {
+        "Event": lambda i: Event("".join(names[i & 1]), payload, "Bot", None),
+        "dataclass": lambda i: _DictEvent("".join(names[i & 1]), payload, "Bot", None),
+    }
+    print(f"事件数量: {count}")
+    print(f"{'布局':<12}{'创建速率(个/秒)':>18}{'排队内存(字节/个)':>20}")
+    for name, factory in factories.items():
+        rate = _alloc_rate(factory, count)
+        size = _queued_bytes(factory, count)
+        print(f"{name:<12}{rate:>18,.0f}{size:>20.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -9,16 +9,19 @@
 import os
 import asyncio
 import json
+import zipfile
 from prompt_toolkit.patch_stdout import patch_stdout   # 日志不打断输入行PromptSession
 from prompt_toolkit import PromptSession
 from pathlib import Path
 import sys
-from typing import Any, List
+from typing import Any, List, Optional
 
 from .webclient import NcatbotClient
 from .command import Router
 from .utils import get_log
+from .utils import tracer, configure_tracing
 from .debugger import start_debug_mode
+from .debugger import debug_interceptor
 
 from .data_models import GroupMessage
 from .data_models import PrivateMessage
@@ -30,6 +33,9 @@ from .data_models import FriendRequestEvent
 from .plugins.abc import ConcurrentEventBus as EventBus
 from .plugins import Event
 from .plugins import PluginManager
+from .plugins.journal import EventJournal, replay_journal
+from .plugins.hotreload import ConfigWatcher, PluginWatcher
+from .plugins.zipimporter import sign_bundle
 
 from .config import OFFICIAL_HEARTBEAT_EVENT
 from .config import OFFICIAL_LIFECYCLE_EVENT
@@ -41,6 +47,24 @@ from .config import OFFICIAL_FRIEND_REQUEST_EVENT
 from .config import OFFICIAL_PRIVATE_COMMAND_EVENT
 from .config import OFFICIAL_NOTICE_EVENT
 from .config import PLUGINS_DIR
+from .config import PLUGIN_LOAD_TIMEOUT
+from .config import PLUGIN_LOAD_CONCURRENCY
+from .config import PLUGIN_LAZY_LOAD
+from .config import PLUGIN_HOT_RELOAD
+from .config import PLUGIN_CONFIG_WATCH
+from .config import PLUGIN_TRACE_MEMORY
+from .config import PLUGIN_BUNDLE_KEYS
+from .config import PLUGIN_REQUIRE_SIGNED_BUNDLES
+from .config import EVENT_QUEUE_MAX_SIZE
+from .config import EVENT_BUS_MAX_PENDING
+from .config import EVENT_BUS_OVERFLOW
+from .config import EVENT_HANDLER_TIMEOUT
+from .config import EVENT_BUS_MIN_WORKERS
+from .config import EVENT_BUS_MAX_WORKERS
+from .config import TRACE_FILE
+from .config import TRACE_SAMPLE_RATE
+from .config import EVENT_JOURNAL_DIR
+from .config import STICKY_EVENTS
 
 from .data_models import GroupFileUpload
 from .data_models import GroupAdminChange
@@ -69,13 +93,33 @@ class BotClient:
         ws: WebSocket处理器实例
     """
     def __init__(self, uri: str, token: str = None, command_prefix: tuple[str] = ('/','#'), debug: bool = False):
-        self.event_bus = EventBus()
+        configure_tracing(TRACE_FILE, TRACE_SAMPLE_RATE)
+        self.journal = EventJournal(EVENT_JOURNAL_DIR) if EVENT_JOURNAL_DIR else None
+        self.event_bus = EventBus(
+            min_workers=EVENT_BUS_MIN_WORKERS,
+            max_workers=EVENT_BUS_MAX_WORKERS,
+            max_pending=EVENT_BUS_MAX_PENDING,
+            overflow=EVENT_BUS_OVERFLOW,
+            journal=self.journal,
+            sticky_events=STICKY_EVENTS,
+            handler_timeout=EVENT_HANDLER_TIMEOUT,
+        )
         self.plugin_sys = PluginManager(
             plugin_dirs=[PLUGINS_DIR],
             config_base_dir=Path('./config'),
             data_base_dir=Path('./data'),
             event_bus=self.event_bus,
+            load_timeout=PLUGIN_LOAD_TIMEOUT,
+            load_concurrency=PLUGIN_LOAD_CONCURRENCY,
+            lazy_load=PLUGIN_LAZY_LOAD,
+            command_events=(OFFICIAL_GROUP_COMMAND_EVENT, OFFICIAL_PRIVATE_COMMAND_EVENT),
+            command_prefixes=command_prefix,
+            trace_memory=PLUGIN_TRACE_MEMORY,
+            bundle_keys=PLUGIN_BUNDLE_KEYS,
+            require_signed_bundles=PLUGIN_REQUIRE_SIGNED_BUNDLES,
         )
+        self.watcher = PluginWatcher(self.plugin_sys) if PLUGIN_HOT_RELOAD else None
+        self.config_watcher = ConfigWatcher(self.plugin_sys) if PLUGIN_CONFIG_WATCH else None
         self.last_heartbeat:dict = {}
         self.command_prefix = command_prefix
         self.debug = debug
@@ -94,11 +138,51 @@ class BotClient:
 
     async def close(self):
         LOG.info('准备关闭所有插件...')
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
         await self.plugin_sys.close()
         LOG.info('准备关闭连接...')
         self.ws.close()
+        tracer.close()
+        if self.journal is not None:
+            self.journal.close()
         LOG.info('Fcatbot 关闭完成')
 
+    async def replay(self, directory: str, speed: Optional[float] = 1.0, events: bool = False) -> int:
+        """重放事件日志
+
+        默认把记录的原始帧交给 on_message，完整经过解码与发布流程；
+        events 为 True 时改为直接发布记录的事件。
+        未连接 NapCat 时 API 请求由调试拦截器应答，可离线复现问题。
+        重放期间暂停记录，避免把重放的流量写回日志。
+
+        Args:
+            directory: 事件日志目录
+            speed: 1 为原速，N 为 N 倍速，None 为全速
+            events: 重放事件而不是原始帧
+
+        Returns:
+            int: 重放的记录数
+        """
+        journal, self.journal = self.journal, None
+        self.event_bus.journal = None
+        offline = not self.ws.connected
+        if offline:
+            self.ws.set_request_interceptor(debug_interceptor)
+        try:
+            if events:
+                count = await replay_journal(directory, on_event=self.event_bus.publish, speed=speed)
+            else:
+                count = await replay_journal(directory, on_frame=self.on_message, speed=speed)
+        finally:
+            self.journal = self.event_bus.journal = journal
+            if offline:
+                self.ws.set_request_interceptor(None)
+        LOG.info("事件日志重放完成，共 %d 条记录", count)
+        return count
+
     def link(self):
         '''仅连接'''
         self.ws.start()
@@ -113,6 +197,10 @@ class BotClient:
             client=self,
             api=self.ws
             )
+        if self.watcher is not None:
+            self.watcher.start()
+        if self.config_watcher is not None:
+            self.config_watcher.start()
 
     def run(self, load_plugins: bool = True):
         """连接并启用 bot 客户端（手动事件循环版本）"""
@@ -146,9 +234,14 @@ class BotClient:
         if load_plugins:
             LOG.info('准备加载插件')
             await self.load_plugin()
-        listener = self.ws.create_listener(64)
+        listener = self.ws.create_listener(EVENT_QUEUE_MAX_SIZE)
         loop = asyncio.get_running_loop()
         while self.ws.connected:
+            # 事件总线满载时暂停读取，由 ws 监听队列承担背压
+            if not await self.event_bus.wait_capacity(timeout=1):
+                if self.event_bus.is_closed():
+                    break
+                continue
             try:
                 data = await loop.run_in_executor(
                     None, self.ws.get_message, listener
@@ -209,9 +302,19 @@ class BotClient:
         Args:
             data: 接收到的消息数据(JSON格式)
         """
-        msg = data if isinstance(data, dict) else json.loads(data)
+        if self.journal is not None:
+            self.journal.record_frame(data)
+        # 每条消息是一条追踪的根，解码、API 调用与各处理器都挂在其下
+        with tracer.trace("bot.message") as root:
+            await self._handle_message(data, root)
+
+    async def _handle_message(self, data: str, root=None):
+        with tracer.span("decode"):
+            msg = data if isinstance(data, dict) else json.loads(data)
         if 'post_type' not in msg:
             return
+        if root is not None:
+            root.attrs["post_type"] = msg["post_type"]
         _LOG = get_log(f"Bot.{msg['self_id']}")
         if msg["post_type"] == "message" or msg["post_type"] == "message_sent":
             if msg["message_type"] == "group":
@@ -220,17 +323,17 @@ class BotClient:
                 group_info = await self.api('get_group_info', group_id=message.group_id)
                 _LOG.info(f"[{group_info['group_name']}({message.group_id})] {message.sender.nickname}({message.user_id}) -> {message.raw_message}")
                 if message.raw_message.startswith(self.command_prefix):
-                    self.event_bus.publish(Event(OFFICIAL_GROUP_COMMAND_EVENT, message))
+                    await self.event_bus.publish_async(Event(OFFICIAL_GROUP_COMMAND_EVENT, message))
                 else:
-                    self.event_bus.publish(Event(OFFICIAL_GROUP_MESSAGE_EVENT, message))
+                    await self.event_bus.publish_async(Event(OFFICIAL_GROUP_MESSAGE_EVENT, message))
             elif msg["message_type"] == "private":
                 # 私聊消息
                 message = PrivateMessage(**msg)
                 _LOG.info(f"Bot.{message.self_id}: [{message.sender.nickname}({message.user_id})] -> {message.raw_message}")
                 if message.raw_message.startswith(self.command_prefix):
-                    self.event_bus.publish(Event(OFFICIAL_PRIVATE_COMMAND_EVENT, message))
+                    await self.event_bus.publish_async(Event(OFFICIAL_PRIVATE_COMMAND_EVENT, message))
                 else:
-                    self.event_bus.publish(Event(OFFICIAL_PRIVATE_MESSAGE_EVENT, message))
+                    await self.event_bus.publish_async(Event(OFFICIAL_PRIVATE_MESSAGE_EVENT, message))
         elif msg["post_type"] == "notice":
             # 处理不同类型的通知事件
             notice_type = msg.get("notice_type")
@@ -283,20 +386,20 @@ class BotClient:
                     _LOG.info(f"群 {notice_event.group_id} 荣誉变更: {notice_event.user_id}")
 
             if notice_event:
-                self.event_bus.publish(Event(OFFICIAL_NOTICE_EVENT, notice_event))
+                await self.event_bus.publish_async(Event(OFFICIAL_NOTICE_EVENT, notice_event))
             
         elif msg["post_type"] == "request":
             if msg['request_type'] == 'friend':
                 message = FriendRequestEvent(msg)
-                self.event_bus.publish(Event(OFFICIAL_FRIEND_REQUEST_EVENT, message))
+                await self.event_bus.publish_async(Event(OFFICIAL_FRIEND_REQUEST_EVENT, message))
             elif msg['request_type'] == 'group':
                 message = GroupRequestEvent(msg)
-                self.event_bus.publish(Event(OFFICIAL_GROUP_REQUEST_EVENT, message))
+                await self.event_bus.publish_async(Event(OFFICIAL_GROUP_REQUEST_EVENT, message))
         elif msg["post_type"] == "meta_event":
             if msg["meta_event_type"] == "lifecycle":
                 message = LifecycleEvent(msg)
                 _LOG.info(f"机器人 {msg.get('self_id')} 成功启动")
-                self.event_bus.publish(Event(OFFICIAL_LIFECYCLE_EVENT, message))
+                await self.event_bus.publish_async(Event(OFFICIAL_LIFECYCLE_EVENT, message))
             elif msg["meta_event_type"] == "heartbeat":
                 message = HeartbeatEvent(msg)
                 try:
@@ -310,7 +413,7 @@ class BotClient:
                             _LOG.error(f'Status: {status}')
                 except Exception:
                     self.last_heartbeat: HeartbeatEvent = message
-                self.event_bus.publish(Event(OFFICIAL_HEARTBEAT_EVENT, message))
+                await self.event_bus.publish_async(Event(OFFICIAL_HEARTBEAT_EVENT, message, priority=-1))
         else:
             _LOG.error("这是一个错误,请反馈给开发者\n" + str(msg))
             return False
@@ -374,11 +477,141 @@ class BotClient:
             else:
                 LOG.warning("send 用法: send private|group id 内容")
 
-        @r.register("reload", usage="reload", desc="重载插件")
-        async def _(ctx: "BotClient") -> None:
+        @r.register("reload", usage="reload [插件名 ...]", desc="重载插件；指定插件时只重载它们及依赖它们的插件")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            if len(argv) > 1:
+                await ctx.plugin_sys.reload_plugins(argv[1:])
+                return
             LOG.info("重载插件…")
             await ctx.load_plugin()
 
+        @r.register("dlq", usage="dlq [list|replay [id]|clear]", desc="查看或重放死信")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            bus = ctx.event_bus
+            sub = argv[1] if len(argv) > 1 else "list"
+            if sub == "list":
+                letters = bus.dead_letters.list()
+                if letters:
+                    LOG.info("死信 (%d):\n%s", len(letters), "\n".join(map(str, letters)))
+                else:
+                    LOG.info("没有死信")
+            elif sub == "replay":
+                letter_id = int(argv[2]) if len(argv) > 2 else None
+                LOG.info("已重新投递 %d 条死信", bus.replay_dead_letters(letter_id))
+            elif sub == "clear":
+                bus.dead_letters.clear()
+                LOG.info("已清空死信")
+            else:
+                LOG.warning("用法: dlq [list|replay [id]|clear]")
+
+        @r.register("stuck", usage="stuck", desc="查看超过时限仍在运行的处理器")
+        async def _(ctx: "BotClient") -> None:
+            stuck = ctx.event_bus.stuck_handlers()
+            if stuck:
+                LOG.warning("卡住的处理器 (%d):\n%s", len(stuck), "\n".join(map(str, stuck)))
+            else:
+                LOG.info("没有卡住的处理器")
+
+        @r.register("pool", usage="pool", desc="查看事件总线线程池规模与伸缩记录")
+        async def _(ctx: "BotClient") -> None:
+            stats = ctx.event_bus.executor_stats()
+            LOG.info("事件总线线程池: %s", ", ".join(f"{k}={v}" for k, v in stats.items()))
+            decisions = ctx.event_bus.executor_decisions()[-10:]
+            if decisions:
+                LOG.info("最近的伸缩决策:\n%s", "\n".join(map(str, decisions)))
+
+        @r.register("bulkheads", usage="bulkheads", desc="查看各插件线程池的使用情况")
+        async def _(ctx: "BotClient") -> None:
+            stats = ctx.event_bus.bulkhead_stats()
+            if not stats:
+                LOG.info("没有插件独占线程池")
+                return
+            lines = [
+                f"{name}: 运行 {s['active']}/{s['max_workers']} 排队 {s['queued']}/{s['max_queue']} 峰值 {s['peak']} 完成 {s['completed']} "
+                f"满载 {s['saturated']} 次 挤出 {s['shed']} 拒绝 {s['rejected']}"
+                for name, s in sorted(stats.items())
+            ]
+            LOG.info("插件线程池:\n%s", "\n".join(lines))
+
+        @r.register("lazy", usage="lazy [插件名]", desc="查看延迟加载的插件，或立即激活指定插件")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            manager = ctx.plugin_sys
+            if len(argv) > 1:
+                try:
+                    await manager.activate_plugin(argv[1])
+                except Exception as e:
+                    LOG.warning("激活插件 %s 失败: %s", argv[1], e)
+                return
+            lazy = manager.lazy_plugins()
+            if not lazy:
+                LOG.info("没有延迟加载的插件")
+            for name, state in lazy.items():
+                LOG.info("  %s: %s", name, state)
+
+        @r.register("hosts", usage="hosts", desc="查看独立进程运行的插件")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            hosted = ctx.plugin_sys.hosted_plugins()
+            if not hosted:
+                LOG.info("没有独立进程运行的插件")
+            for name, s in hosted.items():
+                limits = f"内存上限 {s['memory_limit'] or '-'}MB, CPU 上限 {s['cpu_limit'] or '-'} 核"
+                exit_info = f", 上次退出: {s['last_exit']}" if s["last_exit"] else ""
+                LOG.info(
+                    "  %s: %s pid=%s 运行 %.0f 秒, 内存 %.1fMB, CPU %.2f 核 (%s), 重启 %d 次%s",
+                    name, s["state"], s["pid"], s["uptime"], s["rss_mb"], s["cpu"], limits, s["restarts"], exit_info,
+                )
+
+        @r.register("metrics", usage="metrics [mem|reset]", desc="查看各插件的资源占用，mem 附带内存统计，reset 清零")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            manager = ctx.plugin_sys
+            if "reset" in argv[1:]:
+                manager.reset_metrics()
+                LOG.info("插件计量已清零")
+                return
+            metrics = await manager.plugin_metrics(memory="mem" in argv[1:])
+            if not metrics:
+                LOG.info("没有已加载的插件")
+                return
+            total_cpu = sum(m["cpu_ms"] for m in metrics.values()) or 1.0
+            lines = []
+            for name, m in sorted(metrics.items(), key=lambda item: item[1]["cpu_ms"], reverse=True):
+                line = (
+                    f"{name}: 事件 {m['events']} (失败 {m['errors']}), CPU {m['cpu_ms']:.0f}ms ({m['cpu_ms'] / total_cpu:.0%}), "
+                    f"耗时 {m['wall_ms']:.0f}ms (最长 {m['max_wall_ms']:.0f}ms), "
+                    f"API {m['api_calls']} 次 (失败 {m['api_errors']}, 平均 {m['api_avg_ms']:.0f}ms, p95 {m['api_p95_ms']:.0f}ms), "
+                    f"数据 {m['data_bytes'] / 1024:.0f}KB"
+                )
+                if "memory_bytes" in m:
+                    line += f", 内存 {m['memory_bytes'] / 1024:.0f}KB" if m["memory_bytes"] is not None else ", 内存 -"
+                lines.append(line)
+            LOG.info("插件资源占用:\n%s", "\n".join(lines))
+
+        @r.register("sign", usage="sign 插件包 密钥名", desc="用配置的密钥为 zip 插件包签名")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            if len(argv) < 3:
+                LOG.warning("用法: sign 插件包 密钥名")
+                return
+            key = PLUGIN_BUNDLE_KEYS.get(argv[2])
+            if key is None:
+                LOG.warning("未配置签名密钥 %s (PLUGIN_BUNDLE_KEYS)", argv[2])
+                return
+            try:
+                await asyncio.to_thread(sign_bundle, argv[1], argv[2], key)
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                LOG.warning("签名失败: %s", e)
+                return
+            LOG.info("已签名: %s (%s)", argv[1], argv[2])
+
+        @r.register("replay", usage="replay 目录 [倍速|max] [events]", desc="重放事件日志")
+        async def _(ctx: "BotClient", argv: List[str]) -> None:
+            if len(argv) < 2:
+                LOG.warning("用法: replay 目录 [倍速|max] [events]")
+                return
+            speed = 1.0
+            if len(argv) > 2:
+                speed = None if argv[2] == "max" else float(argv[2])
+            await ctx.replay(argv[1], speed, events="events" in argv[3:])
+
         @r.register("help", usage="help", desc="查看帮助")
         async def _(ctx: "BotClient") -> None:
             LOG.info("\n" + ctx.router.help_text())
\ No newline at end of file
@@ -14,10 +14,26 @@ config = {}
 
 # 使用配置
 EVENT_QUEUE_MAX_SIZE = config.get("EVENT_QUEUE_MAX_SIZE", 64)  # 事件队列最大长度
+EVENT_BUS_MAX_PENDING = config.get("EVENT_BUS_MAX_PENDING", 1024)  # 事件总线未完成处理任务上限(<=0 不限制)
+EVENT_BUS_OVERFLOW = config.get("EVENT_BUS_OVERFLOW", "block")  # 事件总线满载策略: block / shed / drop
+EVENT_BUS_MIN_WORKERS = config.get("EVENT_BUS_MIN_WORKERS", 2)  # 事件总线共享线程池下限
+EVENT_BUS_MAX_WORKERS = config.get("EVENT_BUS_MAX_WORKERS", None)  # 事件总线共享线程池上限(None 按 CPU 核数估算), 线程数在上下限间按排队延迟自动伸缩
+EVENT_HANDLER_TIMEOUT = config.get("EVENT_HANDLER_TIMEOUT", 300)  # 发布模式处理器默认执行时限(秒), 超时的协程被取消, 同步处理器被报告为卡住(None 不限制)
 PLUGINS_DIR = config.get("PLUGINS_DIR", "./plugins")  # 插件目录
+PLUGIN_LOAD_TIMEOUT = config.get("PLUGIN_LOAD_TIMEOUT", 60)  # 单个插件 on_load 时限(秒), 超时视为加载失败(None 不限制)
+PLUGIN_LOAD_CONCURRENCY = config.get("PLUGIN_LOAD_CONCURRENCY", 0)  # 同一依赖层内并发 on_load 的插件数上限(0 不限制, 1 为逐个加载)
+PLUGIN_HOT_RELOAD = config.get("PLUGIN_HOT_RELOAD", False)  # 监视插件目录, 只重载改动的插件及依赖它们的插件
+PLUGIN_CONFIG_WATCH = config.get("PLUGIN_CONFIG_WATCH", False)  # 监视插件配置目录, 配置文件改动后推送给插件(on_config_changed)
+PLUGIN_LAZY_LOAD = config.get("PLUGIN_LAZY_LOAD", True)  # 按插件声明文件(plugin.yaml)中的 lazy 在首个匹配事件到达时才加载插件
+PLUGIN_TRACE_MEMORY = config.get("PLUGIN_TRACE_MEMORY", 0)  # 大于 0 时用 tracemalloc 按插件统计内存(保留的调用栈层数), 会拖慢运行, 仅用于排查
+PLUGIN_BUNDLE_KEYS = config.get("PLUGIN_BUNDLE_KEYS", {})  # 受信任的 zip 插件包签名密钥 {密钥名: 十六进制密钥}
+PLUGIN_REQUIRE_SIGNED_BUNDLES = config.get("PLUGIN_REQUIRE_SIGNED_BUNDLES", False)  # 只加载用上述密钥签名的 zip 插件包
 META_CONFIG_PATH = config.get("META_CONFIG_PATH", None)  # 元数据,所有插件一份(只读)
 PERSISTENT_DIR = config.get("PERSISTENT_DIR", "./data")  # 插件私有数据目录
 MESSAGE_ERROR_LOG = config.get("MESSAGE_ERROR_LOG", "./message_errors.json")  # 消息错误日志文件
+TRACE_FILE = config.get("TRACE_FILE", "./logs/traces.jsonl")  # 链路追踪导出文件(JSON lines)
+TRACE_SAMPLE_RATE = config.get("TRACE_SAMPLE_RATE", 0.0)  # 链路追踪采样率(0~1, 0 为关闭)
+EVENT_JOURNAL_DIR = config.get("EVENT_JOURNAL_DIR", None)  # 事件日志目录, 记录收到的帧与发布的事件(None 为关闭)
 
 # 消息事件
 OFFICIAL_GROUP_MESSAGE_EVENT = config.get("OFFICIAL_GROUP_MESSAGE_EVENT", 'system.bot.group.message')      # 群聊消息事件
@@ -34,4 +50,7 @@ OFFICIAL_NOTICE_EVENT = config.get("OFFICIAL_NOTICE_EVENT", 'system.bot.notice')
 
 # 元事件
 OFFICIAL_LIFECYCLE_EVENT = config.get("OFFICIAL_LIFECYCLE_EVENT", 'system.bot.lifecycle')                  # 生命周期事件
-OFFICIAL_HEARTBEAT_EVENT = config.get("OFFICIAL_HEARTBEAT_EVENT", 'system.bot.heartbeat')                  # 心跳事件
\ No newline at end of file
+OFFICIAL_HEARTBEAT_EVENT = config.get("OFFICIAL_HEARTBEAT_EVENT", 'system.bot.heartbeat')                  # 心跳事件
+
+# 粘性事件: 事件总线保留最后一次发布的值, 新注册的处理器立即收到
+STICKY_EVENTS = config.get("STICKY_EVENTS", [OFFICIAL_LIFECYCLE_EVENT, OFFICIAL_HEARTBEAT_EVENT])
@@ -412,27 +412,28 @@ def send_simulated_message(client, text: str) -> None:
     if out:
         print(f'{Color.CYAN}收集到的返回:{Color.RESET} {out}')
 
+async def debug_interceptor(action: str, params: dict) -> dict:
+    """Debug模式下的API请求拦截器，也用于离线重放事件日志"""
+    LOG.debug(f"Debug模式拦截API请求: {action} {params}")
+    if action == "get_group_info":
+        return {
+            "group_id": params.get("group_id", 0),
+            "group_name": "DEBUG群组",
+            "member_count": 100,
+            "max_member_count": 200
+        }
+    elif action == "send_group_msg":
+        LOG.info(f"[Debug] 发送群消息到 {params.get('group_id')}: {params.get('message')}")
+        return {"message_id": 123456}
+    elif action == "send_private_msg":
+        LOG.info(f"[Debug] 发送私聊消息到 {params.get('user_id')}: {params.get('message')}")
+        return {"message_id": 123456}
+
+    return {}
+
+
 def start_debug_mode(client: NcatbotClient):
     """启动调试模式"""
-    async def debug_interceptor(action: str, params: dict) -> dict:
-        """Debug模式下的API请求拦截器"""
-        LOG.debug(f"Debug模式拦截API请求: {action} {params}")
-        if action == "get_group_info":
-            return {
-                "group_id": params.get("group_id", 0),
-                "group_name": "DEBUG群组",
-                "member_count": 100,
-                "max_member_count": 200
-            }
-        elif action == "send_group_msg":
-            LOG.info(f"[Debug] 发送群消息到 {params.get('group_id')}: {params.get('message')}")
-            return {"message_id": 123456}
-        elif action == "send_private_msg":
-            LOG.info(f"[Debug] 发送私聊消息到 {params.get('user_id')}: {params.get('message')}")
-            return {"message_id": 123456}
-        
-        return {}
-
     # 设置debug模式的请求拦截器
     client.ws.set_request_interceptor(debug_interceptor)
     
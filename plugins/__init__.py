@@ -11,10 +11,12 @@ from .event_bus import Event, EventBus
 from .loader import PluginLoader
 from .manager import PluginManager
 from .compatible import LazyDecoratorResolver
+from .transport import SocketEventBus
 
 __all__ = [
     'Event',
     'EventBus',
+    'SocketEventBus',
     'Plugin',
     'LazyDecoratorResolver',
     'PluginManager',
@@ -1,6 +1,5 @@
 # python >= 3.11
 
-# TODO 完善zip导入功能
 # TODO 哈气
 
 from __future__ import annotations
@@ -12,15 +11,22 @@ import importlib
 import importlib.util
 from pathlib import Path
 import sys
+import traceback
 from typing import (
     Any,
     AsyncIterable,
+    AsyncIterator,
     Awaitable,
     Callable,
+    Collection,
+    Deque,
     Dict,
     Final,
+    FrozenSet,
+    Hashable,
     Iterable,
     List,
+    Mapping,
     NewType,
     Optional,
     Set,
@@ -29,27 +35,48 @@ from typing import (
     Union,
     Type,
     Pattern,
+    TYPE_CHECKING,
 )
 from uuid import UUID
+import contextvars
+import copy
 import datetime
+import heapq
+import itertools
+import multiprocessing
+import random
 import threading
-from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, Future
 import asyncio
 import time
 from packaging.version import Version, InvalidVersion
 from packaging.specifiers import SpecifierSet, InvalidSpecifier
 from functools import partial
-from contextlib import contextmanager
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
 import logging
 import uuid
 import aiofiles.os
 import aiofiles
 import inspect
 import json
+import pickle
 import yaml
 import zipfile
 import os
 import re
+import tracemalloc
+import weakref
+
+from ..utils.tracing import current_span, tracer
+from .executor import DEFAULT_MIN_WORKERS, AdaptiveExecutor, PoolDecision
+from .discovery import MANIFEST_FILE, DiscoveryManifest, ManifestEntry, PluginRecord
+from .manifest import FILTERS, ManifestError, PluginManifest, Route, read_manifest
+from .metrics import CpuTimedCoroutine, PluginMetrics, current_metrics, directory_size, traced_memory
+from .zipimporter import BYTECODE_DIR, BundleError, _key_bytes, verify_bundle, zip_finder
+
+if TYPE_CHECKING:
+    from .journal import EventJournal
 
 
 # 配置日志
@@ -70,6 +97,11 @@ EventHandler: TypeAlias = Union[SyncHandler, AsyncHandler]
 PROTOCOL_VERSION: Final[int] = 0
 DEFAULT_MAX_WORKERS: Final[int | None] = None
 DEFAULT_REQUEST_TIMEOUT: Final[float] = 10.0
+DEFAULT_MAX_PENDING: Final[int] = 1024
+DEFAULT_DEAD_LETTER_SIZE: Final[int] = 1000
+DEFAULT_PLUGIN_MAX_WORKERS: Final[int] = 4
+DEFAULT_BULKHEAD_QUEUE_FACTOR: Final[int] = 16  # 隔离线程池排队上限为线程数的倍数
+DEFAULT_PLUGIN_LOAD_TIMEOUT: Final[float] = 60.0
 DEBUG_MODE: Final[bool] = True
 
 # -----------------------------------------------------------------------------
@@ -94,18 +126,513 @@ class PluginRuntimeError(PluginError): pass
 # 事件相关定义（修复：添加事件模式匹配）
 # -----------------------------------------------------------------------------
 
-@dataclass
+# 单调时钟到墙上时间的偏移，事件只读取一次单调时钟，需要墙上时间时再换算
+_MONOTONIC_TO_WALL: Final[float] = time.time() - time.monotonic()
+
+
 class Event:
-    event: str
-    data: Any = None
-    source: Optional[Any] = None
-    target: Optional[Any] = None
-    timestamp: float = field(default_factory=time.time)
+    """事件
+
+    使用 __slots__ 保存字段以减小洪峰时排队事件的内存占用；事件名会被驻留，
+    便于匹配时走身份比较。创建时只记录单调时钟，timestamp 按需换算为墙上时间。
+    调用 freeze() 后事件不可再修改，可安全地在多个处理器间共享。
+    """
+    __slots__ = ("event", "data", "source", "target", "priority", "monotonic")
+    
+    def __init__(
+        self,
+        event: str,
+        data: Any = None,
+        source: Optional[Any] = None,
+        target: Optional[Any] = None,
+        timestamp: Optional[float] = None,
+        priority: int = 0,  # 入口满载且策略为 SHED 时，优先丢弃低优先级事件
+    ) -> None:
+        self.event = sys.intern(event)
+        self.data = data
+        self.source = source
+        self.target = target
+        self.priority = priority
+        self.monotonic = time.monotonic() if timestamp is None else timestamp - _MONOTONIC_TO_WALL
+    
+    @property
+    def timestamp(self) -> float:
+        """事件创建时的墙上时间（秒）"""
+        return self.monotonic + _MONOTONIC_TO_WALL
+    
+    def freeze(self) -> "Event":
+        """冻结事件，之后修改字段会抛出 AttributeError"""
+        # 切换到布局相同的只读子类，普通事件的字段赋值不必经过 Python 层的 __setattr__
+        self.__class__ = FrozenEvent
+        return self
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        return (self.event, self.data, self.source, self.target, self.monotonic, self.priority) == \
+            (other.event, other.data, other.source, other.target, other.monotonic, other.priority)
+    
+    __hash__ = None  # type: ignore[assignment]
+    
+    def __repr__(self) -> str:
+        return f"Event({self.event!r}, source={self.source!r}, target={self.target!r}, timestamp={self.timestamp})"
     
     def __str__(self) -> str:
         source = self.source or "System"
         target = self.target or "All"
         return f"Event(\033[32m{self.event}\033[0m, source=\033[36m{source}\033[0m, target=\033[34m{target}\033[0m, timestamp=\033[33m{self.timestamp}\033[0m)"
+    
+    def __reduce__(self):
+        # 跨进程传递时按位置参数序列化，避免携带字段名
+        return (Event, (self.event, self.data, self.source, self.target, self.timestamp, self.priority))
+
+
+class FrozenEvent(Event):
+    """冻结后的事件，由 Event.freeze() 得到"""
+    __slots__ = ()
+    
+    def freeze(self) -> "Event":
+        return self
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"事件已冻结，无法修改字段 '{name}'")
+    
+    __delattr__ = __setattr__
+    
+    def __reduce__(self):
+        return (_frozen_event, (self.event, self.data, self.source, self.target, self.timestamp, self.priority))
+
+
+def _frozen_event(*args: Any) -> FrozenEvent:
+    return Event(*args).freeze()
+
+
+class ExecutorKind(Enum):
+    """处理器的执行方式"""
+    LOOP = "loop"        # 在事件总线专属的事件循环线程中运行，适合轻量协程处理器
+    THREAD = "thread"    # 在线程池中运行（默认）
+    PROCESS = "process"  # 在进程池中运行，适合 CPU 密集型处理器；处理器需为模块级函数、静态方法或类方法，
+                         # 子进程中没有插件实例，绑定到实例的方法不能使用
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """处理器失败后的重试策略（指数退避 + 抖动）"""
+    max_attempts: int = 3       # 含首次执行在内的总尝试次数
+    base_delay: float = 0.5     # 首次重试前的等待（秒）
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.1         # 等待时间的相对随机抖动
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,)
+    
+    def should_retry(self, attempt: int, error: BaseException) -> bool:
+        return attempt < self.max_attempts and isinstance(error, self.retry_on)
+    
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间"""
+        delay = min(self.base_delay * self.multiplier ** (attempt - 1), self.max_delay)
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+@dataclass
+class DeadLetter:
+    """耗尽重试仍失败的一次投递"""
+    letter_id: int
+    event: Union[Event, List[Event]]  # 批量处理器为事件列表
+    handler_id: UUID
+    handler_name: str
+    error: BaseException
+    attempts: int
+    failed_at: float = field(default_factory=time.time)
+    
+    def __str__(self) -> str:
+        events = self.event if isinstance(self.event, list) else [self.event]
+        names = ", ".join(sorted({e.event for e in events}))
+        return f"#{self.letter_id} [{names}] -> {self.handler_name} ({self.attempts} 次): {self.error!r}"
+
+
+class DeadLetterStore:
+    """有界死信存储，超出容量时丢弃最早的记录"""
+    
+    def __init__(self, maxlen: int = DEFAULT_DEAD_LETTER_SIZE) -> None:
+        self._letters: Deque[DeadLetter] = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def add(self, **fields: Any) -> DeadLetter:
+        with self._lock:
+            letter = DeadLetter(letter_id=next(self._ids), **fields)
+            self._letters.append(letter)
+            return letter
+    
+    def list(self) -> List[DeadLetter]:
+        with self._lock:
+            return list(self._letters)
+    
+    def pop(self, letter_id: Optional[int] = None) -> List[DeadLetter]:
+        """取出指定记录，letter_id 为 None 时取出全部"""
+        with self._lock:
+            if letter_id is None:
+                letters = list(self._letters)
+                self._letters.clear()
+                return letters
+            letters = [l for l in self._letters if l.letter_id == letter_id]
+            for letter in letters:
+                self._letters.remove(letter)
+            return letters
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._letters.clear()
+    
+    def __len__(self) -> int:
+        return len(self._letters)
+
+
+class SubscriptionGate:
+    """订阅级的流量算子，依次应用 sample → throttle → debounce / window
+
+    均按 key(event) 分组计算，key 为 None 时所有事件共用一组。
+    被抑制的事件在发布线程内直接丢弃，不会进入执行器；
+    debounce 与 window 暂存的事件由总线事件循环线程上的定时器投递。
+    key 抛出异常或返回不可哈希的值时记录错误，该事件不投递给这个处理器。
+    """
+    
+    # sample 计数与 throttle 记录各自最多保留的键数，超出时淘汰最久未出现的键（其计数从头开始）
+    _MAX_KEYS: Final[int] = 4096
+    
+    def __init__(
+        self,
+        *,
+        debounce: Optional[float] = None,
+        throttle: Optional[float] = None,
+        sample: Optional[int] = None,
+        window: Optional[float] = None,
+        key: Optional[Callable[[Event], Hashable]] = None,
+    ) -> None:
+        """
+        Args:
+            debounce: 静默指定秒数后只投递最后一个事件
+            throttle: 指定秒数内只投递第一个事件
+            sample: 每 N 个事件投递一个（第 1、N+1、2N+1 …个）
+            window: 收集指定秒数内的事件后一次投递
+            key: 分组函数，例如按群号 lambda e: e.data.group_id
+        """
+        if debounce is not None and window is not None:
+            raise ValueError("debounce 与 window 不能同时使用")
+        for name, value in (("debounce", debounce), ("throttle", throttle), ("window", window)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} 必须大于 0")
+        if sample is not None and sample < 1:
+            raise ValueError("sample 必须大于等于 1")
+        self.debounce = debounce
+        self.throttle = throttle
+        self.sample = sample
+        self.window = window
+        self.key = key
+        self.suppressed = 0
+        self._counts: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._last: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._held: Dict[Hashable, Any] = {}  # debounce: [事件, 截止时间]；window: 事件列表
+        self._lock = threading.Lock()
+        # 由事件总线在注册时绑定
+        self.deliver: Callable[[List[Event]], None] = lambda events: None
+        self.schedule: Callable[..., None] = lambda delay, fn, *args: None
+    
+    def __repr__(self) -> str:
+        options = ("debounce", "throttle", "sample", "window")
+        return "SubscriptionGate(" + ", ".join(f"{name}={getattr(self, name)}" for name in options if getattr(self, name) is not None) + ")"
+    
+    def offer(self, event: Event) -> bool:
+        """返回 True 表示立即投递；否则事件已被丢弃或暂存待定时投递"""
+        key = None
+        if self.key is not None:
+            try:
+                key = self.key(event)
+                hash(key)
+            except Exception as e:
+                logger.error("订阅分组函数处理事件 '%s' 失败，跳过该处理器: %s", event.event, e, exc_info=True)
+                with self._lock:
+                    self.suppressed += 1
+                return False
+        now = time.monotonic()
+        with self._lock:
+            if self.sample is not None:
+                count = self._counts.pop(key, 0)
+                self._counts[key] = count + 1
+                if len(self._counts) > self._MAX_KEYS:
+                    self._counts.popitem(last=False)
+                if count % self.sample:
+                    self.suppressed += 1
+                    return False
+            
+            if self.throttle is not None:
+                last = self._last.get(key)
+                if last is not None and now - last < self.throttle:
+                    self.suppressed += 1
+                    return False
+                self._last.pop(key, None)
+                self._last[key] = now
+                if len(self._last) > self._MAX_KEYS:
+                    self._last.popitem(last=False)
+            
+            if self.debounce is not None:
+                held = self._held.get(key)
+                if held is None:
+                    self._held[key] = [event, now + self.debounce]
+                    self.schedule(self.debounce, self._fire_debounce, key)
+                else:
+                    # 只顺延截止时间，由已有定时器到期后重新计时，避免频繁取消定时器
+                    self.suppressed += 1
+                    held[0], held[1] = event, now + self.debounce
+                return False
+            
+            if self.window is not None:
+                held = self._held.get(key)
+                if held is None:
+                    self._held[key] = [event]
+                    self.schedule(self.window, self._fire_window, key)
+                else:
+                    held.append(event)
+                return False
+        return True
+    
+    def _fire_debounce(self, key: Hashable) -> None:
+        with self._lock:
+            event, deadline = self._held[key]
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                self.schedule(remaining, self._fire_debounce, key)
+                return
+            del self._held[key]
+        self.deliver([event])
+    
+    def _fire_window(self, key: Hashable) -> None:
+        with self._lock:
+            events = self._held.pop(key)
+        self.deliver(events)
+
+
+def _data_field(data: Any, name: str) -> Any:
+    if isinstance(data, dict):
+        return data.get(name)
+    return getattr(data, name, None)
+
+
+def _id_value(value: Any) -> Optional[int]:
+    """群号、QQ 号统一为 int：OneBot 实现可能以字符串传递；其他值（含不可哈希的值）返回 None"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        if text.lstrip("-").isdigit():
+            return int(text)
+    return None
+
+
+def _is_member(value: Any, options: FrozenSet[Any]) -> bool:
+    try:
+        return value in options
+    except TypeError:  # 不可哈希的字段值
+        return False
+
+
+def _frozen_option(value: Any) -> Optional[FrozenSet[Any]]:
+    """单个值或可迭代对象统一为 frozenset"""
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes, int)):
+        return frozenset((value,))
+    return frozenset(value)
+
+
+@dataclass(frozen=True)
+class DataFilter:
+    """事件数据上的声明式过滤条件，所有给出的条件同时满足才匹配
+
+    字段从 event.data 的同名属性（或字典键）读取。
+    group_id / user_id 条件由事件总线建立哈希索引，不匹配的处理器不会被遍历和调度；
+    条件与字段值中的数字字符串都按整数比较。
+    """
+    group_id: Optional[FrozenSet[int]] = None
+    user_id: Optional[FrozenSet[int]] = None
+    message_type: Optional[FrozenSet[str]] = None  # 如 "group" / "private"
+    prefix: Optional[Tuple[str, ...]] = None       # raw_message 以任一前缀开头
+    keyword: Optional[Tuple[str, ...]] = None      # raw_message 包含任一关键词
+    
+    def __post_init__(self) -> None:
+        for name in ("group_id", "user_id", "message_type"):
+            object.__setattr__(self, name, _frozen_option(getattr(self, name)))
+        for name in ("group_id", "user_id"):
+            values = getattr(self, name)
+            if values is not None:
+                ids = frozenset(map(_id_value, values))
+                if None in ids:
+                    raise ValueError(f"{name} 必须是整数或数字字符串: {sorted(map(repr, values))}")
+                object.__setattr__(self, name, ids)
+        for name in ("prefix", "keyword"):
+            value = getattr(self, name)
+            if value is not None:
+                object.__setattr__(self, name, (value,) if isinstance(value, str) else tuple(value))
+    
+    @classmethod
+    def build(cls, **conditions: Any) -> Optional["DataFilter"]:
+        """没有任何条件时返回 None"""
+        conditions = {name: value for name, value in conditions.items() if value is not None}
+        return cls(**conditions) if conditions else None
+    
+    @property
+    def index_key(self) -> Optional[Tuple[str, FrozenSet[int]]]:
+        """用于建立索引的 (字段名, 取值集合)，优先 group_id"""
+        if self.group_id is not None:
+            return "group_id", self.group_id
+        if self.user_id is not None:
+            return "user_id", self.user_id
+        return None
+    
+    def matches(self, data: Any) -> bool:
+        if self.group_id is not None and _id_value(_data_field(data, "group_id")) not in self.group_id:
+            return False
+        if self.user_id is not None and _id_value(_data_field(data, "user_id")) not in self.user_id:
+            return False
+        if self.message_type is not None and not _is_member(_data_field(data, "message_type"), self.message_type):
+            return False
+        if self.prefix is not None or self.keyword is not None:
+            raw = _data_field(data, "raw_message")
+            if not isinstance(raw, str):
+                return False
+            if self.prefix is not None and not raw.startswith(self.prefix):
+                return False
+            if self.keyword is not None and not any(word in raw for word in self.keyword):
+                return False
+        return True
+
+
+class Bulkhead:
+    """插件独占的有界线程池，一个插件的慢处理器只会耗尽自己的线程
+
+    排队的任务数以 max_queue 为上限，超出时按 overflow 策略挤出优先级更低的排队任务 (SHED)
+    或直接拒绝新任务 (DROP)；不支持 BLOCK，否则会把整个事件总线拖慢到最慢插件的速度
+    """
+    
+    def __init__(self, name: str, max_workers: int, max_queue: Optional[int] = None, overflow: Optional[OverflowPolicy] = None) -> None:
+        overflow = overflow if overflow is not None else OverflowPolicy.DROP
+        if overflow is OverflowPolicy.BLOCK:
+            raise ValueError("隔离线程池不支持 BLOCK 策略")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue if max_queue is not None else DEFAULT_BULKHEAD_QUEUE_FACTOR * max_workers
+        self.overflow = overflow
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"Plugin-{name}")
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiting: List[Tuple[int, int, Future]] = []  # SHED 策略下排队任务的 (优先级, 序号, 任务) 小根堆
+        self._saturated = False
+        self._rejecting = False
+        self._stats: Dict[str, int] = {"active": 0, "queued": 0, "peak": 0, "completed": 0, "saturated": 0, "shed": 0, "rejected": 0}
+    
+    def submit(self, fn: Callable[..., Any], *args: Any, priority: int = 0) -> Optional[Future]:
+        """提交任务，排队已满且无法挤出时返回 None"""
+        if not self._admit(priority):
+            return None
+        try:
+            future = self._executor.submit(self._run, fn, args)
+        except RuntimeError:
+            with self._lock:
+                self._stats["queued"] -= 1
+            raise
+        if self.overflow is OverflowPolicy.SHED:
+            with self._lock:
+                heapq.heappush(self._waiting, (priority, next(self._seq), future))
+                if len(self._waiting) > 2 * (self.max_workers + self.max_queue):
+                    self._waiting = [item for item in self._waiting if not item[2].done()]
+                    heapq.heapify(self._waiting)
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def _admit(self, priority: int) -> bool:
+        """占用一个排队名额，必要时挤出优先级更低的排队任务"""
+        while True:
+            with self._lock:
+                busy = self._stats["active"] + self._stats["queued"] >= self.max_workers
+                if not busy or self._stats["queued"] < self.max_queue:
+                    if busy:
+                        # 所有线程都在忙，新任务需要排队
+                        self._stats["saturated"] += 1
+                        if not self._saturated:
+                            self._saturated = True
+                            logger.warning("插件 %s 的线程池已满 (%d)，后续事件将排队", self.name, self.max_workers)
+                    self._stats["queued"] += 1
+                    return True
+                victim = self._pop_victim(priority)
+                if victim is None:
+                    self._stats["rejected"] += 1
+                    if not self._rejecting:
+                        self._rejecting = True
+                        logger.warning("插件 %s 的线程池排队已满 (%d)，策略 %s，开始拒绝事件", self.name, self.max_queue, self.overflow.value)
+                    return False
+            # 取消会同步执行完成回调，须在锁外进行；已开始执行的任务无法取消
+            if victim.cancel():
+                with self._lock:
+                    self._stats["shed"] += 1
+    
+    def _pop_victim(self, priority: int) -> Optional[Future]:
+        """取出一个优先级低于 priority 且尚未结束的排队任务，调用方需持有 _lock"""
+        if self.overflow is not OverflowPolicy.SHED:
+            return None
+        while self._waiting and self._waiting[0][0] < priority:
+            _, _, victim = heapq.heappop(self._waiting)
+            if not victim.done():
+                return victim
+        return None
+    
+    def _run(self, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["active"] += 1
+            self._stats["peak"] = max(self._stats["peak"], self._stats["active"])
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._stats["active"] -= 1
+                self._stats["completed"] += 1
+                if self._saturated and self._stats["queued"] == 0:
+                    self._saturated = self._rejecting = False
+                    logger.info("插件 %s 的线程池排队已清空", self.name)
+    
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            # 未开始执行就被取消的任务不会经过 _run
+            with self._lock:
+                self._stats["queued"] -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "max_workers": self.max_workers, "max_queue": self.max_queue}
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass
+class RunningHandler:
+    """正在执行的、带时限的处理器"""
+    handler_name: str
+    event: str
+    thread_id: int
+    thread_name: str
+    started: float  # 单调时钟
+    deadline: float
+    stuck: bool = False  # 已超过时限仍未结束
+    cancellable: bool = False  # 协程处理器，超时后会被取消
+    
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    def __str__(self) -> str:
+        return f"{self.handler_name} [{self.event}] @ {self.thread_name}: 已运行 {self.elapsed:.1f} 秒"
 
 
 @dataclass
@@ -115,6 +642,16 @@ class EventHandlerInfo:
     event_pattern: Union[str, Pattern[str]]
     handler_id: UUID
     is_regex: bool = False
+    batch: bool = False  # 为 True 时处理器一次接收事件列表
+    executor: ExecutorKind = ExecutorKind.THREAD
+    retry: Optional[RetryPolicy] = None
+    gate: Optional[SubscriptionGate] = None
+    data_filter: Optional[DataFilter] = None
+    timeout: Optional[float] = None  # 发布模式下的执行时限，None 使用总线默认值
+    bulkhead: Optional[str] = None  # 线程处理器使用的隔离线程池名称，None 使用共享线程池
+    registered_at: float = field(default_factory=time.monotonic)  # 单调时钟，与 Event.monotonic 可比
+    metrics: Optional[PluginMetrics] = None  # 执行计量，见 plugins/metrics.py
+    observer: bool = False  # 只观察事件（如延迟加载插件的存根），请求模式下照常执行但不产生结果
     
     def matches_event(self, event_name: str) -> bool:
         """检查事件是否匹配处理器"""
@@ -124,6 +661,13 @@ class EventHandlerInfo:
             return self.event_pattern == event_name
 
 
+class OverflowPolicy(Enum):
+    """事件入口满载时的处理策略"""
+    BLOCK = "block"  # 阻塞发布者直到出现空位
+    SHED = "shed"    # 取消排队中优先级更低的任务，为新任务腾出位置
+    DROP = "drop"    # 直接丢弃新任务并计数
+
+
 class EventBus(ABC):
     @abstractmethod
     def register_handler(
@@ -160,6 +704,43 @@ class EventBus(ABC):
         """请求-响应模式"""
         pass
     
+    async def request_first(
+        self,
+        event: str,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ) -> Any:
+        """返回第一个成功的响应；没有处理器时返回 None，全部失败时抛出最先出现的异常"""
+        errors: List[Exception] = []
+        stream = self.request_stream(event, data, source=source, target=target, timeout=timeout)
+        try:
+            async for _, result in stream:
+                if not isinstance(result, Exception):
+                    return result
+                errors.append(result)
+        finally:
+            await stream.aclose()
+        if errors:
+            raise errors[0]
+        return None
+    
+    async def request_stream(
+        self,
+        event: str,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ) -> AsyncIterator[Tuple[UUID, Union[Any, Exception]]]:
+        """逐个产出 (处理器ID, 结果或异常)，默认等待 request 全部完成后产出"""
+        results = await self.request(event, data, source=source, target=target, timeout=timeout)
+        for item in results.items():
+            yield item
+    
     @abstractmethod
     def publish(
         self,
@@ -172,6 +753,54 @@ class EventBus(ABC):
         """发布-订阅模式"""
         pass
     
+    def publish_many(self, events: Iterable[Event]) -> None:
+        """批量发布，默认逐个发布"""
+        for event in events:
+            self.publish(event)
+    
+    async def wait_capacity(self, slots: int = 1, timeout: Optional[float] = None) -> bool:
+        """等待入口能容纳 slots 个处理任务，不阻塞事件循环；总线已关闭时返回 False"""
+        return not self.is_closed()
+    
+    async def publish_async(
+        self,
+        event: str | Event,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None
+    ) -> None:
+        """在协程中发布：先等待入口容纳本事件的全部处理器，再发布；默认直接发布"""
+        self.publish(event, data, source=source, target=target)
+    
+    def last_value(self, event: str) -> Optional[Event]:
+        """粘性事件最后一次发布的值，不支持粘性事件的实现返回 None"""
+        return None
+    
+    def create_bulkhead(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: Optional[int] = None,
+        overflow: Optional[OverflowPolicy] = None,
+    ) -> Optional[str]:
+        """创建隔离线程池，返回可传给 register_handler(bulkhead=...) 的名称；不支持时返回 None
+
+        max_queue 为排队任务上限，缺省为线程数的 DEFAULT_BULKHEAD_QUEUE_FACTOR 倍；
+        overflow 为排队满时的策略，只支持 SHED 与 DROP，缺省为 DROP
+        """
+        return None
+    
+    def remove_bulkhead(self, name: str) -> None:
+        """移除隔离线程池"""
+    
+    def prepare_executors(self, kinds: Iterable[ExecutorKind]) -> None:
+        """按声明的处理器预先启动所需的执行器，免得首个事件承担启动开销；不支持时什么也不做"""
+    
+    def redeliver(self, event: Event, handler_ids: Collection[UUID]) -> int:
+        """把事件补发给指定处理器中注册晚于事件创建的那些，返回补发数；不支持时返回 0"""
+        return 0
+    
     @abstractmethod
     def close(self) -> None: 
         """关闭事件总线"""
@@ -183,6 +812,10 @@ class EventBus(ABC):
         pass
 
 
+def _handler_name(handler: EventHandler) -> str:
+    return getattr(handler, "__qualname__", type(handler).__name__)
+
+
 def _handler_to_uuid(func) -> uuid.UUID:
     """生成处理器的UUID"""
     while isinstance(func, functools.partial):
@@ -212,18 +845,256 @@ def _compile_event_pattern(event_pattern: Union[str, Pattern[str]]) -> Tuple[Uni
     return event_pattern, False
 
 
+@dataclass(frozen=True)
+class _ProcessHandlerRef:
+    """进程池处理器的引用，子进程按模块名与文件路径重新定位处理器"""
+    module: str
+    qualname: str
+    file: Optional[str] = None
+    
+    @classmethod
+    def of(cls, handler: EventHandler) -> "_ProcessHandlerRef":
+        func = handler
+        while isinstance(func, functools.partial):
+            func = func.func
+        if inspect.ismethod(func):
+            owner = func.__self__
+            if not isinstance(owner, type):
+                raise ValueError(
+                    f"进程处理器不能是绑定到插件实例的方法（子进程中没有插件实例）: {handler!r}，"
+                    "请改为 @staticmethod 或 @classmethod，所需数据通过事件传入"
+                )
+            # 类方法按 类.方法名 定位，子进程中取得的同样是绑定到类的方法
+            module_name, qualname = owner.__module__, f"{owner.__qualname__}.{func.__name__}"
+        else:
+            module_name, qualname = getattr(func, "__module__", None), getattr(func, "__qualname__", "")
+        if not module_name or not qualname or "<" in qualname:
+            raise ValueError(f"进程处理器必须是模块级函数、静态方法或类方法: {handler!r}")
+        module = sys.modules.get(module_name)
+        return cls(module_name, qualname, getattr(module, "__file__", None))
+    
+    def resolve(self) -> EventHandler:
+        if self.module not in sys.modules:
+            try:
+                importlib.import_module(self.module)
+            except ImportError:
+                if not self.file:
+                    raise
+                # 插件目录不在 sys.path 中，按包层级推出其所在目录
+                depth = self.module.count(".") + (1 if Path(self.file).name == "__init__.py" else 0)
+                sys.path.insert(0, str(Path(self.file).parents[depth]))
+                importlib.import_module(self.module)
+        obj: Any = sys.modules[self.module]
+        for part in self.qualname.split("."):
+            obj = getattr(obj, part)
+        return obj
+
+
+_process_handler_cache: Dict[_ProcessHandlerRef, EventHandler] = {}
+
+
+def _run_in_process(ref: _ProcessHandlerRef, payload: Any, sequence: bool = False) -> Any:
+    """进程池中的执行入口；sequence 模式返回失败的 (事件, 异常) 列表"""
+    handler = _process_handler_cache.get(ref)
+    if handler is None:
+        handler = _process_handler_cache[ref] = ref.resolve()
+    
+    def call(event):
+        result = handler(event)
+        if inspect.isawaitable(result):
+            return asyncio.run(result)
+        return result
+    
+    if not sequence:
+        return call(payload)
+    failures = []
+    for event in payload:
+        try:
+            call(event)
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(repr(e))
+            failures.append((event, e))
+    return failures
+
+
+def _on_event_loop() -> bool:
+    """当前线程是否正在运行 asyncio 事件循环"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def _wait_with_timeout(awaitable: Awaitable[Any], timeout: float) -> Any:
+    """超时后取消协程处理器，并抛出带说明的 TimeoutError"""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except TimeoutError as e:
+        if isinstance(e.__cause__, asyncio.CancelledError):
+            raise TimeoutError(f"处理器执行超过 {timeout} 秒，已取消") from None
+        raise
+
+
+def _trace_attrs(handler_info: EventHandlerInfo, payload: Any) -> Dict[str, Any]:
+    first = payload[0] if isinstance(payload, list) else payload
+    return {"event": first.event, "handler": _handler_name(handler_info.handler)}
+
+
 class ConcurrentEventBus(EventBus):
-    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        overflow: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK,
+        block_timeout: Optional[float] = None,
+        loop_block_timeout: float = 0.05,
+        process_workers: Optional[int] = None,
+        dead_letter_size: int = DEFAULT_DEAD_LETTER_SIZE,
+        journal: Optional[EventJournal] = None,
+        sticky_events: Iterable[str] = (),
+        handler_timeout: Optional[float] = None,
+        watchdog_interval: float = 1.0,
+        min_workers: int = DEFAULT_MIN_WORKERS,
+        adaptive: bool = True,
+    ) -> None:
+        """
+        Args:
+            max_workers: 共享线程池上限，None 时按 CPU 核数估算
+            max_pending: 已提交但未完成的处理任务上限，<= 0 表示不限制
+            overflow: 入口满载时的策略
+            block_timeout: BLOCK 策略下发布者最长等待时间，超时后丢弃，None 表示一直等待
+            loop_block_timeout: 在 asyncio 事件循环线程中同步发布时 BLOCK 最多等待的时间，超时后丢弃，
+                计入 dropped 与 loop_dropped 并逐次告警；等待会冻结整个事件循环（包括释放名额的协程），
+                协程中应使用 publish_async
+            process_workers: 进程池大小，None 为 CPU 核数；仅在注册了进程处理器时创建，
+                工作进程以 forkserver（不可用时 spawn）方式启动，不从多线程的主进程 fork
+            dead_letter_size: 死信存储容量
+            journal: 记录所有发布事件的事件日志，None 表示不记录
+            sticky_events: 保留最后一次发布值的事件名，新订阅者注册时立即收到
+            handler_timeout: 发布模式下处理器的默认执行时限（秒），None 表示不限制；
+                超时的协程处理器会被取消，同步处理器无法中断，由看门狗标记为卡住并报告
+            watchdog_interval: 看门狗检查间隔（秒）
+            min_workers: 共享线程池下限，仅 adaptive 时有效
+            adaptive: 共享线程池按排队延迟与利用率在 [min_workers, max_workers] 内伸缩，
+                为 False 时使用固定大小的 ThreadPoolExecutor
+        """
         self._handlers: Dict[UUID, EventHandlerInfo] = {}
-        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="EventBus")
+        # 数据过滤索引：字段名 -> 取值 -> 处理器；没有可索引条件的处理器放在 _unindexed
+        self._unindexed: Dict[UUID, EventHandlerInfo] = {}
+        self._index: Dict[str, Dict[Any, Dict[UUID, EventHandlerInfo]]] = {"group_id": {}, "user_id": {}}
+        self._executor: Union[AdaptiveExecutor, ThreadPoolExecutor]
+        if adaptive:
+            self._executor = AdaptiveExecutor(min_workers, max_workers, thread_name_prefix="EventBus")
+        else:
+            # 与 ThreadPoolExecutor 的缺省大小一致，固定线程池只报告配置的规模
+            self._fixed_workers = max_workers if max_workers is not None else min(32, (os.cpu_count() or 1) + 4)
+            self._executor = ThreadPoolExecutor(max_workers=self._fixed_workers, thread_name_prefix="EventBus")
         self._lock = threading.RLock()
         self._closed = False
+        
+        # 按需创建的事件循环线程与进程池
+        self._process_workers = process_workers
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        
+        # 有界入口：回调可能在持锁的线程内同步触发（取消任务时），因此使用可重入锁
+        self._max_pending = max_pending
+        self._overflow = OverflowPolicy(overflow)
+        self._block_timeout = block_timeout
+        self._loop_block_timeout = loop_block_timeout
+        self._pending = 0
+        self._capacity = threading.Condition(threading.RLock())
+        self._queued: List[Tuple[int, int, Future]] = []  # SHED 策略下的 (优先级, 序号, 任务) 小根堆
+        self._seq = itertools.count()
+        self._overflowing = False
+        self._local = threading.local()
+        
+        # 插件隔离线程池
+        self._bulkheads: Dict[str, Bulkhead] = {}
+        
+        # 执行时限与看门狗
+        self._handler_timeout = handler_timeout
+        self._running: Dict[int, RunningHandler] = {}
+        self._running_ids = itertools.count()
+        self._watchdog: Optional[threading.Thread] = None
+        self._watchdog_stop = threading.Event()
+        self._watchdog_interval = watchdog_interval
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "completed": 0,
+            "dropped": 0,
+            "shed": 0,
+            "blocked": 0,
+            "loop_dropped": 0,  # dropped 中在事件循环线程上 BLOCK 等待超时的部分
+            "retried": 0,
+            "dead_lettered": 0,
+            "stuck": 0,
+        }
+        self.dead_letters = DeadLetterStore(dead_letter_size)
+        self.journal = journal
+        self._sticky: Set[str] = set(sticky_events)
+        self._last_values: Dict[str, Event] = {}
     
-    def register_handler(self, handler: EventHandler, event: Union[str, Pattern[str]]) -> UUID:
-        """注册事件处理器，支持正则表达式"""
+    def register_handler(
+        self,
+        handler: EventHandler,
+        event: Union[str, Pattern[str]],
+        *,
+        batch: bool = False,
+        executor: Union[ExecutorKind, str] = ExecutorKind.THREAD,
+        retry: Optional[RetryPolicy] = None,
+        debounce: Optional[float] = None,
+        throttle: Optional[float] = None,
+        sample: Optional[int] = None,
+        window: Optional[float] = None,
+        key: Optional[Callable[[Event], Hashable]] = None,
+        group_id: Union[int, Iterable[int], None] = None,
+        user_id: Union[int, Iterable[int], None] = None,
+        message_type: Union[str, Iterable[str], None] = None,
+        prefix: Union[str, Iterable[str], None] = None,
+        keyword: Union[str, Iterable[str], None] = None,
+        sticky: bool = True,
+        timeout: Optional[float] = None,
+        bulkhead: Optional[str] = None,
+        metrics: Optional[PluginMetrics] = None,
+        observer: bool = False,
+    ) -> UUID:
+        """注册事件处理器，支持正则表达式
+
+        Args:
+            batch: 处理器以列表形式接收事件，publish_many 时一次调用处理整批
+            executor: 处理器的执行方式，见 ExecutorKind
+            retry: 发布模式下失败后的重试策略，None 表示不重试；耗尽后进入死信存储
+            debounce, throttle, sample, window, key: 发布模式下的流量算子，见 SubscriptionGate；
+                window 收集到的事件对 batch 处理器一次投递，否则逐个处理
+            group_id, user_id, message_type, prefix, keyword: 事件数据过滤条件，见 DataFilter；
+                不满足的事件不会投递给该处理器
+            sticky: 注册后立即投递匹配的粘性事件的最后值
+            timeout: 发布模式下的执行时限（秒），None 使用总线的 handler_timeout
+            bulkhead: 线程处理器使用的隔离线程池，见 create_bulkhead
+            metrics: 记录处理器执行耗时与事件数的计量对象，插件上下文会传入插件的计量
+            observer: 只观察事件，request / request_first / request_stream 的结果中不包含该处理器
+        """
         if self._closed: 
             raise RuntimeError("事件总线已关闭")
         
+        executor = ExecutorKind(executor)
+        if executor is ExecutorKind.PROCESS:
+            # 提前校验，避免到发布时才发现无法跨进程传递
+            pickle.dumps(_ProcessHandlerRef.of(handler))
+        
+        gate = None
+        if any(option is not None for option in (debounce, throttle, sample, window)):
+            gate = SubscriptionGate(debounce=debounce, throttle=throttle, sample=sample, window=window, key=key)
+        data_filter = DataFilter.build(
+            group_id=group_id, user_id=user_id, message_type=message_type, prefix=prefix, keyword=keyword
+        )
+        
         # 编译事件模式
         event_pattern, is_regex = _compile_event_pattern(event)
         handler_id = _handler_to_uuid(handler)
@@ -231,15 +1102,35 @@ class ConcurrentEventBus(EventBus):
         with self._lock:
             if handler_id in self._handlers:
                 logger.warning(f"处理器 {handler_id} 已注册，将被替换")
+                self._unindex_handler(self._handlers[handler_id])
             
-            self._handlers[handler_id] = EventHandlerInfo(
+            self._handlers[handler_id] = handler_info = EventHandlerInfo(
                 handler=handler,
                 event_pattern=event_pattern,
                 handler_id=handler_id,
-                is_regex=is_regex
+                is_regex=is_regex,
+                batch=batch,
+                executor=executor,
+                retry=retry,
+                gate=gate,
+                data_filter=data_filter,
+                timeout=timeout,
+                bulkhead=bulkhead,
+                metrics=metrics,
+                observer=observer,
             )
+            self._index_handler(handler_info)
+            if gate is not None:
+                gate.deliver = partial(self._deliver_gated, handler_info)
+                gate.schedule = self._call_later
             
-            logger.debug(f"注册事件处理器: {event_pattern} -> {handler_id} (regex: {is_regex})")
+            logger.debug(f"注册事件处理器: {event_pattern} -> {handler_id} (regex: {is_regex}, batch: {batch}, executor: {executor.value}, gate: {gate}, filter: {data_filter})")
+            retained = list(self._last_values.values()) if sticky else []
+        
+        # 补发粘性事件，不经过流量算子
+        for event_obj in retained:
+            if handler_info.matches_event(event_obj.event) and (data_filter is None or data_filter.matches(event_obj.data)):
+                self._submit(event_obj.priority, handler_info, [event_obj] if batch else event_obj)
         
         return handler_id
     
@@ -255,19 +1146,91 @@ class ConcurrentEventBus(EventBus):
         """取消注册事件处理器"""
         with self._lock:
             if handler_id in self._handlers:
-                del self._handlers[handler_id]
+                self._unindex_handler(self._handlers.pop(handler_id))
                 logger.debug(f"取消注册事件处理器: {handler_id}")
                 return True
             return False
     
+    def add_sticky(self, *events: str) -> None:
+        """将事件名设为粘性，此后发布的值会被保留"""
+        with self._lock:
+            self._sticky.update(events)
+    
+    def last_value(self, event: str) -> Optional[Event]:
+        """粘性事件最后一次发布的值"""
+        return self._last_values.get(event)
+    
+    def redeliver(self, event: Event, handler_ids: Collection[UUID]) -> int:
+        """把事件补发给指定处理器中注册晚于事件创建的那些，返回补发数
+
+        用于事件到达后才注册处理器的场景（如延迟加载的插件），
+        注册早于事件的处理器在发布时已收到，粘性事件已在注册时补发，都不会重复投递。
+        """
+        if self._closed:
+            return 0
+        with self._lock:
+            candidates = [self._handlers[i] for i in handler_ids if i in self._handlers]
+        if self._last_values.get(event.event) is event:
+            return 0
+        count = 0
+        for handler_info in candidates:
+            if handler_info.registered_at <= event.monotonic or not handler_info.matches_event(event.event):
+                continue
+            if handler_info.data_filter is not None and not handler_info.data_filter.matches(event.data):
+                continue
+            if handler_info.gate is not None and not handler_info.gate.offer(event):
+                continue
+            self._submit(event.priority, handler_info, [event] if handler_info.batch else event)
+            count += 1
+        return count
+    
+    def _index_handler(self, handler_info: EventHandlerInfo) -> None:
+        """调用方需持有 _lock"""
+        index_key = handler_info.data_filter.index_key if handler_info.data_filter is not None else None
+        if index_key is None:
+            self._unindexed[handler_info.handler_id] = handler_info
+            return
+        field_name, values = index_key
+        for value in values:
+            self._index[field_name].setdefault(value, {})[handler_info.handler_id] = handler_info
+    
+    def _unindex_handler(self, handler_info: EventHandlerInfo) -> None:
+        """调用方需持有 _lock"""
+        self._unindexed.pop(handler_info.handler_id, None)
+        index_key = handler_info.data_filter.index_key if handler_info.data_filter is not None else None
+        if index_key is None:
+            return
+        field_name, values = index_key
+        index = self._index[field_name]
+        for value in values:
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(handler_info.handler_id, None)
+                if not bucket:
+                    del index[value]
+    
     def _get_matching_handlers(self, event: str | Event) -> List[EventHandlerInfo]:
-        """获取匹配指定事件的所有处理器"""
-        matching_handlers = []
+        """获取匹配指定事件的所有处理器
+
+        传入 Event 时同时按数据过滤条件筛选，带索引条件的处理器只从对应的索引桶中取出；
+        只传入事件名时不检查数据过滤条件，由调用方逐个事件检查。
+        """
+        if not isinstance(event, Event):
+            with self._lock:
+                return [info for info in self._handlers.values() if info.matches_event(event)]
+        
+        event_name, data = event.event, event.data
         with self._lock:
-            for handler_info in self._handlers.values():
-                if handler_info.matches_event(event.event if isinstance(event, Event) else event):
-                    matching_handlers.append(handler_info)
-        return matching_handlers
+            candidates = list(self._unindexed.values())
+            for field_name, index in self._index.items():
+                if index:
+                    bucket = index.get(_id_value(_data_field(data, field_name)))
+                    if bucket:
+                        candidates.extend(bucket.values())
+        return [
+            info for info in candidates
+            if info.matches_event(event_name) and (info.data_filter is None or info.data_filter.matches(data))
+        ]
     
     async def request(
         self,
@@ -284,26 +1247,11 @@ class ConcurrentEventBus(EventBus):
             
         event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
         
-        # 获取匹配的处理器
-        matching_handlers = self._get_matching_handlers(event)
-        if not matching_handlers:
-            logger.debug(f"没有找到匹配事件 '{event}' 的处理器")
+        started = self._start_request(event_obj)
+        if not started:
             return {}
-        
-        # 在线程池中执行匹配的处理器
-        loop = asyncio.get_event_loop()
-        futures = []
-        handler_infos = []
-        
-        for handler_info in matching_handlers:
-            future = loop.run_in_executor(
-                self._executor, 
-                self._execute_handler, 
-                handler_info.handler, 
-                event_obj
-            )
-            futures.append(future)
-            handler_infos.append(handler_info)
+        futures = list(started)
+        handler_infos = list(started.values())
         
         # 等待所有处理器完成
         results: Dict[UUID, Union[Any, Exception]] = {}
@@ -335,19 +1283,89 @@ class ConcurrentEventBus(EventBus):
         
         return results
     
-    def _execute_handler(self, handler: EventHandler, event: Event) -> Any:
+    def _start_request(self, event: Event) -> Dict[asyncio.Future, EventHandlerInfo]:
+        """按处理器声明的执行方式启动所有匹配的处理器，观察者照常启动但不等待其结果"""
+        matching_handlers = self._get_matching_handlers(event)
+        if not matching_handlers:
+            logger.debug("没有找到匹配事件 '%s' 的处理器", event.event)
+            return {}
+        
+        started: Dict[asyncio.Future, EventHandlerInfo] = {}
+        for handler_info in matching_handlers:
+            payload = [event] if handler_info.batch else event
+            future = self._start(handler_info, payload, priority=event.priority, bulkhead=self._bulkhead_for(handler_info))
+            if handler_info.observer:
+                continue
+            if future is None:
+                # 隔离线程池排队已满，拒绝作为该处理器的结果
+                future = Future()
+                future.set_exception(RuntimeError(f"隔离线程池 {handler_info.bulkhead} 排队已满，请求被拒绝"))
+            started[asyncio.wrap_future(future)] = handler_info
+        return started
+    
+    async def request_stream(
+        self,
+        event: str,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ) -> AsyncIterator[Tuple[UUID, Union[Any, Exception]]]:
+        """按完成顺序产出 (处理器ID, 结果或异常)，提前结束迭代会取消其余处理器"""
+        if self._closed: 
+            raise RuntimeError("事件总线已关闭")
+        
+        event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
+        pending = self._start_request(event_obj)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    handler_info = pending.pop(future)
+                    error = future.exception()
+                    yield handler_info.handler_id, (error if error is not None else future.result())
+            
+            for handler_info in list(pending.values()):
+                yield handler_info.handler_id, asyncio.TimeoutError("处理器执行超时")
+        finally:
+            # 已在线程中运行的处理器无法中断，只能取消尚未开始的
+            for future in pending:
+                future.cancel()
+    
+    def _execute_handler(self, handler: EventHandler, event: Event, timeout: Optional[float] = None) -> Any:
         """在线程池中执行事件处理器"""
+        self._local.in_handler = True
+        token = self._track(handler, event, timeout) if timeout is not None else None
         try:
             result = handler(event)
             if isinstance(result, Awaitable):
+                if timeout is not None:
+                    self._running[token].cancellable = True
+                    result = _wait_with_timeout(result, timeout)
                 return asyncio.run(result)
             return result
         except Exception as e:
-            logger.error(f"事件处理器执行失败 Event: {event} Error: {e}", exc_info=True)
+            if token is not None:
+                # 已结束的执行不应再被看门狗标记
+                self._untrack(token)
+                token = None
+            # 日志参数延迟格式化，附注使用不带颜色的 repr
+            logger.error("事件处理器执行失败 Event: %s Error: %s", event, e, exc_info=True)
             if hasattr(e, 'add_note'):
-                e.add_note(f"Event: {event}")
+                e.add_note(f"Event: {event!r}")
                 e.add_note(f"Handler: {handler.__name__ if hasattr(handler, '__name__') else type(handler).__name__}")
             raise
+        finally:
+            self._local.in_handler = False
+            if token is not None:
+                self._untrack(token)
     
     def publish(
         self,
@@ -362,24 +1380,582 @@ class ConcurrentEventBus(EventBus):
             raise RuntimeError("事件总线已关闭")
             
         event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
+        if self.journal is not None:
+            self.journal.record_event(event_obj)
+        if event_obj.event in self._sticky:
+            self._last_values[event_obj.event] = event_obj
         
         # 获取匹配的处理器
-        matching_handlers = self._get_matching_handlers(event)
+        matching_handlers = self._get_matching_handlers(event_obj)
         if not matching_handlers:
-            logger.debug(f"没有找到匹配事件 '{event}' 的处理器")
+            logger.debug("没有找到匹配事件 '%s' 的处理器", event_obj.event)
             return
         
         # 异步执行所有匹配的处理器
         for handler_info in matching_handlers:
-            future = self._executor.submit(self._execute_handler, handler_info.handler, event_obj)
-            future.add_done_callback(self._log_handler_exception)
+            if handler_info.gate is not None and not handler_info.gate.offer(event_obj):
+                continue
+            payload = [event_obj] if handler_info.batch else event_obj
+            self._submit(event_obj.priority, handler_info, payload)
+    
+    def publish_many(self, events: Iterable[Event]) -> None:
+        """批量发布：每个事件名只匹配一次处理器，每个处理器只提交一个任务"""
+        if self._closed: 
+            raise RuntimeError("事件总线已关闭")
+        
+        journal = self.journal
+        by_name: Dict[str, List[Event]] = {}
+        for event in events:
+            if journal is not None:
+                journal.record_event(event)
+            if event.event in self._sticky:
+                self._last_values[event.event] = event
+            by_name.setdefault(event.event, []).append(event)
+        
+        # handler_id -> (处理器信息, 按发布顺序排列的事件)
+        batches: Dict[UUID, Tuple[EventHandlerInfo, List[Event]]] = {}
+        for name, group in by_name.items():
+            for handler_info in self._get_matching_handlers(name):
+                batches.setdefault(handler_info.handler_id, (handler_info, []))[1].extend(group)
+        
+        for handler_info, group in batches.values():
+            if handler_info.data_filter is not None:
+                group = [e for e in group if handler_info.data_filter.matches(e.data)]
+                if not group:
+                    continue
+            if handler_info.gate is not None:
+                group = [e for e in group if handler_info.gate.offer(e)]
+                if not group:
+                    continue
+            priority = max(e.priority for e in group)
+            self._submit(priority, handler_info, group, sequence=not handler_info.batch)
     
-    def _log_handler_exception(self, future: Future) -> None:
-        """记录处理器执行中的异常"""
+    def _execute_sequence(self, handler: EventHandler, events: List[Event], timeout: Optional[float] = None) -> List[Tuple[Event, Exception]]:
+        """在同一个任务中依次处理多个事件，单个事件失败不影响后续事件，返回失败列表"""
+        failures = []
+        for event in events:
+            try:
+                self._execute_handler(handler, event, timeout)
+            except Exception as e:
+                failures.append((event, e))  # _execute_handler 已记录日志
+        return failures
+    
+    def _start(
+        self,
+        handler_info: EventHandlerInfo,
+        payload: Any,
+        sequence: bool = False,
+        timeout: Optional[float] = None,
+        priority: int = 0,
+        bulkhead: Optional[Bulkhead] = None,
+    ) -> Optional[Future]:
+        """按处理器的执行方式启动任务；sequence 为 True 时 payload 为需逐个处理的事件列表
+
+        timeout 为单个事件的执行时限，进程处理器不受限制；线程处理器交给 bulkhead 时，
+        其排队已满则返回 None
+        """
+        handler = handler_info.handler
+        kind = handler_info.executor
+        traced = current_span.get() is not None
+        metrics = handler_info.metrics
+        if kind is ExecutorKind.LOOP:
+            # 协程任务会继承提交线程的上下文，追踪随之传递
+            coro = self._run_on_loop(handler, payload, sequence, timeout)
+            if metrics is not None:
+                coro = self._metered_async(metrics, payload, sequence, coro)
+            if traced:
+                coro = self._traced_async(handler_info, payload, time.monotonic(), coro)
+            return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        if kind is ExecutorKind.PROCESS:
+            # 追踪上下文不跨进程
+            future = self._ensure_process_pool().submit(
+                _run_in_process, _ProcessHandlerRef.of(handler), payload, sequence
+            )
+            if metrics is not None:
+                # 子进程中的 CPU 时间无法取得，墙上时间含进程池排队
+                future.add_done_callback(partial(self._meter_process, metrics, payload, sequence, time.perf_counter()))
+            return future
+        fn = self._execute_sequence if sequence else self._execute_handler
+        if metrics is not None:
+            fn = partial(self._metered_call, metrics, sequence, fn)
+        if traced:
+            # 线程池不会自动传递 contextvars，需显式在提交时的上下文中运行
+            call: Tuple[Any, ...] = (
+                contextvars.copy_context().run,
+                self._traced_call, handler_info, payload, time.monotonic(), fn, timeout,
+            )
+        else:
+            call = (fn, handler, payload, timeout)
+        if bulkhead is not None:
+            return bulkhead.submit(*call, priority=priority)
+        return self._executor.submit(*call)
+    
+    def _bulkhead_for(self, handler_info: EventHandlerInfo) -> Optional[Bulkhead]:
+        """线程处理器所属的隔离线程池，已被移除时返回 None 以退回共享线程池"""
+        if handler_info.bulkhead is None or handler_info.executor is not ExecutorKind.THREAD:
+            return None
+        return self._bulkheads.get(handler_info.bulkhead)
+    
+    def _traced_call(
+        self,
+        handler_info: EventHandlerInfo,
+        payload: Any,
+        submitted: float,
+        fn: Callable[..., Any],
+        timeout: Optional[float],
+    ) -> Any:
+        """记录排队等待与处理器执行两个 span"""
+        attrs = _trace_attrs(handler_info, payload)
+        tracer.record("bus.queue", submitted, time.monotonic(), **attrs)
+        with tracer.span("bus.handler", **attrs):
+            return fn(handler_info.handler, payload, timeout)
+    
+    def _metered_call(self, metrics: PluginMetrics, sequence: bool, fn: Callable[..., Any], handler: EventHandler, payload: Any, timeout: Optional[float]) -> Any:
+        """在线程中执行并计量，协程处理器由 asyncio.run 在本线程执行，CPU 时间同样计入"""
+        token = current_metrics.set(metrics)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        errors = 1
         try:
-            future.result()
-        except Exception as e:
-            logger.error(f"事件处理器中出现未处理的异常: {e}", exc_info=True)
+            result = fn(handler, payload, timeout)
+            errors = len(result) if sequence else 0
+            return result
+        finally:
+            metrics.record_handler(
+                len(payload) if isinstance(payload, list) else 1,
+                time.perf_counter() - wall, time.thread_time() - cpu, errors,
+            )
+            current_metrics.reset(token)
+    
+    async def _metered_async(self, metrics: PluginMetrics, payload: Any, sequence: bool, coro: Awaitable[Any]) -> Any:
+        current_metrics.set(metrics)  # 任务有独立的上下文，无需恢复
+        timed = CpuTimedCoroutine(coro)
+        wall = time.perf_counter()
+        errors = 1
+        try:
+            result = await timed
+            errors = len(result) if sequence else 0
+            return result
+        finally:
+            metrics.record_handler(
+                len(payload) if isinstance(payload, list) else 1,
+                time.perf_counter() - wall, timed.cpu, errors,
+            )
+    
+    @staticmethod
+    def _meter_process(metrics: PluginMetrics, payload: Any, sequence: bool, submitted: float, future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        errors = 1 if error is not None else (len(future.result()) if sequence else 0)
+        metrics.record_handler(len(payload) if isinstance(payload, list) else 1, time.perf_counter() - submitted, None, errors)
+    
+    async def _traced_async(self, handler_info: EventHandlerInfo, payload: Any, submitted: float, coro: Awaitable[Any]) -> Any:
+        attrs = _trace_attrs(handler_info, payload)
+        tracer.record("bus.queue", submitted, time.monotonic(), **attrs)
+        with tracer.span("bus.handler", **attrs):
+            return await coro
+    
+    async def _run_on_loop(self, handler: EventHandler, payload: Any, sequence: bool, timeout: Optional[float] = None) -> Any:
+        """在事件循环线程中执行处理器；sequence 模式返回失败列表"""
+        failures = []
+        for event in (payload if sequence else (payload,)):
+            token = self._track(handler, event, timeout) if timeout is not None else None
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    if timeout is not None:
+                        self._running[token].cancellable = True
+                        result = _wait_with_timeout(result, timeout)
+                    result = await result
+            except Exception as e:
+                if token is not None:
+                    self._untrack(token)
+                    token = None
+                if not sequence:
+                    raise
+                logger.error("事件处理器执行失败 Event: %s Error: %s", event, e, exc_info=True)
+                failures.append((event, e))
+            finally:
+                if token is not None:
+                    self._untrack(token)
+        return failures if sequence else result
+    
+    def _track(self, handler: EventHandler, event: Event, timeout: float) -> int:
+        """登记一次带时限的执行，返回用于注销的编号"""
+        token = next(self._running_ids)
+        thread = threading.current_thread()
+        now = time.monotonic()
+        self._running[token] = RunningHandler(_handler_name(handler), event.event, thread.ident, thread.name, now, now + timeout)
+        if self._watchdog is None:
+            self._ensure_watchdog()
+        return token
+    
+    def _untrack(self, token: int) -> None:
+        running = self._running.pop(token, None)
+        if running is not None and running.stuck:
+            logger.warning("卡住的处理器 %s 在 %.1f 秒后结束，线程 %s 已释放", running.handler_name, running.elapsed, running.thread_name)
+    
+    def _ensure_watchdog(self) -> None:
+        with self._lock:
+            if self._watchdog is None and not self._closed:
+                self._watchdog = threading.Thread(target=self._watchdog_loop, name="EventBusWatchdog", daemon=True)
+                self._watchdog.start()
+    
+    def _watchdog_loop(self) -> None:
+        """标记超过时限仍在运行的处理器，并报告其占用的线程与调用栈"""
+        while not self._watchdog_stop.wait(self._watchdog_interval):
+            now = time.monotonic()
+            for running in list(self._running.values()):
+                # 协程处理器到期时正在被取消，多留一个检查周期
+                grace = self._watchdog_interval if running.cancellable else 0.0
+                if running.stuck or now < running.deadline + grace:
+                    continue
+                running.stuck = True
+                with self._capacity:
+                    self._stats["stuck"] += 1
+                frame = sys._current_frames().get(running.thread_id)
+                stack = "".join(traceback.format_stack(frame, limit=5)) if frame is not None else ""
+                logger.warning(
+                    "处理器 %s 处理事件 '%s' 已运行 %.1f 秒，超过时限仍未结束，占用线程 %s\n%s",
+                    running.handler_name, running.event, running.elapsed, running.thread_name, stack,
+                )
+    
+    def create_bulkhead(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: Optional[int] = None,
+        overflow: Optional[OverflowPolicy] = None,
+    ) -> Optional[str]:
+        """创建（或按新参数重建）名为 name 的隔离线程池"""
+        bulkhead = Bulkhead(name, max_workers, max_queue, overflow)
+        with self._lock:
+            if self._closed:
+                bulkhead.shutdown()
+                raise RuntimeError("事件总线已关闭")
+            current = self._bulkheads.get(name)
+            if current is not None:
+                if (current.max_workers, current.max_queue, current.overflow) == (bulkhead.max_workers, bulkhead.max_queue, bulkhead.overflow):
+                    bulkhead.shutdown()
+                    return name
+                current.shutdown()
+            self._bulkheads[name] = bulkhead
+        logger.debug("创建隔离线程池 %s (%d)", name, max_workers)
+        return name
+    
+    def remove_bulkhead(self, name: str) -> None:
+        with self._lock:
+            bulkhead = self._bulkheads.pop(name, None)
+        if bulkhead is not None:
+            bulkhead.shutdown()
+    
+    def executor_stats(self) -> Dict[str, Any]:
+        """共享线程池的规模与负载；固定大小的线程池只有配置的规模"""
+        if isinstance(self._executor, AdaptiveExecutor):
+            return self._executor.stats()
+        return {"max_workers": self._fixed_workers}
+    
+    def executor_decisions(self) -> List[PoolDecision]:
+        """共享线程池最近的伸缩决策，固定大小的线程池没有决策"""
+        if isinstance(self._executor, AdaptiveExecutor):
+            return self._executor.decisions()
+        return []
+    
+    def bulkhead_stats(self) -> Dict[str, Dict[str, int]]:
+        """各隔离线程池的使用情况"""
+        with self._lock:
+            bulkheads = list(self._bulkheads.values())
+        return {bulkhead.name: bulkhead.stats() for bulkhead in bulkheads}
+    
+    def stuck_handlers(self) -> List[RunningHandler]:
+        """超过时限仍在运行的处理器，按已运行时间从长到短排列"""
+        return sorted((r for r in list(self._running.values()) if r.stuck), key=lambda r: r.started)
+    
+    def prepare_executors(self, kinds: Iterable[ExecutorKind]) -> None:
+        kinds = set(kinds)
+        if self._closed:
+            return
+        if ExecutorKind.LOOP in kinds:
+            self._ensure_loop()
+        if ExecutorKind.PROCESS in kinds:
+            # 进程池在首次提交时才创建工作进程
+            self._ensure_process_pool().submit(os.getpid)
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                
+                def run() -> None:
+                    # 循环线程内的嵌套发布不能阻塞
+                    self._local.in_handler = True
+                    asyncio.set_event_loop(loop)
+                    loop.run_forever()
+                
+                self._loop_thread = threading.Thread(target=run, name="EventBusLoop", daemon=True)
+                self._loop_thread.start()
+                self._loop = loop
+            return self._loop
+    
+    def _ensure_process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                # 主进程中有大量线程，fork 出的子进程可能继承被其他线程持有的锁而死锁
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self._process_workers, mp_context=multiprocessing.get_context(method),
+                )
+            return self._process_pool
+    
+    def _submit(
+        self,
+        priority: int,
+        handler_info: EventHandlerInfo,
+        payload: Any,
+        sequence: bool = False,
+        attempt: int = 1,
+    ) -> Optional[Future]:
+        """经有界入口提交处理任务，被拒绝时返回 None
+
+        交给隔离线程池的任务在移交时即归还入口名额，其排队由隔离线程池自行限制
+        """
+        if not self._acquire_slot(priority):
+            return None
+        timeout = handler_info.timeout if handler_info.timeout is not None else self._handler_timeout
+        bulkhead = self._bulkhead_for(handler_info)
+        try:
+            future = self._start(handler_info, payload, sequence, timeout, priority, bulkhead)
+        except RuntimeError:
+            # 线程池已关闭
+            self._release_slot()
+            return None
+        
+        if bulkhead is not None:
+            self._release_slot()
+            if future is None:
+                return None
+        elif self._overflow is OverflowPolicy.SHED:
+            with self._capacity:
+                heapq.heappush(self._queued, (priority, next(self._seq), future))
+                if len(self._queued) > 2 * max(self._max_pending, 1):
+                    self._queued = [item for item in self._queued if not item[2].done()]
+                    heapq.heapify(self._queued)
+        
+        future.add_done_callback(partial(self._on_task_done, handler_info, payload, sequence, attempt, bulkhead is None))
+        return future
+    
+    def _acquire_slot(self, priority: int) -> bool:
+        """申请一个入口名额，按溢出策略阻塞、挤出或丢弃"""
+        with self._capacity:
+            if self._try_take_slot():
+                return True
+            
+            if self._overflow is OverflowPolicy.BLOCK:
+                # 处理器线程内的嵌套发布不等待，否则线程池占满后会互相等待
+                if getattr(self._local, "in_handler", False):
+                    self._pending += 1
+                    self._stats["submitted"] += 1
+                    return True
+                self._stats["blocked"] += 1
+                timeout = self._block_timeout
+                on_loop = _on_event_loop()
+                if on_loop:
+                    timeout = self._loop_block_timeout if timeout is None else min(timeout, self._loop_block_timeout)
+                self._capacity.wait_for(
+                    lambda: self._closed or self._pending < self._max_pending,
+                    timeout=timeout,
+                )
+                if not self._closed and self._try_take_slot():
+                    return True
+                if on_loop:
+                    # 不在 _overflowing 的一次性告警之内：BLOCK 策略下丢弃事件必须可见
+                    self._stats["dropped"] += 1
+                    self._stats["loop_dropped"] += 1
+                    logger.warning(
+                        "事件循环线程上的同步发布等待 %.3f 秒后仍无空位，BLOCK 策略下丢弃事件（累计 %d 个），协程中应使用 publish_async",
+                        timeout, self._stats["loop_dropped"],
+                    )
+                    return False
+            
+            elif self._overflow is OverflowPolicy.SHED:
+                while self._queued and self._queued[0][0] < priority:
+                    _, _, victim = heapq.heappop(self._queued)
+                    # 已开始执行的任务无法取消；取消成功时其回调会同步释放名额
+                    if victim.cancel():
+                        self._stats["shed"] += 1
+                        if self._try_take_slot():
+                            return True
+            
+            self._stats["dropped"] += 1
+            if not self._overflowing:
+                self._overflowing = True
+                logger.warning(f"事件总线入口已满 ({self._pending}/{self._max_pending})，策略 {self._overflow.value}，开始丢弃事件")
+            return False
+    
+    def _try_take_slot(self) -> bool:
+        """调用方需持有 _capacity"""
+        if self._max_pending > 0 and self._pending >= self._max_pending:
+            return False
+        self._pending += 1
+        self._stats["submitted"] += 1
+        return True
+    
+    def _release_slot(self) -> None:
+        with self._capacity:
+            self._pending -= 1
+            if self._overflowing and self._pending <= self._max_pending // 2:
+                self._overflowing = False
+                logger.info(f"事件总线入口已恢复，累计丢弃 {self._stats['dropped']} 个任务")
+            # 等待多个名额的 wait_capacity 与等待单个名额的发布者混在一起，需全部唤醒
+            self._capacity.notify_all()
+    
+    def _on_task_done(
+        self,
+        handler_info: EventHandlerInfo,
+        payload: Any,
+        sequence: bool,
+        attempt: int,
+        holds_slot: bool,
+        future: Future,
+    ) -> None:
+        """任务结束（含被取消）时释放仍持有的名额，失败的投递交给重试或死信"""
+        if not future.cancelled():
+            with self._capacity:
+                self._stats["completed"] += 1
+        if holds_slot:
+            self._release_slot()
+        if future.cancelled():
+            return
+        
+        error = future.exception()
+        if error is not None:
+            if handler_info.executor is not ExecutorKind.THREAD:
+                # 线程池处理器已在 _execute_handler 中记录
+                logger.error("事件处理器中出现未处理的异常: %s", error, exc_info=error)
+            self._handle_failure(handler_info, payload, error, attempt)
+        elif sequence:
+            for event, event_error in future.result():
+                self._handle_failure(handler_info, event, event_error, attempt)
+    
+    def _handle_failure(self, handler_info: EventHandlerInfo, payload: Any, error: BaseException, attempt: int) -> None:
+        """按重试策略安排重试，否则写入死信存储"""
+        policy = handler_info.retry
+        if policy is not None and not self._closed and policy.should_retry(attempt, error):
+            with self._capacity:
+                self._stats["retried"] += 1
+            delay = policy.delay(attempt)
+            logger.debug("处理器 %s 第 %d 次执行失败，%.2f 秒后重试", handler_info.handler_id, attempt, delay)
+            self._call_later(delay, self._retry, handler_info, payload, attempt + 1)
+            return
+        self._dead_letter(handler_info, payload, error, attempt)
+    
+    def _call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> None:
+        """在事件循环线程上计时，不占用线程池"""
+        loop = self._ensure_loop()
+        loop.call_soon_threadsafe(loop.call_later, delay, callback, *args)
+    
+    def _deliver_gated(self, handler_info: EventHandlerInfo, events: List[Event]) -> None:
+        """投递 debounce / window 定时到期的事件"""
+        with self._lock:
+            if self._closed or self._handlers.get(handler_info.handler_id) is not handler_info:
+                return  # 处理器已注销或被替换
+        priority = max(e.priority for e in events)
+        if handler_info.batch:
+            self._submit(priority, handler_info, events)
+        elif len(events) == 1:
+            self._submit(priority, handler_info, events[0])
+        else:
+            self._submit(priority, handler_info, events, sequence=True)
+    
+    def _retry(self, handler_info: EventHandlerInfo, payload: Any, attempt: int) -> None:
+        if self._closed:
+            return
+        priority = max(e.priority for e in payload) if isinstance(payload, list) else payload.priority
+        if self._submit(priority, handler_info, payload, attempt=attempt) is None:
+            self._dead_letter(handler_info, payload, RuntimeError("重试时事件总线入口已满"), attempt)
+    
+    def _dead_letter(self, handler_info: EventHandlerInfo, payload: Any, error: BaseException, attempts: int) -> None:
+        handler = handler_info.handler
+        letter = self.dead_letters.add(
+            event=payload,
+            handler_id=handler_info.handler_id,
+            handler_name=_handler_name(handler),
+            error=error,
+            attempts=attempts,
+        )
+        with self._capacity:
+            self._stats["dead_lettered"] += 1
+        logger.warning("投递失败，已写入死信: %s", letter)
+    
+    def replay_dead_letters(self, letter_id: Optional[int] = None) -> int:
+        """重新投递死信，letter_id 为 None 时重放全部；返回成功提交的数量
+
+        原处理器仍在注册时只投递给它，否则按事件名重新发布。
+        """
+        replayed = 0
+        for letter in self.dead_letters.pop(letter_id):
+            with self._lock:
+                handler_info = self._handlers.get(letter.handler_id)
+            if handler_info is not None:
+                payload = letter.event
+                if isinstance(payload, list) and not handler_info.batch:
+                    future = self._submit(max(e.priority for e in payload), handler_info, payload, sequence=True)
+                else:
+                    if not isinstance(payload, list) and handler_info.batch:
+                        payload = [payload]
+                    priority = max(e.priority for e in payload) if isinstance(payload, list) else payload.priority
+                    future = self._submit(priority, handler_info, payload)
+                replayed += future is not None
+            else:
+                self.publish_many(letter.event if isinstance(letter.event, list) else [letter.event])
+                replayed += 1
+        return replayed
+    
+    def _has_capacity(self, slots: int) -> bool:
+        # 超过上限的需求按上限计，否则永远等不到
+        return self._max_pending <= 0 or self._pending + min(slots, self._max_pending) <= self._max_pending
+    
+    def _wait_capacity(self, slots: int, timeout: Optional[float] = None) -> bool:
+        with self._capacity:
+            return self._capacity.wait_for(
+                lambda: self._closed or self._has_capacity(slots),
+                timeout=timeout,
+            ) and not self._closed
+    
+    async def wait_capacity(self, slots: int = 1, timeout: Optional[float] = None) -> bool:
+        """等待入口能容纳 slots 个处理任务，供异步接收循环实现背压"""
+        if self._has_capacity(slots):
+            return not self._closed
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._wait_capacity, slots, timeout)
+    
+    async def publish_async(
+        self,
+        event: str | Event,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None
+    ) -> None:
+        """在协程中发布：按本事件匹配的处理器数等待入口空位，等待不阻塞事件循环
+        
+        BLOCK 策略下最多等待 block_timeout，其余策略不等待，之后照常发布并按策略处理溢出。
+        """
+        if self._closed:
+            raise RuntimeError("事件总线已关闭")
+        event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
+        if self._overflow is OverflowPolicy.BLOCK and self._max_pending > 0:
+            slots = len(self._get_matching_handlers(event_obj))
+            if slots:
+                await self.wait_capacity(slots, self._block_timeout)
+        self.publish(event_obj)
+    
+    def stats(self) -> Dict[str, int]:
+        """入口计数快照"""
+        with self._lock:
+            suppressed = sum(info.gate.suppressed for info in self._handlers.values() if info.gate is not None)
+        with self._capacity:
+            return {**self._stats, "suppressed": suppressed, "pending": self._pending, "max_pending": self._max_pending}
     
     def close(self) -> None:
         """关闭事件总线，释放所有资源"""
@@ -388,8 +1964,24 @@ class ConcurrentEventBus(EventBus):
                 return
                 
             self._closed = True
+            self._watchdog_stop.set()
             self._handlers.clear()
+            self._unindexed.clear()
+            self._last_values.clear()
+            for index in self._index.values():
+                index.clear()
             self._executor.shutdown(wait=False)
+            for bulkhead in self._bulkheads.values():
+                bulkhead.shutdown()
+            self._bulkheads.clear()
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+        
+        # 唤醒所有等待入口的发布者
+        with self._capacity:
+            self._capacity.notify_all()
     
     def is_closed(self) -> bool:
         """检查事件总线是否已关闭"""
@@ -416,26 +2008,99 @@ class PluginStatus:
         suffix = f": {self.error}" if self.error else ""
         return f"{self.state.name}{suffix}"
 
+def _config_count(config: Dict[str, Any], key: str, default: Optional[int]) -> Optional[int]:
+    """读取非负整数配置项，取值无效时记录日志并使用默认值"""
+    value = config.get(key, default)
+    if value is None:
+        return default
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        count = -1
+    if count < 0 or isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        logger.error("插件配置项 %s 的值 %r 不是非负整数，使用默认值 %s", key, value, default)
+        return default
+    return count
+
+
+def _bulkhead_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """插件配置中的隔离线程池参数，取值无效时记录日志并使用默认值
+
+    bulkhead_workers 缺省为 DEFAULT_PLUGIN_MAX_WORKERS，0 表示使用共享线程池；
+    bulkhead_queue 为排队上限；bulkhead_overflow 为排队满时的策略 (drop / shed)
+    """
+    if not isinstance(config, dict):
+        config = {}
+    value = config.get("bulkhead_overflow")
+    overflow = None
+    if value is not None:
+        if value in (OverflowPolicy.SHED.value, OverflowPolicy.DROP.value):
+            overflow = OverflowPolicy(value)
+        else:
+            logger.error("插件配置项 bulkhead_overflow 的值 %r 无效，可选 drop / shed，使用 drop", value)
+    return {
+        "max_workers": _config_count(config, "bulkhead_workers", DEFAULT_PLUGIN_MAX_WORKERS) or None,
+        "max_queue": _config_count(config, "bulkhead_queue", None),
+        "overflow": overflow,
+    }
+
+
+# 工作目录是进程共享的：切换目录的生命周期回调按事件循环逐个执行，嵌套调用沿用已持有的锁
+_cwd_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_in_data_dir: contextvars.ContextVar[bool] = contextvars.ContextVar("fcatbot_in_data_dir", default=False)
+
+
+def _cwd_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _cwd_locks.get(loop)
+    if lock is None:
+        lock = _cwd_locks[loop] = asyncio.Lock()
+    return lock
+
+
 class PluginContext:
-    def __init__(self, event_bus: EventBus, plugin_name: PluginName, data_dir: Path) -> None:
+    def __init__(
+        self,
+        event_bus: EventBus,
+        plugin_name: PluginName,
+        data_dir: Path,
+        max_workers: Optional[int] = None,
+        metrics: Optional[PluginMetrics] = None,
+        max_queue: Optional[int] = None,
+        overflow: Optional[OverflowPolicy] = None,
+    ) -> None:
+        """
+        Args:
+            max_workers: 插件独占线程池大小，None 或 0 表示使用事件总线的共享线程池
+            metrics: 插件的资源计量，由加载器跨重载保留
+            max_queue: 独占线程池的排队上限，见 EventBus.create_bulkhead
+            overflow: 独占线程池排队满时的策略
+        """
         self.event_bus = event_bus
         self.plugin_name = plugin_name
         self.data_dir = data_dir
         self.extra_params: Dict[str, Any] = {}  # 记录额外环境参数，服务于混入类
         self.event_handlers: Dict[UUID, Union[str, Pattern[str]]] = {}  # 记录处理器ID和对应的事件模式
         self.original_cwd: Optional[Path] = None
+        self.change_cwd = False  # 由插件类的 change_cwd 决定
+        self.bulkhead = event_bus.create_bulkhead(plugin_name, max_workers, max_queue, overflow) if max_workers else None
+        self.metrics = metrics if metrics is not None else PluginMetrics()
     
-    def register_handler(self, event: Union[str, Pattern[str]], handler: EventHandler) -> UUID:
-        """注册事件处理器，支持正则表达式"""
-        handler_id = self.event_bus.register_handler(handler, event)
+    def register_handler(self, event: Union[str, Pattern[str]], handler: EventHandler, **options: Any) -> UUID:
+        """注册事件处理器，支持正则表达式，options 原样传给事件总线
+
+        插件有独占线程池时，线程处理器默认在其中执行；处理器的执行计入插件的计量
+        """
+        if self.bulkhead is not None:
+            options.setdefault("bulkhead", self.bulkhead)
+        options.setdefault("metrics", self.metrics)
+        handler_id = self.event_bus.register_handler(handler, event, **options)
         self.event_handlers[handler_id] = event
         return handler_id
     
     def register_handlers(self, event_handlers: Dict[Union[str, Pattern[str]], EventHandler]) -> Dict[Union[str, Pattern[str]], UUID]:
         """批量注册事件处理器"""
-        results = self.event_bus.register_handlers(event_handlers)
-        self.event_handlers.update(results)
-        return results
+        return {event: self.register_handler(event, handler) for event, handler in event_handlers.items()}
     
     def unregister_handler(self, handler_id: UUID) -> bool:
         """取消注册事件处理器"""
@@ -446,29 +2111,82 @@ class PluginContext:
             return result
         return False
     
+    def _enter_data_dir(self) -> Path:
+        """切换到插件数据目录，返回切换前的目录"""
+        previous = Path.cwd()
+        if self.original_cwd is None:
+            self.original_cwd = previous
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        os.chdir(self.data_dir)
+        return previous
+    
     @contextmanager
     def working_directory(self):
-        """切换工作目录到插件数据目录的上下文管理器"""
-        if self.original_cwd is None:
-            self.original_cwd = Path.cwd()
+        """切换工作目录到插件数据目录的上下文管理器，退出时恢复进入前的目录
+
+        工作目录是进程共享的，跨越 await 使用时应经 run_in_data_dir 排队
+        """
+        previous = self._enter_data_dir()
         try:
-            self.data_dir.mkdir(parents=True, exist_ok=True)
-            os.chdir(self.data_dir)
             yield self.data_dir
         finally:
-            if self.original_cwd:
-                os.chdir(self.original_cwd)
+            os.chdir(previous)
     
     async def run_in_data_dir(self, coro_func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
-        """在插件数据目录中运行函数"""
-        with self.working_directory():
-            return await run_any(coro_func, *args, **kwargs)
+        """在插件数据目录中运行函数，期间的 API 调用计入插件的计量
+
+        切换目录的调用经进程级的锁逐个执行，其他插件的生命周期回调在此期间等待；
+        change_cwd 为 False 时不切换目录，也不排队
+        """
+        token = current_metrics.set(self.metrics)
+        try:
+            if not self.change_cwd or _in_data_dir.get():
+                return await run_any(coro_func, *args, **kwargs)
+            if not asyncio.iscoroutinefunction(coro_func):
+                return await self._run_sync_in_data_dir(partial(coro_func, *args, **kwargs))
+            async with _cwd_lock():
+                entered = _in_data_dir.set(True)
+                try:
+                    with self.working_directory():
+                        return await coro_func(*args, **kwargs)
+                finally:
+                    _in_data_dir.reset(entered)
+        finally:
+            current_metrics.reset(token)
+    
+    async def _run_sync_in_data_dir(self, func: Callable[[], Any]) -> Any:
+        """在线程中运行同步函数；调用方被取消时线程仍在运行，直到线程结束才恢复目录并释放锁"""
+        lock = _cwd_lock()
+        await lock.acquire()
+        try:
+            previous = self._enter_data_dir()
+        except BaseException:
+            lock.release()
+            raise
+        future = asyncio.get_running_loop().run_in_executor(None, func)
         
+        def finish(future: asyncio.Future) -> None:
+            os.chdir(previous)
+            lock.release()
+            if not future.cancelled() and future.exception() is not None and detached:
+                logger.error(f"插件 {self.plugin_name} 的同步回调在调用方取消后出错", exc_info=future.exception())
+        
+        detached = False
+        future.add_done_callback(finish)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            detached = not future.done()
+            raise
+    
     def close(self) -> None:
         """清理上下文资源"""
         # 取消注册所有事件处理器
         for handler_id in list(self.event_handlers.keys()):
             self.unregister_handler(handler_id)
+        if self.bulkhead is not None:
+            self.event_bus.remove_bulkhead(self.bulkhead)
+            self.bulkhead = None
         
         # 恢复原始工作目录
         if self.original_cwd:
@@ -497,6 +2215,13 @@ class PluginMeta(ABCMeta):
         else: cls.authors = []
         if not hasattr(cls, 'dependency') or not isinstance(cls.dependency, dict): cls.dependency = {}
         if not hasattr(cls, 'protocol_version'): cls.protocol_version = PROTOCOL_VERSION
+        raw = attrs.get("manifest")
+        if raw is not None and not isinstance(raw, PluginManifest):
+            try:
+                cls.manifest = PluginManifest.from_class(cls, raw)
+            except ManifestError as e:
+                raise PluginValidationError(f"插件 {name} 的 manifest 无效: {e}") from None
+            if not cls.dependency: cls.dependency = dict(cls.manifest.dependency)
 
 class Plugin(ABC, metaclass=PluginMeta):
     name: PluginName
@@ -504,10 +2229,16 @@ class Plugin(ABC, metaclass=PluginMeta):
     authors: List[str] = []
     dependency: Dict[PluginName, str] = {}
     protocol_version: int = PROTOCOL_VERSION
+    # 生命周期回调期间是否切换到数据目录；默认不切换，数据文件须用 context.data_dir 拼接路径，
+    # on_load 与同层其他插件并发。设为 True 的插件可以使用相对路径，但其回调会与其他切换目录的回调逐个执行
+    change_cwd: bool = False
+    # 声明的事件处理器等元数据，见 plugins/manifest.py；加载时由插件管理器换成实际生效的声明
+    manifest: Optional[PluginManifest] = None
     
     
     def __init__(self, context: PluginContext, config: Dict[str, Any], debug: bool = False) -> None:
         self.context = context
+        self.context.change_cwd = self.change_cwd
         self.config = config
         self._status = PluginStatus(PluginState.LOADED)
         self._module_name: Optional[str] = None
@@ -517,6 +2248,16 @@ class Plugin(ABC, metaclass=PluginMeta):
         if close:
             self.context.close()
     
+    def __snapshot__(self) -> Any:
+        """热重载前保存需要延续到新实例的状态（应为普通数据，不引用旧模块中的类），None 表示不延续"""
+        return None
+    
+    def __restore__(self, state: Any) -> None:
+        """热重载后、on_load 之前接收 __snapshot__ 保存的状态"""
+    
+    def on_config_changed(self, old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Awaitable[None]]:
+        """配置文件被改动，self.config 已原地更新为 new 之后调用，可以定义为协程函数"""
+    
     @property
     def meta(self) -> Dict[str, Any]:
         return {
@@ -560,45 +2301,149 @@ class Plugin(ABC, metaclass=PluginMeta):
 # 配置管理器（保持不变）
 # -----------------------------------------------------------------------------
 
+CONFIG_SUFFIXES = (".yaml", ".yml", ".json")  # 按此优先级查找 <配置目录>/<名称>/<名称><后缀>
+
+@dataclass
+class _ConfigEntry:
+    path: Optional[Path]
+    stamp: Optional[Tuple[int, int]]  # (mtime_ns, size)
+    data: Dict[str, Any]
+
 class ConfigManager:
-    def __init__(self, config_base_dir: Path) -> None:
+    def __init__(self, config_base_dir: Path, write_delay: float = 0.2) -> None:
+        """
+        Args:
+            write_delay: save_config 的合并窗口（秒），窗口内对同一配置的多次保存只写入最后一次
+        
+        读取结果按文件的 (mtime, 大小) 缓存，文件未改动时不再解析
+        """
         self.config_base_dir = config_base_dir
+        self.write_delay = write_delay
+        self.hits = self.misses = 0
+        self._cache: Dict[PluginName, _ConfigEntry] = {}
+        # 读取与写入都在线程中执行，缓存与计数由锁保护，文件读写不持锁
+        self._cache_lock = threading.Lock()
+        self._pending: Dict[PluginName, Tuple[Dict[str, Any], asyncio.Future]] = {}
+        self._timers: Dict[PluginName, asyncio.TimerHandle] = {}
+        self._writes: Dict[PluginName, asyncio.Task] = {}
     
-    async def load_config(self, plugin_name: PluginName) -> Dict[str, Any]:
+    def _locate(self, plugin_name: PluginName) -> Tuple[Optional[Path], Optional[Tuple[int, int]]]:
         plugin_config_dir = self.config_base_dir / plugin_name
-        config_files = [
-            plugin_config_dir / f"{plugin_name}.yaml",
-            plugin_config_dir / f"{plugin_name}.yml",
-            plugin_config_dir / f"{plugin_name}.json",
-        ]
-        
-        for config_file in config_files:
-            if await aiofiles.os.path.exists(config_file):
-                try:
-                    async with aiofiles.open(config_file, 'r', encoding='utf-8') as f:
-                        content = await f.read()
-                        if config_file.suffix in ('.yaml', '.yml'):
-                            return yaml.safe_load(content) or {}
-                        else:
-                            return json.loads(content) or {}
-                except Exception as e:
-                    logger.warning(f"加载配置 {config_file} 失败: {e}")
-        
-        return {}
+        for suffix in CONFIG_SUFFIXES:
+            config_file = plugin_config_dir / f"{plugin_name}{suffix}"
+            try:
+                st = config_file.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            return config_file, (st.st_mtime_ns, st.st_size)
+        return None, None
+    
+    def _read(self, plugin_name: PluginName) -> Tuple[Dict[str, Any], bool]:
+        """在线程中执行，返回 (配置副本, 是否与缓存不同)；解析失败的结果不缓存，下次重新读取"""
+        config_file, stamp = self._locate(plugin_name)
+        with self._cache_lock:
+            cached = self._cache.get(plugin_name)
+            if cached is not None and cached.path == config_file and cached.stamp == stamp:
+                self.hits += 1
+                return copy.deepcopy(cached.data), False
+            self.misses += 1
+        data: Dict[str, Any] = {}
+        if config_file is not None:
+            try:
+                content = config_file.read_text(encoding='utf-8')
+                if config_file.suffix in ('.yaml', '.yml'):
+                    data = yaml.safe_load(content) or {}
+                else:
+                    data = json.loads(content) or {}
+            except Exception as e:
+                logger.warning(f"加载配置 {config_file} 失败: {e}")
+                return {}, False
+        with self._cache_lock:
+            current = self._cache.get(plugin_name)
+            if current is not cached:
+                # 读取期间有写入完成，以写入的内容为准
+                return copy.deepcopy(current.data), False
+            changed = cached is None or cached.data != data
+            self._cache[plugin_name] = _ConfigEntry(config_file, stamp, data)
+        return copy.deepcopy(data), changed
+    
+    async def load_config(self, plugin_name: PluginName) -> Dict[str, Any]:
+        pending = self._pending.get(plugin_name)
+        if pending is not None:
+            return copy.deepcopy(pending[0])
+        data, _ = await asyncio.to_thread(self._read, plugin_name)
+        return data
+    
+    async def refresh(self, plugin_name: PluginName) -> Optional[Dict[str, Any]]:
+        """文件内容与上次读取或写入的不同时返回新配置，否则返回 None"""
+        if plugin_name in self._pending or plugin_name in self._writes:
+            return None  # 本进程即将写入，以写入的内容为准
+        data, changed = await asyncio.to_thread(self._read, plugin_name)
+        return data if changed else None
     
     async def save_config(self, plugin_name: PluginName, config: Dict[str, Any]) -> bool:
+        """保存配置，write_delay 内的多次保存合并为一次原子写入；返回写入是否成功"""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(plugin_name)
+        future = pending[1] if pending is not None else loop.create_future()
+        self._pending[plugin_name] = (copy.deepcopy(config), future)
+        timer = self._timers.pop(plugin_name, None)
+        if timer is not None:
+            timer.cancel()
+        if self.write_delay > 0:
+            self._timers[plugin_name] = loop.call_later(self.write_delay, self._start_write, plugin_name)
+        else:
+            self._start_write(plugin_name)
+        return await asyncio.shield(future)
+    
+    async def flush(self) -> None:
+        """立即写入所有等待合并的配置，并等待进行中的写入完成"""
+        for plugin_name in list(self._pending):
+            self._start_write(plugin_name)
+        if self._writes:
+            await asyncio.gather(*self._writes.values(), return_exceptions=True)
+    
+    def _start_write(self, plugin_name: PluginName) -> None:
+        timer = self._timers.pop(plugin_name, None)
+        if timer is not None:
+            timer.cancel()
+        item = self._pending.pop(plugin_name, None)
+        if item is None:
+            return
+        # 同一配置的写入依次进行，后写入的总是较新的内容
+        task = asyncio.ensure_future(self._write(plugin_name, *item, self._writes.get(plugin_name)))
+        self._writes[plugin_name] = task
+        task.add_done_callback(lambda t: self._writes.pop(plugin_name) if self._writes.get(plugin_name) is t else None)
+    
+    async def _write(self, plugin_name: PluginName, config: Dict[str, Any], future: asyncio.Future, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
         try:
-            plugin_config_dir = self.config_base_dir / plugin_name
-            await aiofiles.os.makedirs(plugin_config_dir, exist_ok=True)
-            
-            config_file = plugin_config_dir / f"{plugin_name}.yaml"
-            async with aiofiles.open(config_file, 'w', encoding='utf-8') as f:
-                await f.write(yaml.dump(config, default_flow_style=False, allow_unicode=True))
-            
-            return True
+            await asyncio.to_thread(self._write_file, plugin_name, config)
+            ok = True
         except Exception as e:
             logger.error(f"保存配置失败 {plugin_name}: {e}")
-            return False
+            ok = False
+        if not future.done():
+            future.set_result(ok)
+    
+    def _write_file(self, plugin_name: PluginName, config: Dict[str, Any]) -> None:
+        """写入临时文件后替换，读取方不会看到写了一半的配置；沿用已有配置文件的格式"""
+        config_file = self._locate(plugin_name)[0] or self.config_base_dir / plugin_name / f"{plugin_name}.yaml"
+        if config_file.suffix == '.json':
+            content = json.dumps(config, ensure_ascii=False, indent=2)
+        else:
+            content = yaml.dump(config, default_flow_style=False, allow_unicode=True)
+        config_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = config_file.with_name(f".{config_file.name}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, config_file)
+        st = config_file.stat()
+        with self._cache_lock:
+            self._cache[plugin_name] = _ConfigEntry(config_file, (st.st_mtime_ns, st.st_size), copy.deepcopy(config))
 
 # -----------------------------------------------------------------------------
 # 插件源类型（保持不变）
@@ -617,28 +2462,51 @@ class PluginSource:
     
     def cleanup(self) -> None:
         if self.source_type == PluginSourceType.ZIP_PACKAGE:
-            zip_path = str(self.path)
-            if zip_path in sys.path:
-                sys.path.remove(zip_path)
-                
-            modules_to_remove = []
-            for name, module in sys.modules.items():
-                if hasattr(module, '__file__') and module.__file__ and zip_path in module.__file__:
-                    modules_to_remove.append(name)
-            
-            for name in modules_to_remove:
-                del sys.modules[name]
+            # 插件包记录了自己导入的模块，无需扫描 sys.modules
+            zip_finder.unmount(self.path)
+
+_sys_path_lock = threading.Lock()
+_sys_path_refs: Dict[str, int] = {}
+
+@contextmanager
+def _sys_path_entry(entry: Optional[str]):
+    """并发导入共享的临时 sys.path 条目，最后一个使用者退出时才移除"""
+    if entry is None:
+        yield
+        return
+    with _sys_path_lock:
+        if _sys_path_refs.get(entry, 0) == 0:
+            sys.path.insert(0, entry)
+        _sys_path_refs[entry] = _sys_path_refs.get(entry, 0) + 1
+    try:
+        yield
+    finally:
+        with _sys_path_lock:
+            _sys_path_refs[entry] -= 1
+            if _sys_path_refs[entry] == 0:
+                del _sys_path_refs[entry]
+                if entry in sys.path:
+                    sys.path.remove(entry)
 
 # -----------------------------------------------------------------------------
 # 插件查找器（保持不变）
 # -----------------------------------------------------------------------------
 
 class PluginFinder:
-    def __init__(self, plugin_dirs: List[Path]) -> None:
+    def __init__(self, plugin_dirs: List[Path], manifest: Optional[DiscoveryManifest] = None) -> None:
+        """
+        Args:
+            manifest: 插件发现清单，未改动的 zip 不再打开校验，并刷新各插件源的指纹
+        """
         self.plugin_dirs = plugin_dirs
+        self.manifest = manifest
+        self._scanned: List[Path] = []
     
     async def find_plugins(self) -> List[PluginSource]:
         sources: List[PluginSource] = []
+        self._scanned = []
+        if self.manifest is not None:
+            self.manifest.hits = self.manifest.misses = 0
         
         for plugin_dir in self.plugin_dirs:
             if not await aiofiles.os.path.exists(plugin_dir):
@@ -647,8 +2515,17 @@ class PluginFinder:
             async for entry in self._scan_directory(plugin_dir):
                 sources.append(entry)
         
+        if self.manifest is not None:
+            self.manifest.prune(self._scanned)
         return sources
     
+    async def _refresh(self, path: Path, source_type: PluginSourceType, module_name: str) -> Tuple[Optional[ManifestEntry], bool]:
+        if self.manifest is None:
+            return None, False
+        self._scanned.append(path)
+        # 目录指纹需要遍历文件，放到线程中计算
+        return await asyncio.to_thread(self.manifest.refresh, path, source_type.value, module_name)
+    
     async def _scan_directory(self, directory: Path) -> AsyncIterable[PluginSource]:
         try:
             entries = await aiofiles.os.scandir(directory)
@@ -656,21 +2533,42 @@ class PluginFinder:
                 if entry.is_dir():
                     init_file = Path(entry.path) / "__init__.py"
                     if await aiofiles.os.path.exists(init_file):
+                        await self._refresh(Path(entry.path), PluginSourceType.DIRECTORY, entry.name)
                         yield PluginSource(PluginSourceType.DIRECTORY, Path(entry.path), entry.name)
 
                 elif entry.is_file():
                     
                     if entry.name.endswith('.zip'):
                         module_name = entry.name[:-4]
-                        if await self._is_valid_zip_plugin(Path(entry.path)):
+                        record, fresh = await self._refresh(Path(entry.path), PluginSourceType.ZIP_PACKAGE, module_name)
+                        if fresh:
+                            valid = record.valid
+                        else:
+                            valid = await self._is_valid_zip_plugin(Path(entry.path))
+                            if record is not None:
+                                record.valid = valid
+                        if valid:
                             yield PluginSource(PluginSourceType.ZIP_PACKAGE, Path(entry.path), module_name)
                     
                     elif entry.name.endswith('.py') and entry.name != "__init__.py":
                         module_name = entry.name[:-3]  # 去掉 .py 扩展名
+                        await self._refresh(Path(entry.path), PluginSourceType.FILE, module_name)
                         yield PluginSource(PluginSourceType.FILE, Path(entry.path), module_name)
         except OSError as e:
             logger.warning(f"扫描目录 {directory} 失败: {e}")
     
+    async def source_for(self, path: Path) -> Optional[PluginSource]:
+        """按扫描规则识别插件目录下的一项，不是插件源时返回 None"""
+        if await aiofiles.os.path.isdir(path):
+            if await aiofiles.os.path.exists(path / "__init__.py"):
+                return PluginSource(PluginSourceType.DIRECTORY, path, path.name)
+        elif path.name.endswith('.zip'):
+            if await self._is_valid_zip_plugin(path):
+                return PluginSource(PluginSourceType.ZIP_PACKAGE, path, path.name[:-4])
+        elif path.name.endswith('.py') and path.name != "__init__.py" and await aiofiles.os.path.exists(path):
+            return PluginSource(PluginSourceType.FILE, path, path.name[:-3])
+        return None
+    
     async def _is_valid_zip_plugin(self, zip_path: Path) -> bool:
         try:
             with zipfile.ZipFile(zip_path, 'r') as zf:
@@ -695,13 +2593,29 @@ class DefaultPluginLoader(PluginLoader):
         event_bus: EventBus = None,
         config_manager: ConfigManager = None,
         data_base_dir: Path = './data',
-        debug_mode: bool = DEBUG_MODE
+        debug_mode: bool = DEBUG_MODE,
+        bundle_keys: Optional[Dict[str, Union[str, bytes]]] = None,
+        require_signed_bundles: bool = False,
     ) -> None:
+        """
+        Args:
+            bundle_keys: 受信任的插件包签名密钥，密钥名 -> 密钥（十六进制字符串），见 plugins/zipimporter.py
+            require_signed_bundles: 为 True 时拒绝加载未签名或签名密钥不受信任的插件包
+        """
         self.event_bus = event_bus or ConcurrentEventBus()
         self.config_manager = config_manager or ConfigManager(data_base_dir)
         self.data_base_dir = data_base_dir
         self.debug_mode = debug_mode
         self._loaded_modules: Dict[PluginName, Tuple[str, PluginSource]] = {}
+        # 执行模块导入的线程池，None 时使用事件循环的默认线程池
+        self.import_executor: Optional[Executor] = None
+        # 各插件的资源计量，插件重载后继续累计
+        self.metrics: Dict[PluginName, PluginMetrics] = {}
+        self.bundle_keys: Dict[str, bytes] = {k: _key_bytes(v) for k, v in (bundle_keys or {}).items()}
+        self.require_signed_bundles = require_signed_bundles
+    
+    def _metrics_for(self, plugin_name: PluginName) -> PluginMetrics:
+        return self.metrics.setdefault(plugin_name, PluginMetrics())
     
     async def load_from_source(self, source: PluginSource) -> List[Plugin]:
         try:
@@ -729,35 +2643,18 @@ class DefaultPluginLoader(PluginLoader):
         data_dir = self.data_base_dir / module_name
         await aiofiles.os.makedirs(data_dir, exist_ok=True)
         
-        sys.path.insert(0, str(plugin_dir.parent))
+        module = await self._import(module_name, plugin_dir / "__init__.py", str(plugin_dir.parent))
+        plugin_classes = self._find_plugin_classes(module, module_name)
+        plugins = []
         
-        try:
-            if module_name in sys.modules:
-                module = importlib.reload(sys.modules[module_name])
-            else:
-                spec = importlib.util.spec_from_file_location(module_name, plugin_dir / "__init__.py")
-                if spec is None:
-                    raise PluginValidationError(f"无法为 {plugin_dir} 创建导入规范")
-                
-                module = importlib.util.module_from_spec(spec)
-                sys.modules[module_name] = module
-                spec.loader.exec_module(module)
-            
-            plugin_classes = self._find_plugin_classes(module, module_name)
-            plugins = []
-            
-            for plugin_cls in plugin_classes:
-                context = PluginContext(self.event_bus, plugin_cls.name, data_dir)
-                plugin = plugin_cls(context, config, self.debug_mode)
-                plugin.set_module_name(module_name)
-                self._loaded_modules[plugin.name] = (module_name, source)
-                plugins.append(plugin)
-            
-            return plugins
-            
-        finally:
-            if str(plugin_dir.parent) in sys.path:
-                sys.path.remove(str(plugin_dir.parent))
+        for plugin_cls in plugin_classes:
+            context = PluginContext(self.event_bus, plugin_cls.name, data_dir, metrics=self._metrics_for(plugin_cls.name), **_bulkhead_options(config))
+            plugin = plugin_cls(context, config, self.debug_mode)
+            plugin.set_module_name(module_name)
+            self._loaded_modules[plugin.name] = (module_name, source)
+            plugins.append(plugin)
+        
+        return plugins
     
     async def _load_from_zip(self, source: PluginSource) -> List[Plugin]:
         try:
@@ -771,21 +2668,19 @@ class DefaultPluginLoader(PluginLoader):
             data_dir = self.data_base_dir / module_name
             await aiofiles.os.makedirs(data_dir, exist_ok=True)
             
-            zip_path = str(source.path)
-            if zip_path not in sys.path:
-                sys.path.insert(0, zip_path)
-            
             try:
-                if module_name in sys.modules:
-                    module = importlib.reload(sys.modules[module_name])
-                else:
-                    module = importlib.import_module(module_name)
+                bundle = await asyncio.to_thread(
+                    zip_finder.mount, source.path, self.bundle_keys, self.require_signed_bundles,
+                    Path(self.data_base_dir) / BYTECODE_DIR,
+                )
+                module = await self._import(module_name)
+                await asyncio.to_thread(bundle.flush_cache)
                 
                 plugin_classes = self._find_plugin_classes(module, module_name)
                 plugins = []
                 
                 for plugin_cls in plugin_classes:
-                    context = PluginContext(self.event_bus, plugin_cls.name, data_dir)
+                    context = PluginContext(self.event_bus, plugin_cls.name, data_dir, metrics=self._metrics_for(plugin_cls.name), **_bulkhead_options(config))
                     plugin = plugin_cls(context, config, self.debug_mode)
                     plugin.set_module_name(module_name)
                     self._loaded_modules[plugin.name] = (module_name, source)
@@ -797,9 +2692,7 @@ class DefaultPluginLoader(PluginLoader):
                 raise PluginValidationError(f"无法从ZIP文件导入模块 {module_name}: {e}")
                 
         except Exception as e:
-            zip_path = str(source.path)
-            if zip_path in sys.path:
-                sys.path.remove(zip_path)
+            zip_finder.unmount(source.path)
             raise
 
     async def _load_from_file(self, source: PluginSource) -> List[Plugin]:
@@ -814,35 +2707,78 @@ class DefaultPluginLoader(PluginLoader):
         data_dir = self.data_base_dir / module_name
         await aiofiles.os.makedirs(data_dir, exist_ok=True)
         
-        sys.path.insert(0, str(plugin_file.parent))
+        module = await self._import(module_name, plugin_file, str(plugin_file.parent))
+        plugin_classes = self._find_plugin_classes(module, module_name)
+        plugins = []
+        
+        for plugin_cls in plugin_classes:
+            context = PluginContext(self.event_bus, plugin_cls.name, data_dir, metrics=self._metrics_for(plugin_cls.name), **_bulkhead_options(config))
+            plugin = plugin_cls(context, config, self.debug_mode)
+            plugin.set_module_name(module_name)
+            self._loaded_modules[plugin.name] = (module_name, source)
+            plugins.append(plugin)
+        
+        return plugins
+    
+    async def _import(self, module_name: str, location: Optional[Path] = None, path_entry: Optional[str] = None) -> Any:
+        """在导入线程池中导入模块，不阻塞事件循环，多个插件的导入可以并行
+
+        Args:
+            location: 模块文件，None 时按 sys.path 查找
+            path_entry: 导入期间临时加入 sys.path 的目录
+        """
+        def run() -> Any:
+            with _sys_path_entry(path_entry):
+                return self._import_module(module_name, location)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.import_executor, run)
+    
+    @staticmethod
+    def _import_module(module_name: str, location: Optional[Path]) -> Any:
+        if module_name in sys.modules:
+            return importlib.reload(sys.modules[module_name])
+        if location is None:
+            return importlib.import_module(module_name)
+        
+        spec = importlib.util.spec_from_file_location(module_name, location)
+        if spec is None:
+            raise PluginValidationError(f"无法为 {location} 创建导入规范")
         
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
         try:
-            if module_name in sys.modules:
-                module = importlib.reload(sys.modules[module_name])
-            else:
-                spec = importlib.util.spec_from_file_location(module_name, plugin_file)
-                if spec is None:
-                    raise PluginValidationError(f"无法为 {plugin_file} 创建导入规范")
-                
-                module = importlib.util.module_from_spec(spec)
-                sys.modules[module_name] = module
-                spec.loader.exec_module(module)
-            
-            plugin_classes = self._find_plugin_classes(module, module_name)
-            plugins = []
-            
-            for plugin_cls in plugin_classes:
-                context = PluginContext(self.event_bus, plugin_cls.name, data_dir)
-                plugin = plugin_cls(context, config, self.debug_mode)
-                plugin.set_module_name(module_name)
-                self._loaded_modules[plugin.name] = (module_name, source)
-                plugins.append(plugin)
-            
-            return plugins
-            
-        finally:
-            if str(plugin_file.parent) in sys.path:
-                sys.path.remove(str(plugin_file.parent))
+            spec.loader.exec_module(module)
+        except BaseException:
+            # 不留下执行了一半的模块，否则下次加载会被当作已加载而跳过
+            sys.modules.pop(module_name, None)
+            raise
+        return module
+    
+    async def load_isolated(self, source: PluginSource, manifest: PluginManifest) -> List[Plugin]:
+        """独立进程插件：主进程中不导入插件代码，只创建代理，见 plugins/host.py"""
+        from .host import HostedPlugin
+        
+        module_name = source.module_name
+        if source.source_type == PluginSourceType.ZIP_PACKAGE:
+            # 子进程不持有签名密钥，由主进程在启动前校验
+            try:
+                await asyncio.to_thread(verify_bundle, source.path, self.bundle_keys, self.require_signed_bundles)
+            except BundleError as e:
+                logger.error(f"从源加载插件失败 {source.path}: {e}")
+                return []
+        config = await self.config_manager.load_config(PluginName(module_name))
+        data_dir = self.data_base_dir / module_name
+        await aiofiles.os.makedirs(data_dir, exist_ok=True)
+        
+        # 转发处理器只在事件循环中等待子进程，不需要独占线程池
+        context = PluginContext(self.event_bus, PluginName(manifest.name), data_dir, metrics=self._metrics_for(PluginName(manifest.name)))
+        plugin = HostedPlugin(
+            context, config, self.debug_mode, source, manifest,
+            Path(self.data_base_dir), Path(self.config_manager.config_base_dir),
+        )
+        plugin.set_module_name(module_name)
+        self._loaded_modules[plugin.name] = (module_name, source)
+        return [plugin]
     
     def _find_plugin_classes(self, module: Any, module_name: str) -> List[Type[Plugin]]:
         plugin_classes = []
@@ -878,6 +2814,11 @@ class DefaultPluginLoader(PluginLoader):
         
         return plugin_classes
     
+    def source_of(self, plugin_name: PluginName) -> Optional[PluginSource]:
+        """插件加载自的插件源"""
+        entry = self._loaded_modules.get(plugin_name)
+        return entry[1] if entry is not None else None
+    
     async def unload_plugin_module(self, plugin_name: PluginName) -> bool:
         if plugin_name not in self._loaded_modules:
             return False
@@ -916,37 +2857,95 @@ async def run_any(func, *args, **kw):
     bound = partial(func, *args, **kw)
     return await loop.run_in_executor(None, bound)
 
-def _topological_sort(plugins: List[Plugin]) -> List[Plugin]:
+def _checkable_records(records: List[PluginRecord], known: Iterable[PluginName] = ()) -> List[PluginRecord]:
+    """依赖全部能在记录或 known（已加载的插件）中找到的那部分记录，可以不导入就参与依赖排序"""
+    checkable = {record.name: record for record in records}
+    known = set(known)
+    changed = True
+    while changed:
+        changed = False
+        for name, record in list(checkable.items()):
+            if any(dep not in checkable and dep not in known for dep in record.dependency):
+                del checkable[name]
+                changed = True
+    return list(checkable.values())
+
+
+def _topological_sort(plugins: List[Plugin], available: Optional[Mapping[PluginName, PluginVersion]] = None) -> List[List[Plugin]]:
+    """按依赖分层：每层只依赖之前各层的插件，同一层内互不依赖
+    
+    Args:
+        available: 已加载插件的版本；批次外的依赖在其中查找，它们不参与排序
+    """
     name_to_plugin: Dict[PluginName, Plugin] = {p.name: p for p in plugins}
     graph: Dict[PluginName, Set[PluginName]] = {p.name: set() for p in plugins}
     in_degree: Dict[PluginName, int] = {p.name: 0 for p in plugins}
+    available = available or {}
 
     for p in plugins:
         for dep_name, version_spec in p.dependency.items():
-            if dep_name not in name_to_plugin:
+            if dep_name in name_to_plugin:
+                found = name_to_plugin[dep_name].version
+            elif dep_name in available:
+                found = available[dep_name]
+            else:
                 raise PluginDependencyError(f"插件 {p.name} 依赖缺失: {dep_name} {version_spec}", plugin_name=p.name)
-            dep_plugin = name_to_plugin[dep_name]
-            if not _version_satisfies(dep_plugin.version, version_spec):
-                raise PluginDependencyError(f"插件 {p.name} 需要 {dep_name} {version_spec}, 但找到的是 {dep_plugin.version}", plugin_name=p.name)
+            if not _version_satisfies(found, version_spec):
+                raise PluginDependencyError(f"插件 {p.name} 需要 {dep_name} {version_spec}, 但找到的是 {found}", plugin_name=p.name)
+            if dep_name not in name_to_plugin:
+                continue
             graph[dep_name].add(p.name)
             in_degree[p.name] += 1
 
-    queue = [name for name, deg in in_degree.items() if deg == 0]
-    sorted_names: List[PluginName] = []
+    layer = [name for name, deg in in_degree.items() if deg == 0]
+    layers: List[List[PluginName]] = []
 
-    while queue:
-        cur = queue.pop(0)
-        sorted_names.append(cur)
-        for neighbor in graph[cur]:
-            in_degree[neighbor] -= 1
-            if in_degree[neighbor] == 0:
-                queue.append(neighbor)
+    while layer:
+        layers.append(layer)
+        next_layer = []
+        for cur in layer:
+            for neighbor in graph[cur]:
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    next_layer.append(neighbor)
+        layer = next_layer
 
-    if len(sorted_names) != len(plugins):
+    if sum(len(names) for names in layers) != len(plugins):
         remaining = [name for name in in_degree if in_degree[name] > 0]
         raise PluginDependencyError(f"插件之间存在循环依赖: {remaining}", plugin_name=remaining[0] if remaining else None)
 
-    return [name_to_plugin[n] for n in sorted_names]
+    return [[name_to_plugin[n] for n in names] for names in layers]
+
+def _forget_modules(source: PluginSource) -> None:
+    """从 sys.modules 与导入缓存中移除插件源的模块，下次导入读取最新代码"""
+    module_name = source.module_name
+    for key in [k for k in sys.modules if k == module_name or k.startswith(module_name + ".")]:
+        del sys.modules[key]
+    if source.source_type == PluginSourceType.ZIP_PACKAGE:
+        zip_finder.unmount(source.path)
+    importlib.invalidate_caches()
+
+
+@dataclass
+class _LazyPlugin:
+    """延迟加载插件的状态，由存根处理器在首个匹配事件到达时激活"""
+    source: PluginSource
+    manifest: PluginManifest
+    stub_ids: List[UUID] = field(default_factory=list)
+    plugins: List[PluginName] = field(default_factory=list)  # 激活后加载出的插件
+    active: bool = False
+    activating: Optional[asyncio.Future] = None
+    error: Optional[Exception] = None
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def state(self) -> str:
+        if self.error is not None:
+            return "failed"
+        if self.activating is not None:
+            return "activating"
+        return "active" if self.active else "dormant"
+
 
 def _version_satisfies(found: PluginVersion, version_spec: str) -> bool:
     try:
@@ -958,6 +2957,95 @@ def _version_satisfies(found: PluginVersion, version_spec: str) -> bool:
     except (InvalidVersion, InvalidSpecifier) as e:
         raise PluginValidationError(f"无效的版本: found={found}, spec={version_spec}, error={e}")
 
+class _DependencyGraph:
+    """已加载插件的依赖图，随插件加载与卸载增量维护
+    
+    depth 为插件到无依赖插件的最长路径长度，插件总比它的依赖深，按 depth 排列即为加载顺序。
+    插件只在依赖都已在图中时加入，移除前依赖它的插件已先移除，
+    因此增删一个插件只影响它自己的 depth，无需重新排序整个图。
+    """
+    
+    def __init__(self) -> None:
+        self._versions: Dict[PluginName, PluginVersion] = {}
+        self._deps: Dict[PluginName, Set[PluginName]] = {}
+        self._dependents: Dict[PluginName, Set[PluginName]] = {}
+        self._depth: Dict[PluginName, int] = {}
+        self._seq: Dict[PluginName, int] = {}  # 加入顺序，同 depth 时按此排列
+        self._counter = itertools.count()
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self._versions
+    
+    def __len__(self) -> int:
+        return len(self._versions)
+    
+    def versions(self) -> Dict[PluginName, PluginVersion]:
+        return dict(self._versions)
+    
+    def check(self, plugin: Plugin) -> None:
+        """插件尚未在图中，且它的依赖都已在图中、版本满足要求"""
+        if plugin.name in self._versions:
+            raise PluginRuntimeError(f"插件 {plugin.name} 已加载", plugin.name)
+        missing = [dep for dep in plugin.dependency if dep not in self._versions]
+        if missing:
+            raise PluginDependencyError(f"插件 {plugin.name} 依赖的 {missing} 未加载", plugin_name=plugin.name)
+        for dep, version_spec in plugin.dependency.items():
+            if not _version_satisfies(self._versions[dep], version_spec):
+                raise PluginDependencyError(f"插件 {plugin.name} 需要 {dep} {version_spec}, 但已加载的是 {self._versions[dep]}", plugin_name=plugin.name)
+    
+    def add(self, plugin: Plugin) -> None:
+        """加入插件；同名插件须先 remove，替换会丢失依赖它的插件的边"""
+        self.check(plugin)
+        name = plugin.name
+        deps = set(plugin.dependency)
+        self._versions[name] = plugin.version
+        self._deps[name] = deps
+        self._dependents.setdefault(name, set())
+        self._depth[name] = 1 + max((self._depth[d] for d in deps), default=-1)
+        self._seq[name] = next(self._counter)
+        for dep in deps:
+            self._dependents[dep].add(name)
+    
+    def remove(self, name: PluginName) -> None:
+        if name not in self._versions:
+            return
+        for dep in self._deps.pop(name):
+            self._dependents[dep].discard(name)
+        for dependent in self._dependents.pop(name):
+            # 正常情况下依赖它的插件已先移除
+            self._deps[dependent].discard(name)
+        del self._versions[name], self._depth[name], self._seq[name]
+    
+    def _sorted(self, names: Iterable[PluginName]) -> List[PluginName]:
+        return sorted(names, key=lambda n: (self._depth[n], self._seq[n]))
+    
+    def order(self) -> List[PluginName]:
+        """所有插件的加载顺序"""
+        return self._sorted(self._versions)
+    
+    def subtree(self, names: Iterable[PluginName]) -> List[PluginName]:
+        """这些插件及（传递地）依赖它们的插件，按加载顺序排列；卸载时逆序"""
+        found: Set[PluginName] = set()
+        stack = [n for n in names if n in self._versions]
+        while stack:
+            name = stack.pop()
+            if name not in found:
+                found.add(name)
+                stack.extend(self._dependents[name])
+        return self._sorted(found)
+    
+    def requirements(self, name: PluginName) -> List[PluginName]:
+        """插件（传递地）依赖的插件，按加载顺序排列，不含插件本身"""
+        found: Set[PluginName] = set()
+        stack = list(self._deps.get(name, ()))
+        while stack:
+            dep = stack.pop()
+            if dep not in found:
+                found.add(dep)
+                stack.extend(self._deps[dep])
+        return self._sorted(found)
+
+
 class DefaultPluginManager(PluginManager):
     def __init__(
         self,
@@ -965,23 +3053,64 @@ class DefaultPluginManager(PluginManager):
         config_base_dir: Path,
         data_base_dir: Path,
         event_bus: Optional[EventBus] = None,
-        dev_mode: bool = DEBUG_MODE
+        dev_mode: bool = DEBUG_MODE,
+        load_timeout: Optional[float] = DEFAULT_PLUGIN_LOAD_TIMEOUT,
+        load_concurrency: int = 0,
+        lazy_load: bool = True,
+        command_events: Iterable[str] = (),
+        command_prefixes: Iterable[str] = (),
+        trace_memory: int = 0,
+        bundle_keys: Optional[Dict[str, Union[str, bytes]]] = None,
+        require_signed_bundles: bool = False,
     ) -> None:
+        """
+        Args:
+            load_timeout: 单个插件 on_load 的时限（秒），超时视为加载失败，None 不限制；
+                协程 on_load 超时会被取消，同步 on_load 在线程中执行，超时后无法停止，会在后台继续运行，
+                切换工作目录的同步 on_load 在线程结束前一直占用工作目录
+            load_concurrency: 同一依赖层内同时执行 on_load 的插件数上限，0 不限制，1 即逐个加载；
+                工作目录是进程共享的，change_cwd 为 True 的插件总是逐个执行
+            lazy_load: 是否按声明文件中的 lazy 延迟加载插件，见 plugins/manifest.py
+            command_events, command_prefixes: 命令事件名与命令前缀，
+                延迟加载插件声明的 commands 匹配这些事件中以 前缀+命令 开头的消息
+            trace_memory: 大于 0 时启用 tracemalloc 并保留这么多层调用栈，用于按插件统计内存，
+                会明显拖慢内存分配，只建议排查问题时开启
+            bundle_keys, require_signed_bundles: zip 插件包的签名校验，见 DefaultPluginLoader
+        """
         self.plugin_dirs = plugin_dirs
         self.config_base_dir = config_base_dir
         self.data_base_dir = data_base_dir
         self.event_bus = event_bus or ConcurrentEventBus()
         self.dev_mode = dev_mode
+        self.load_timeout = load_timeout
+        self.load_concurrency = load_concurrency
+        self.lazy_load = lazy_load
+        self.command_events = tuple(command_events)
+        self.command_prefixes = tuple(command_prefixes)
+        if trace_memory > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(trace_memory)
         
         self.config_manager = ConfigManager(config_base_dir)
-        self.plugin_finder = PluginFinder(plugin_dirs)
-        self.loader = DefaultPluginLoader(self.event_bus, self.config_manager, data_base_dir, dev_mode)
+        self.manifest = DiscoveryManifest(Path(data_base_dir) / MANIFEST_FILE)
+        self.plugin_finder = PluginFinder(plugin_dirs, self.manifest)
+        self.loader = DefaultPluginLoader(
+            self.event_bus, self.config_manager, data_base_dir, dev_mode, bundle_keys, require_signed_bundles,
+        )
         
         self._plugins: Dict[PluginName, Plugin] = {}
         self._plugin_status: Dict[PluginName, PluginStatus] = {}
+        self._graph = _DependencyGraph()  # 已加载插件的依赖关系，与 _plugins 同步
+        self._stopped_by: Dict[PluginName, PluginName] = {}  # 随依赖一并停止的插件 -> 被停止的依赖
         self._shutdown = False
         self._lock = threading.RLock()
         
+        self._lazy: Dict[PluginName, _LazyPlugin] = {}
+        self._manifests: Dict[Path, Optional[PluginManifest]] = {}  # 各插件源的声明文件
+        self._inject: Dict[str, Any] = {}  # load_plugins 的额外参数，延迟激活时同样注入
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle_task: Optional[asyncio.Task] = None
+        self._reload_lock: Optional[asyncio.Lock] = None
+        
         # 注册插件事件处理器
         self._register_plugin_event_handlers()
     
@@ -1032,71 +3161,141 @@ class DefaultPluginManager(PluginManager):
         event_name = f"plugin.{plugin_name}.{event_suffix}"
         self.event_bus.publish(event_name, data, source="PluginManager", target=plugin_name)
     
+    async def _send_plugin_events(self, event_suffix: str, items: Iterable[Tuple[PluginName, Any]]) -> None:
+        """批量发送同类插件事件"""
+        self.event_bus.publish_many(
+            Event(f"plugin.{plugin_name}.{event_suffix}", data, "PluginManager", plugin_name)
+            for plugin_name, data in items
+        )
+    
     async def load_plugins(self, **kwd) -> List[Plugin]:
         '''额外参数将注入插件，作为属性存在'''
         if self._shutdown:
             raise RuntimeError("插件管理器已关闭")
         
+        started = time.perf_counter()
+        self._loop = asyncio.get_running_loop()
+        self._inject = dict(kwd)
         sources = await self.plugin_finder.find_plugins()
+        sources, lazy = await self._split_lazy(sources)
         all_plugins = []
         
+        # 清单中未过期、依赖全部可知的插件源先不导入：用记录分层与校验，轮到所在的层时才导入；
+        # 没有记录的插件源以及依赖了它们或延迟插件的记录，照常先导入，导入后再校验
+        with self._lock:
+            loaded = self._graph.versions()
+        checkable = {r.name for r in _checkable_records(self.manifest.cached_plugins(s.path for s in sources), loaded)}
+        deferred: Dict[PluginName, PluginSource] = {}
+        eager: List[PluginSource] = []
         for source in sources:
+            records = self.manifest.cached_plugins([source.path])
+            if records and all(r.name in checkable for r in records):
+                deferred.update((r.name, source) for r in records)
+            else:
+                eager.append(source)
+        records = [r for r in self.manifest.cached_plugins(s.path for s in sources) if r.name in deferred]
+        if records:
             try:
-                plugins = await self.loader.load_from_source(source)
+                _topological_sort(records, loaded)
+            except PluginDependencyError as e:
+                logger.error(f"插件依赖解析失败: {e}")
+                if e.plugin_name:
+                    await self._send_plugin_event("error", e.plugin_name, str(e))
+                raise
+        warm = bool(sources) and not eager
+        
+        # 各来源的模块导入在线程池中并行执行
+        results = await asyncio.gather(
+            *(self._load_source(source) for source in eager),
+            return_exceptions=True,
+        )
+        loaded_sources: List[Tuple[PluginSource, List[Plugin]]] = []
+        for source, plugins in zip(eager, results):
+            if isinstance(plugins, BaseException):
+                if not isinstance(plugins, Exception):
+                    raise plugins
+                logger.error(f"从源加载插件失败 {source.path}: {plugins}")
+                plugin_name = source.module_name
+                await self._send_plugin_event("error", PluginName(plugin_name), str(plugins))
+                continue
+            for key, val in kwd.items():
+                for p in plugins:
+                    setattr(p, key, val)
+            all_plugins.extend(plugins)
+            loaded_sources.append((source, plugins))
+        
+        # 被立即加载的插件依赖的延迟插件也要立即加载
+        while True:
+            needed = {dep for p in all_plugins for dep in p.dependency if dep in lazy}
+            if not needed:
+                break
+            for name in needed:
+                logger.info(f"插件 {name} 被立即加载的插件依赖，不再延迟加载")
+                source = lazy.pop(name)[0]
+                plugins = await self._load_source(source)
                 for key, val in kwd.items():
                     for p in plugins:
                         setattr(p, key, val)
                 all_plugins.extend(plugins)
-                
-                for plugin in plugins:
-                    await self._send_plugin_event("load", plugin.name, plugin.meta)
-                    
-            except Exception as e:
-                logger.error(f"从源加载插件失败 {source.path}: {e}")
-                plugin_name = source.module_name
-                await self._send_plugin_event("error", PluginName(plugin_name), str(e))
+                loaded_sources.append((source, plugins))
+        imported = time.perf_counter()
         
-        if not all_plugins:
+        if not all_plugins and not records:
+            for name, (source, manifest) in lazy.items():
+                self._register_lazy(source, manifest)
+            await asyncio.to_thread(self.manifest.save)
             return []
         
+        await self._send_plugin_events("load", ((p.name, p.meta) for p in all_plugins))
+        
         try:
-            sorted_plugins = _topological_sort(all_plugins)
+            layers = _topological_sort([*all_plugins, *records], loaded)
         except PluginDependencyError as e:
             logger.error(f"插件依赖解析失败: {e}")
             if e.plugin_name:
                 await self._send_plugin_event("error", e.plugin_name, str(e))
             raise
         
+        # 按声明的处理器预先启动事件循环线程与进程池
+        self.event_bus.prepare_executors({
+            ExecutorKind(decl.executor)
+            for p in all_plugins if p.manifest is not None and not p.manifest.isolated
+            for decl in p.manifest.handlers
+        })
+        
         success_plugins: List[Plugin] = []
+        semaphore = asyncio.Semaphore(self.load_concurrency) if self.load_concurrency > 0 else None
+        deferred_plugins: Dict[Path, Dict[PluginName, Plugin]] = {}
         
-        for plugin in sorted_plugins:
-            if plugin.name in self._plugins:
-                logger.debug(f"插件 {plugin.name} 已加载，跳过")
-                continue
-                
-            try:
-                if plugin.protocol_version != PROTOCOL_VERSION:
-                    raise PluginVersionError(f"插件 {plugin.name} 协议版本不兼容", plugin.name)
-                
-                await self._send_plugin_event("load", plugin.name, plugin.meta)
-                
-                await plugin.context.run_in_data_dir(plugin.on_load)
-                plugin._set_status(PluginState.RUNNING)
-                
-                with self._lock:
-                    self._plugins[plugin.name] = plugin
-                    self._plugin_status[plugin.name] = plugin.status
-                
-                success_plugins.append(plugin)
-                logger.info(f"插件已加载: {plugin.name}@{plugin.version}")
-                
-                await self._send_plugin_event("ok", plugin.name, plugin.meta)
-                
-            except Exception as e:
-                plugin._set_status(PluginState.FAILED, e)
-                logger.exception(f"插件 {plugin.name} 加载失败")
-                
-                await self._send_plugin_event("error", plugin.name, str(e))
+        for layer in layers:
+            layer = await self._import_deferred(layer, deferred, deferred_plugins, loaded_sources)
+            pending = []
+            for plugin in layer:
+                if plugin.name in self._plugins:
+                    logger.debug(f"插件 {plugin.name} 已加载，跳过")
+                else:
+                    pending.append(plugin)
+            
+            # 同一层的插件互不依赖，on_load 并发执行；切换工作目录的插件由 run_in_data_dir 排队
+            results = await asyncio.gather(
+                *(self._start_loaded_plugin(plugin, semaphore) for plugin in pending),
+                return_exceptions=True,
+            )
+            
+            failed: List[Tuple[Plugin, BaseException]] = []
+            for plugin, result in zip(pending, results):
+                if result is None:
+                    success_plugins.append(plugin)
+                elif not isinstance(result, Exception):
+                    raise result
+                else:
+                    failed.append((plugin, result))
+            
+            if failed:
+                for plugin, e in failed:
+                    plugin._set_status(PluginState.FAILED, e)
+                    logger.error(f"插件 {plugin.name} 加载失败", exc_info=e)
+                    await self._send_plugin_event("error", plugin.name, str(e))
                 
                 for loaded_plugin in reversed(success_plugins):
                     try:
@@ -1104,23 +3303,602 @@ class DefaultPluginManager(PluginManager):
                     except Exception as unload_error:
                         logger.exception(f"卸载插件 {loaded_plugin.name} 时出错: {unload_error}")
                 
+                plugin, e = failed[0]
                 if isinstance(e, (PluginVersionError, PluginDependencyError)):
-                    raise
+                    raise e
                 else:
                     raise PluginRuntimeError(str(e), plugin.name) from e
         
-        for plugin in success_plugins:
-            await self._send_plugin_event("ready", plugin.name, {
-                "loaded_plugins": [p.name for p in success_plugins]
-            })
+        for name, (source, manifest) in lazy.items():
+            self._register_lazy(source, manifest)
+        
+        elapsed = time.perf_counter() - started
+        for source, plugins in loaded_sources:
+            if plugins:
+                self.manifest.record_plugins(source.path, plugins)
+        previous = self.manifest.record_timing(warm, elapsed)
+        await asyncio.to_thread(self.manifest.save)
+        
+        kind = "热启动" if warm else "冷启动"
+        compare = f", 上次{'冷' if warm else '热'}启动 {previous:.2f} 秒" if previous is not None else ""
+        logger.info(
+            f"插件加载完成: {len(success_plugins)} 个, 延迟加载 {len(lazy)} 个, {len(layers)} 层依赖, "
+            f"{kind}耗时 {elapsed:.2f} 秒 (预先导入 {imported - started:.2f} 秒, 按层导入 {len(deferred_plugins)} 个插件源, "
+            f"发现清单命中 {self.manifest.hits}/{self.manifest.hits + self.manifest.misses}{compare})"
+        )
+        loaded_names = [p.name for p in success_plugins]
+        await self._send_plugin_events("ready", (
+            (p.name, {"loaded_plugins": loaded_names}) for p in success_plugins
+        ))
         
         return success_plugins
     
+    async def _import_deferred(
+        self,
+        layer: List[Union[Plugin, PluginRecord]],
+        deferred: Dict[PluginName, PluginSource],
+        imported: Dict[Path, Dict[PluginName, Plugin]],
+        loaded_sources: List[Tuple[PluginSource, List[Plugin]]],
+    ) -> List[Plugin]:
+        """导入层中清单记录所在的插件源并换成插件实例，每个插件源只导入一次
+
+        导入失败或导入结果与记录不符的插件源不加载，依赖它们的插件在后续的层中加载失败
+        """
+        sources = {deferred[r.name].path: deferred[r.name] for r in layer if isinstance(r, PluginRecord)}
+        pending = [source for path, source in sources.items() if path not in imported]
+        results = await asyncio.gather(*(self._load_source(source) for source in pending), return_exceptions=True)
+        for source, plugins in zip(pending, results):
+            imported[source.path] = {}
+            if isinstance(plugins, BaseException):
+                if not isinstance(plugins, Exception):
+                    raise plugins
+                logger.error(f"从源加载插件失败 {source.path}: {plugins}")
+                await self._send_plugin_event("error", PluginName(source.module_name), str(plugins))
+                continue
+            loaded_sources.append((source, plugins))
+            records = self.manifest.entries[str(source.path)].plugins
+            if {p.name: (p.version, p.dependency) for p in plugins} != {r.name: (r.version, r.dependency) for r in records}:
+                # 指纹未变但内容已变（如保留了修改时间），本次不加载，记录会在保存清单时更新
+                logger.error(f"插件源 {source.path} 与发现清单记录不一致，本次不加载，请重新加载插件")
+                await self._send_plugin_event("error", PluginName(source.module_name), "插件源与发现清单记录不一致")
+                for plugin in plugins:
+                    self.loader._loaded_modules.pop(plugin.name, None)
+                    plugin.context.close()
+                continue
+            for key, val in self._inject.items():
+                for p in plugins:
+                    setattr(p, key, val)
+            imported[source.path] = {p.name: p for p in plugins}
+        
+        plugins = [
+            item if not isinstance(item, PluginRecord) else imported[deferred[item.name].path].get(item.name)
+            for item in layer
+        ]
+        plugins = [p for p in plugins if p is not None]
+        self.event_bus.prepare_executors({
+            ExecutorKind(decl.executor)
+            for p in plugins if p.manifest is not None and not p.manifest.isolated
+            for decl in p.manifest.handlers
+        })
+        return plugins
+    
+    async def _start_loaded_plugin(self, plugin: Plugin, semaphore: Optional[asyncio.Semaphore]) -> None:
+        """执行单个插件的 on_load 并登记，失败时抛出异常由调用方统一回滚"""
+        if plugin.protocol_version != PROTOCOL_VERSION:
+            raise PluginVersionError(f"插件 {plugin.name} 协议版本不兼容", plugin.name)
+        with self._lock:
+            self._graph.check(plugin)
+        
+        async with semaphore if semaphore is not None else nullcontext():
+            await self._send_plugin_event("load", plugin.name, plugin.meta)
+            
+            # 声明的处理器在插件代码运行前注册
+            declared = self._register_declared(plugin)
+            try:
+                await asyncio.wait_for(plugin.context.run_in_data_dir(plugin.on_load), self.load_timeout)
+            except BaseException as e:
+                for handler_id in declared:
+                    plugin.context.unregister_handler(handler_id)
+                if isinstance(e, asyncio.TimeoutError) and isinstance(e.__cause__, asyncio.CancelledError):
+                    if asyncio.iscoroutinefunction(plugin.on_load):
+                        raise PluginRuntimeError(f"插件 {plugin.name} 的 on_load 超过 {self.load_timeout} 秒未完成，已取消", plugin.name) from None
+                    raise PluginRuntimeError(
+                        f"插件 {plugin.name} 的 on_load 超过 {self.load_timeout} 秒未完成，同步函数无法取消，仍在后台线程中运行",
+                        plugin.name,
+                    ) from None
+                raise
+        plugin._set_status(PluginState.RUNNING)
+        
+        with self._lock:
+            self._plugins[plugin.name] = plugin
+            self._plugin_status[plugin.name] = plugin.status
+            self._graph.add(plugin)
+        
+        logger.info(f"插件已加载: {plugin.name}@{plugin.version}")
+        
+        await self._send_plugin_event("ok", plugin.name, plugin.meta)
+    
+    async def _split_lazy(self, sources: List[PluginSource]) -> Tuple[List[PluginSource], Dict[PluginName, Tuple[PluginSource, PluginManifest]]]:
+        """读取并记录各插件源的声明文件，分出需要延迟加载的插件源"""
+        manifests = await asyncio.gather(
+            *(asyncio.to_thread(read_manifest, source.path, source.source_type.value, source.module_name) for source in sources),
+            return_exceptions=True,
+        )
+        eager: List[PluginSource] = []
+        lazy: Dict[PluginName, Tuple[PluginSource, PluginManifest]] = {}
+        for source, manifest in zip(sources, manifests):
+            if isinstance(manifest, ManifestError):
+                logger.error(f"插件声明文件无效，按普通插件加载: {manifest}")
+                manifest = None
+            elif isinstance(manifest, BaseException):
+                raise manifest
+            self._manifests[source.path] = manifest
+            if manifest is None or not manifest.lazy or not self.lazy_load:
+                eager.append(source)
+                continue
+            name = PluginName(manifest.name)
+            existing = self._lazy.get(name)
+            if existing is not None and existing.error is not None:
+                # 激活失败的插件在重新加载时再给一次机会
+                for stub_id in existing.stub_ids:
+                    self.event_bus.unregister_handler(stub_id)
+                del self._lazy[name]
+            elif existing is not None or name in self._plugins:
+                continue
+            if name in lazy:
+                logger.error(f"延迟加载插件 {name} 重复声明: {manifest.path}，已忽略")
+                continue
+            lazy[name] = (source, manifest)
+        return eager, lazy
+    
+    async def _load_source(self, source: PluginSource) -> List[Plugin]:
+        """声明了 isolated 的插件源在子进程中运行，主进程只加载其代理；声明无效的插件不加载"""
+        manifest = self._manifests.get(source.path)
+        if manifest is not None and manifest.isolated:
+            plugins = await self.loader.load_isolated(source, manifest)
+        else:
+            plugins = await self.loader.load_from_source(source)
+        valid: List[Plugin] = []
+        for plugin in plugins:
+            try:
+                self._apply_manifest(plugin, manifest)
+            except PluginValidationError as e:
+                logger.error(f"插件 {plugin.name} 的声明无效: {e}")
+                await self._send_plugin_event("error", plugin.name, str(e))
+                self.loader._loaded_modules.pop(plugin.name, None)
+                plugin.context.close()
+                continue
+            valid.append(plugin)
+        return valid
+    
+    def _apply_manifest(self, plugin: Plugin, file_manifest: Optional[PluginManifest]) -> None:
+        """确定插件实际生效的声明并校验，声明文件优先于插件类的 manifest 属性"""
+        from .host import HostedPlugin
+        manifest = file_manifest if file_manifest is not None and file_manifest.name == plugin.name else plugin.manifest
+        if manifest is not None and manifest.name != plugin.name:
+            manifest = None  # 继承自其他插件类的声明
+        plugin.manifest = manifest
+        if manifest is None:
+            return
+        if manifest.version and manifest.version != plugin.version:
+            raise PluginValidationError(f"声明的版本 {manifest.version} 与插件类的 {plugin.version} 不一致", plugin.name)
+        if manifest.dependency:
+            if not plugin.dependency:
+                plugin.dependency = dict(manifest.dependency)
+            elif plugin.dependency != manifest.dependency:
+                raise PluginValidationError(f"声明的依赖 {manifest.dependency} 与插件类的 {plugin.dependency} 不一致", plugin.name)
+        if isinstance(plugin, HostedPlugin):
+            return  # 处理器方法在子进程中校验
+        for decl in manifest.handlers:
+            handler = getattr(plugin, decl.handler, None)
+            if not callable(handler):
+                raise PluginValidationError(f"声明的处理器 {decl.handler} 不是插件的方法", plugin.name)
+            if decl.executor == ExecutorKind.PROCESS.value:
+                try:
+                    _ProcessHandlerRef.of(handler)
+                except ValueError as e:
+                    raise PluginValidationError(str(e), plugin.name) from None
+    
+    def _declared_routes(self, manifest: PluginManifest) -> List[Route]:
+        if not self.command_events and any(decl.command for decl in manifest.handlers):
+            logger.warning(f"插件 {manifest.name} 声明了命令处理器，但未配置命令事件，已忽略")
+        return manifest.routes(self.command_events, self.command_prefixes)
+    
+    def _register_declared(self, plugin: Plugin) -> List[UUID]:
+        """注册插件声明的处理器，返回处理器 ID；独立进程插件交由子进程在 on_load 前注册"""
+        from .host import HostedPlugin
+        if plugin.manifest is None or not plugin.manifest.handlers:
+            return []
+        routes = self._declared_routes(plugin.manifest)
+        if isinstance(plugin, HostedPlugin):
+            plugin.host.routes = routes
+            return []
+        return [plugin.context.register_handler(r.event, getattr(plugin, r.handler), **r.options) for r in routes]
+    
+    def _register_lazy(self, source: PluginSource, manifest: PluginManifest) -> None:
+        """为延迟加载的插件注册存根处理器"""
+        name = PluginName(manifest.name)
+        state = self._lazy[name] = _LazyPlugin(source, manifest)
+        
+        # 存根在事件总线的事件循环线程中同步执行，只做记录与转交，不占用线程池
+        routes: List[Tuple[str, Dict[str, Any]]] = [(event, {}) for event in manifest.events]
+        if manifest.commands:
+            if not self.command_events:
+                logger.warning(f"延迟加载插件 {name} 声明了 commands，但未配置命令事件，已忽略")
+            prefixes = tuple(p + cmd for p in (self.command_prefixes or ("",)) for cmd in manifest.commands)
+            routes.extend((event, {"prefix": prefixes}) for event in self.command_events)
+        # 声明的处理器连同其过滤条件，只有处理器会收到的事件才激活插件
+        routes.extend(
+            (route.event, {k: v for k, v in route.options.items() if k in FILTERS})
+            for route in self._declared_routes(manifest)
+        )
+        
+        for i, (event, options) in enumerate(routes):
+            def stub(event_obj: Event, name: PluginName = name) -> None:
+                state = self._lazy.get(name)
+                if state is None:
+                    return
+                state.last_used = time.monotonic()
+                if state.active or state.error is not None or self._loop is None:
+                    return
+                asyncio.run_coroutine_threadsafe(self._on_lazy_event(name, event_obj), self._loop)
+            # 处理器 ID 由限定名生成，每个存根需要不同的名字
+            stub.__qualname__ = f"{type(self).__name__}.lazy_stub[{name}#{i}]"
+            # 存根不是插件的应答，不计入请求结果
+            state.stub_ids.append(self.event_bus.register_handler(
+                stub, event, executor=ExecutorKind.LOOP, sticky=False, observer=True, **options
+            ))
+        
+        if manifest.idle_timeout is not None and self._idle_task is None and self._loop is not None:
+            self._idle_task = self._loop.create_task(self._idle_loop())
+        logger.debug(f"插件 {name} 将在首个匹配事件到达时加载: {[event for event, _ in routes]}")
+    
+    async def _on_lazy_event(self, name: PluginName, event: Event) -> None:
+        """存根收到事件：激活插件，再把事件补发给插件新注册的处理器"""
+        try:
+            plugins = await self.activate_plugin(name)
+        except Exception:
+            return  # activate_plugin 已记录错误
+        handler_ids = [hid for plugin in plugins for hid in plugin.context.event_handlers]
+        self.event_bus.redeliver(event, handler_ids)
+    
+    async def activate_plugin(self, plugin_name: PluginName) -> List[Plugin]:
+        """立即激活延迟加载的插件，并发调用共享同一次激活"""
+        state = self._lazy.get(plugin_name)
+        if state is None:
+            plugin = self.get_plugin(plugin_name)
+            if plugin is None:
+                raise PluginRuntimeError(f"插件 {plugin_name} 不存在", plugin_name)
+            return [plugin]
+        if state.error is not None:
+            raise state.error
+        if state.active:
+            return [p for p in map(self.get_plugin, state.plugins) if p is not None]
+        if state.activating is None:
+            state.activating = asyncio.ensure_future(self._activate(state))
+        return await asyncio.shield(state.activating)
+    
+    async def _activate(self, state: _LazyPlugin) -> List[Plugin]:
+        name = PluginName(state.manifest.name)
+        started = time.perf_counter()
+        loaded: List[Plugin] = []
+        try:
+            for dep in state.manifest.dependency:
+                if dep in self._lazy:
+                    await self.activate_plugin(PluginName(dep))
+            
+            plugins = await self._load_source(state.source)
+            if not plugins:
+                raise PluginRuntimeError(f"延迟加载插件 {name} 未加载出插件类", name)
+            for key, val in self._inject.items():
+                for p in plugins:
+                    setattr(p, key, val)
+            await self._send_plugin_events("load", ((p.name, p.meta) for p in plugins))
+            
+            # 同时校验对已加载插件的依赖
+            with self._lock:
+                available = self._graph.versions()
+            for layer in _topological_sort(plugins, available):
+                for plugin in layer:
+                    await self._start_loaded_plugin(plugin, None)
+                    loaded.append(plugin)
+        except Exception as e:
+            state.error = e
+            logger.error(f"延迟加载插件 {name} 激活失败", exc_info=e)
+            await self._send_plugin_event("error", name, str(e))
+            for plugin in reversed(loaded):
+                await self.unload_plugin(plugin.name)
+            raise
+        finally:
+            state.activating = None
+        
+        state.plugins = [p.name for p in loaded]
+        state.active = True
+        state.last_used = time.monotonic()
+        self.manifest.record_plugins(state.source.path, loaded)
+        await asyncio.to_thread(self.manifest.save)
+        logger.info(f"延迟加载插件已激活: {name}, 耗时 {time.perf_counter() - started:.2f} 秒")
+        await self._send_plugin_events("ready", ((p.name, {"loaded_plugins": state.plugins}) for p in loaded))
+        return loaded
+    
+    async def _deactivate(self, state: _LazyPlugin) -> None:
+        """卸载已激活的延迟加载插件并释放其模块，存根保留以便再次激活"""
+        for plugin_name in list(state.plugins):
+            await self.unload_plugin(plugin_name)
+        _forget_modules(state.source)
+        state.plugins = []
+        state.active = False
+    
+    async def _idle_loop(self) -> None:
+        while not self._shutdown:
+            timeouts = [s.manifest.idle_timeout for s in self._lazy.values() if s.manifest.idle_timeout is not None]
+            await asyncio.sleep(min(60.0, max(1.0, min(timeouts, default=60.0) / 4)))
+            now = time.monotonic()
+            for state in list(self._lazy.values()):
+                idle = state.manifest.idle_timeout
+                if not state.active or state.activating is not None or idle is None or now - state.last_used < idle:
+                    continue
+                # 仍被其他已加载插件依赖时暂不卸载
+                with self._lock:
+                    needed = set(self._graph.subtree(state.plugins)) - set(state.plugins)
+                if needed:
+                    continue
+                try:
+                    await self._deactivate(state)
+                    logger.info(f"延迟加载插件 {state.manifest.name} 空闲超过 {idle} 秒，已卸载")
+                except Exception:
+                    logger.exception(f"卸载空闲插件 {state.manifest.name} 失败")
+    
+    async def reload_plugins(self, plugin_names: Iterable[PluginName]) -> List[PluginName]:
+        """重载指定插件及依赖它们的插件，返回重新加载成功的插件名"""
+        paths = []
+        for name in plugin_names:
+            source = self.loader.source_of(name)
+            if source is None and name in self._lazy:
+                source = self._lazy[name].source
+            if source is None:
+                logger.warning(f"插件 {name} 未加载，无法重载")
+                continue
+            paths.append(source.path)
+        return await self.reload_sources(paths) if paths else []
+    
+    async def reload_sources(self, paths: Iterable[Path]) -> List[PluginName]:
+        """按插件源增量重载，其他插件不受影响
+
+        来自这些源的插件及（传递地）依赖它们的插件按依赖逆序卸载，丢弃其模块后重新导入，
+        再按依赖顺序加载；插件可通过 __snapshot__ / __restore__ 把状态延续到新实例。
+        新出现的插件源会被加载，已删除的插件源只卸载。
+        """
+        if self._shutdown:
+            raise RuntimeError("插件管理器已关闭")
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            return await self._reload_sources(list(paths))
+    
+    async def _reload_sources(self, paths: List[Path]) -> List[PluginName]:
+        started = time.perf_counter()
+        targets = {p.resolve(): p for p in paths}
+        
+        # 延迟加载的插件只需卸载，下次事件到达时以新代码激活
+        for state in list(self._lazy.values()):
+            if state.source.path.resolve() in targets:
+                del targets[state.source.path.resolve()]
+                if state.active:
+                    await self._deactivate(state)
+                _forget_modules(state.source)
+                state.error = None
+        
+        changed: Set[PluginName] = set()
+        for name in self.list_plugins():
+            source = self.loader.source_of(name)
+            if source is not None and source.path.resolve() in targets:
+                changed.add(name)
+        # 只取出受影响的子图，其余插件的顺序不必重新计算
+        with self._lock:
+            order = [self._plugins[name] for name in self._graph.subtree(changed)]
+        affected: Set[PluginName] = {p.name for p in order}
+        
+        snapshots: Dict[PluginName, Any] = {}
+        sources: Dict[Path, PluginSource] = {}
+        for plugin in reversed(order):
+            try:
+                state = await run_any(plugin.__snapshot__)
+                if state is not None:
+                    snapshots[plugin.name] = state
+            except Exception:
+                logger.exception(f"保存插件 {plugin.name} 的状态失败，将不延续状态")
+            source = self.loader.source_of(plugin.name)
+            if source is not None:
+                sources[source.path.resolve()] = source
+            await self.unload_plugin(plugin.name)
+        for source in sources.values():
+            _forget_modules(source)
+        
+        for resolved, path in targets.items():
+            if resolved not in sources:
+                source = await self.plugin_finder.source_for(path)
+                if source is not None:
+                    sources[resolved] = source
+        
+        eager, lazy = await self._split_lazy([s for s in sources.values() if await aiofiles.os.path.exists(s.path)])
+        for name, (source, manifest) in lazy.items():
+            self._register_lazy(source, manifest)
+        
+        results = await asyncio.gather(*(self._load_source(s) for s in eager), return_exceptions=True)
+        new_plugins: List[Plugin] = []
+        for source, plugins in zip(eager, results):
+            if isinstance(plugins, BaseException):
+                if not isinstance(plugins, Exception):
+                    raise plugins
+                logger.error(f"从源加载插件失败 {source.path}: {plugins}")
+                await self._send_plugin_event("error", PluginName(source.module_name), str(plugins))
+                continue
+            for key, val in self._inject.items():
+                for p in plugins:
+                    setattr(p, key, val)
+            new_plugins.extend(plugins)
+        
+        for plugin in new_plugins:
+            if plugin.name in snapshots:
+                try:
+                    await run_any(plugin.__restore__, snapshots[plugin.name])
+                except Exception:
+                    logger.exception(f"恢复插件 {plugin.name} 的状态失败")
+        
+        reloaded: List[Plugin] = []
+        failed: Set[PluginName] = set(affected)
+        if new_plugins:
+            await self._send_plugin_events("load", ((p.name, p.meta) for p in new_plugins))
+            # 依赖已不存在的插件单独报错，不影响同批其他插件
+            available = set(self._plugins)
+            pending = list(new_plugins)
+            while True:
+                names = available | {p.name for p in pending}
+                broken = [p for p in pending if any(dep not in names for dep in p.dependency)]
+                if not broken:
+                    break
+                for plugin in broken:
+                    pending.remove(plugin)
+                    e = PluginDependencyError(f"插件 {plugin.name} 依赖缺失: {[d for d in plugin.dependency if d not in names]}", plugin_name=plugin.name)
+                    plugin._set_status(PluginState.FAILED, e)
+                    logger.error(f"插件 {plugin.name} 重新加载失败: {e}")
+                    await self._send_plugin_event("error", plugin.name, str(e))
+            new_plugins = pending
+            try:
+                with self._lock:
+                    loaded = self._graph.versions()
+                layers = _topological_sort(new_plugins, loaded)
+            except PluginDependencyError as e:
+                logger.error(f"热重载时插件依赖解析失败: {e}")
+                if e.plugin_name:
+                    await self._send_plugin_event("error", e.plugin_name, str(e))
+                layers = []
+            for layer in layers:
+                for plugin in layer:
+                    missing = [dep for dep in plugin.dependency if dep in failed]
+                    try:
+                        if missing:
+                            raise PluginDependencyError(f"插件 {plugin.name} 依赖的 {missing} 未能重新加载", plugin_name=plugin.name)
+                        await self._start_loaded_plugin(plugin, None)
+                    except Exception as e:
+                        plugin._set_status(PluginState.FAILED, e)
+                        logger.error(f"插件 {plugin.name} 重新加载失败", exc_info=e)
+                        await self._send_plugin_event("error", plugin.name, str(e))
+                        failed.add(plugin.name)
+                    else:
+                        failed.discard(plugin.name)
+                        reloaded.append(plugin)
+        
+        if reloaded:
+            await self._send_plugin_events("ready", (
+                (p.name, {"loaded_plugins": [r.name for r in reloaded]}) for p in reloaded
+            ))
+        elapsed = (time.perf_counter() - started) * 1000
+        suffix = f", 失败或已移除: {sorted(failed)}" if failed else ""
+        logger.info(f"热重载完成: {[p.name for p in reloaded]}, 耗时 {elapsed:.1f} 毫秒{suffix}")
+        return [p.name for p in reloaded]
+    
+    def lazy_plugins(self) -> Dict[PluginName, str]:
+        """延迟加载插件及其状态: dormant / activating / active / failed"""
+        return {name: state.state for name, state in self._lazy.items()}
+    
+    def hosted_plugins(self) -> Dict[PluginName, Dict[str, Any]]:
+        """独立进程运行的插件及其子进程状态，见 PluginHost.stats"""
+        from .host import HostedPlugin
+        with self._lock:
+            plugins = list(self._plugins.values())
+        return {p.name: p.host.stats() for p in plugins if isinstance(p, HostedPlugin)}
+    
+    async def plugin_metrics(self, memory: bool = False, disk: bool = True) -> Dict[PluginName, Dict[str, Any]]:
+        """已加载插件的资源计量，见 PluginMetrics.snapshot
+        
+        Args:
+            memory: 附加 memory_bytes：插件代码分配且仍存活的内存，需要启用 trace_memory；
+                独立进程插件为子进程的常驻内存
+            disk: 附加 data_bytes：插件数据目录的大小
+        """
+        from .host import HostedPlugin
+        with self._lock:
+            plugins = list(self._plugins.values())
+        result = {p.name: p.context.metrics.snapshot() for p in plugins}
+        if disk:
+            sizes = await asyncio.gather(*(asyncio.to_thread(directory_size, p.context.data_dir) for p in plugins))
+            for p, size in zip(plugins, sizes):
+                result[p.name]["data_bytes"] = size
+        if memory:
+            prefixes = []
+            for p in plugins:
+                loaded = self.loader._loaded_modules.get(p.name)
+                if loaded is None or isinstance(p, HostedPlugin):
+                    continue
+                path = loaded[1].path
+                # 调用栈中的文件名取决于导入时的 sys.path，相对与绝对路径都要匹配
+                for prefix in {str(path), os.path.abspath(path)}:
+                    prefixes.append((p.name, prefix))
+            usage = await asyncio.to_thread(traced_memory, prefixes) if tracemalloc.is_tracing() else {}
+            for p in plugins:
+                if isinstance(p, HostedPlugin):
+                    result[p.name]["memory_bytes"] = int(p.host.stats()["rss_mb"] * 2**20)
+                else:
+                    result[p.name]["memory_bytes"] = usage.get(p.name)
+        return result
+    
+    async def reload_configs(self, names: Iterable[str]) -> List[PluginName]:
+        """配置文件改动后把新配置推送给插件，返回收到更新的插件
+        
+        配置按模块名存放，同一模块中的插件共享配置。插件的 config 原地更新，
+        随后调用 on_config_changed 并发布 plugin.<名称>.config 事件。
+        独立进程插件的子进程在重启后才会读取新配置。
+        """
+        updated: List[PluginName] = []
+        for key in set(names):
+            config = await self.config_manager.refresh(PluginName(key))
+            if config is None:
+                continue
+            with self._lock:
+                plugins = [p for p in self._plugins.values() if p.get_module_name() == key]
+            previous = {id(p.config): dict(p.config) for p in plugins}
+            for shared in {id(p.config): p.config for p in plugins}.values():
+                shared.clear()
+                shared.update(config)
+            for plugin in plugins:
+                try:
+                    await plugin.context.run_in_data_dir(plugin.on_config_changed, previous[id(plugin.config)], plugin.config)
+                except Exception as e:
+                    logger.error(f"插件 {plugin.name} 处理配置更新失败: {e}", exc_info=True)
+                logger.info(f"插件配置已更新: {plugin.name}")
+                await self._send_plugin_event("config", plugin.name, plugin.config)
+                updated.append(plugin.name)
+        return updated
+    
+    def reset_metrics(self) -> None:
+        """清零所有插件的计量"""
+        for metrics in list(self.loader.metrics.values()):
+            metrics.reset()
+    
     async def unload_plugin(self, plugin_name: PluginName) -> bool:
+        """卸载插件，依赖它的插件（传递地）先按依赖逆序卸载"""
+        with self._lock:
+            order = self._graph.subtree([plugin_name])
+        for name in reversed(order):
+            if name != plugin_name:
+                logger.info(f"插件 {name} 依赖 {plugin_name}，一并卸载")
+                await self._unload_one(name)
+        return await self._unload_one(plugin_name)
+    
+    async def _unload_one(self, plugin_name: PluginName) -> bool:
         with self._lock:
             plugin = self._plugins.pop(plugin_name, None)
             if plugin is None:
                 return False
+            self._graph.remove(plugin_name)
+            self._stopped_by.pop(plugin_name, None)
+        for state in self._lazy.values():
+            if plugin_name in state.plugins:
+                # 延迟加载的插件被卸载后回到待激活状态
+                state.plugins.remove(plugin_name)
+                state.active = bool(state.plugins)
         
         try:
             await self._send_plugin_event("unload", plugin_name)
@@ -1146,6 +3924,32 @@ class DefaultPluginManager(PluginManager):
             return False
     
     async def start_plugin(self, plugin_name: PluginName) -> bool:
+        """启动已停止的插件，它（传递地）依赖的已停止插件先按依赖顺序启动；
+        之后按依赖顺序重新启动停止它时一并停止的插件"""
+        with self._lock:
+            requirements = self._graph.requirements(plugin_name)
+        for name in requirements:
+            if not await self._start_one(name):
+                logger.error(f"插件 {plugin_name} 依赖的 {name} 未能启动")
+                return False
+        if not await self._start_one(plugin_name):
+            return False
+        
+        with self._lock:
+            order = self._graph.subtree([plugin_name])
+        for name in order:
+            if self._stopped_by.get(name) != plugin_name:
+                continue
+            plugin = self.get_plugin(name)
+            deps = [self.get_plugin(dep) for dep in plugin.dependency] if plugin is not None else []
+            if any(dep is None or dep.status.state != PluginState.RUNNING for dep in deps):
+                logger.warning(f"插件 {name} 的依赖未全部运行，不随 {plugin_name} 启动")
+                continue
+            logger.info(f"插件 {name} 随 {plugin_name} 停止过，一并启动")
+            await self._start_one(name)
+        return True
+    
+    async def _start_one(self, plugin_name: PluginName) -> bool:
         plugin = self.get_plugin(plugin_name)
         if plugin is None:
             return False
@@ -1157,6 +3961,7 @@ class DefaultPluginManager(PluginManager):
                 
                 with self._lock:
                     self._plugin_status[plugin_name] = plugin.status
+                    self._stopped_by.pop(plugin_name, None)
                 
                 await self._send_plugin_event("start", plugin_name)
                 return True
@@ -1170,6 +3975,20 @@ class DefaultPluginManager(PluginManager):
         return plugin.status.state == PluginState.RUNNING
     
     async def stop_plugin(self, plugin_name: PluginName) -> bool:
+        """停止插件，依赖它的插件（传递地）先按依赖逆序停止，并记录下来由 start_plugin 重新启动"""
+        with self._lock:
+            order = self._graph.subtree([plugin_name])
+        for name in reversed(order):
+            if name == plugin_name:
+                continue
+            plugin = self.get_plugin(name)
+            # 已经停止的插件不是被这次停止牵连的，不随之重新启动
+            if plugin is not None and plugin.status.state == PluginState.RUNNING and await self._stop_one(name):
+                with self._lock:
+                    self._stopped_by[name] = plugin_name
+        return await self._stop_one(plugin_name)
+    
+    async def _stop_one(self, plugin_name: PluginName) -> bool:
         plugin = self.get_plugin(plugin_name)
         if plugin is None:
             return False
@@ -1211,12 +4030,21 @@ class DefaultPluginManager(PluginManager):
             return
         
         self._shutdown = True
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        for state in self._lazy.values():
+            for stub_id in state.stub_ids:
+                self.event_bus.unregister_handler(stub_id)
+        self._lazy.clear()
         
-        plugin_names = self.list_plugins()
+        with self._lock:
+            plugin_names = self._graph.order()
         for plugin_name in reversed(plugin_names):
-            if not await self.unload_plugin(plugin_name):
+            if not await self._unload_one(plugin_name):
                 logger.error(f"关闭插件时发生错误: {plugin_name}")
         
+        await self.config_manager.flush()
         if hasattr(self.event_bus, 'close'):
             self.event_bus.close()
         
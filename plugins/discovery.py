@@ -0,0 +1,180 @@
+# 插件发现清单：缓存各插件源的指纹与元数据，未改动的插件无需执行代码即可校验与排序
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple, Union
+
+logger = logging.getLogger("PluginsSys")
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = ".plugin_manifest.json"
+
+Fingerprint = Tuple[int, int]
+
+
+def fingerprint(path: Path) -> Optional[Fingerprint]:
+    """(最大 mtime_ns, 总大小)；目录会遍历其中文件（忽略 __pycache__），路径不存在时返回 None"""
+    try:
+        if not path.is_dir():
+            st = path.stat()
+            return st.st_mtime_ns, st.st_size
+        mtime, size = path.stat().st_mtime_ns, 0
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            mtime = max(mtime, os.stat(root).st_mtime_ns)
+            for name in files:
+                st = os.stat(os.path.join(root, name))
+                mtime = max(mtime, st.st_mtime_ns)
+                size += st.st_size
+        return mtime, size
+    except OSError:
+        return None
+
+
+def _event_name(event: Union[str, Pattern[str]]) -> str:
+    return event if isinstance(event, str) else f"re:{event.pattern}"
+
+
+@dataclass
+class PluginRecord:
+    """一个插件类的元数据，字段与 Plugin 同名，可直接参与依赖排序"""
+    class_name: str
+    name: str
+    version: str
+    dependency: Dict[str, str] = field(default_factory=dict)
+    protocol_version: int = 0
+    events: List[str] = field(default_factory=list)  # 上次加载后注册的事件
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    source_type: str
+    module_name: str
+    mtime_ns: int
+    size: int
+    valid: bool = True  # zip 中是否含有 __init__.py
+    plugins: List[PluginRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ManifestEntry":
+        data = dict(data)
+        data["plugins"] = [PluginRecord(**p) for p in data.get("plugins", [])]
+        return cls(**data)
+
+
+class DiscoveryManifest:
+    """持久化的插件发现清单
+
+    以插件源路径为键，记录 (mtime, size) 指纹与其中插件类的元数据。
+    指纹不变的插件源视为未改动，直接使用记录的结果。
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.timings: Dict[str, float] = {}  # 最近一次冷/热启动耗时（秒）
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取插件发现清单 {self.path} 失败，将重新扫描: {e}")
+            return
+        if raw.get("version") != MANIFEST_VERSION:
+            return
+        try:
+            self.entries = {k: ManifestEntry.from_dict(v) for k, v in raw.get("entries", {}).items()}
+        except TypeError as e:
+            logger.warning(f"插件发现清单 {self.path} 格式无效，将重新扫描: {e}")
+            self.entries = {}
+            return
+        self.timings = raw.get("timings", {})
+
+    def save(self) -> None:
+        """原子写入，清单未变化时跳过"""
+        if not self._dirty:
+            return
+        data = {
+            "version": MANIFEST_VERSION,
+            "timings": self.timings,
+            "entries": {k: asdict(v) for k, v in self.entries.items()},
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"写入插件发现清单 {self.path} 失败: {e}")
+
+    def refresh(self, path: Path, source_type: str, module_name: str) -> Tuple[Optional[ManifestEntry], bool]:
+        """返回 (记录, 是否命中)；指纹变化时换成只含新指纹的记录，路径不存在时记录为 None"""
+        current = fingerprint(path)
+        if current is None:
+            return None, False
+        key = str(path)
+        entry = self.entries.get(key)
+        if entry is not None and entry.source_type == source_type and (entry.mtime_ns, entry.size) == current:
+            self.hits += 1
+            return entry, True
+        self.misses += 1
+        entry = ManifestEntry(key, source_type, module_name, current[0], current[1])
+        self.entries[key] = entry
+        self._dirty = True
+        return entry, False
+
+    def record_plugins(self, path: Path, plugins: Iterable[Any]) -> None:
+        """记录从插件源加载出的插件类"""
+        entry = self.entries.get(str(path))
+        if entry is None:
+            return
+        records = [
+            PluginRecord(
+                type(p).__name__, p.name, p.version, dict(p.dependency), p.protocol_version,
+                sorted({_event_name(e) for e in p.context.event_handlers.values() if isinstance(e, (str, re.Pattern))}),
+            )
+            for p in plugins
+        ]
+        if records != entry.plugins:
+            entry.plugins = records
+            self._dirty = True
+
+    def cached_plugins(self, paths: Iterable[Path]) -> List[PluginRecord]:
+        """各插件源未过期的插件元数据，没有记录的插件源被跳过"""
+        records: List[PluginRecord] = []
+        for path in paths:
+            entry = self.entries.get(str(path))
+            if entry is not None:
+                records.extend(entry.plugins)
+        return records
+
+    def prune(self, paths: Iterable[Path]) -> None:
+        """移除已不存在的插件源"""
+        keep = {str(p) for p in paths}
+        for key in [k for k in self.entries if k not in keep]:
+            del self.entries[key]
+            self._dirty = True
+
+    def record_timing(self, warm: bool, seconds: float) -> Optional[float]:
+        """记录本次启动耗时，返回上一次另一种启动的耗时用于对比
+
+        热启动指所有立即加载的插件源都有可用的记录，导入推迟到各自的依赖层开始时
+        """
+        kind, other = ("warm", "cold") if warm else ("cold", "warm")
+        self.timings[kind] = round(seconds, 3)
+        self._dirty = True
+        return self.timings.get(other)
@@ -0,0 +1,266 @@
+# 按排队延迟与利用率自动伸缩的线程池
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("PluginsSys")
+
+DEFAULT_MIN_WORKERS = 2
+# 处理器以 I/O 为主，上限按 CPU 核数放宽
+ADAPTIVE_MAX_WORKERS = min(64, (os.cpu_count() or 1) * 8)
+
+
+@dataclass
+class PoolDecision:
+    """一次伸缩决策"""
+    action: str  # grow / shrink
+    old: int
+    new: int
+    wait_ms: float
+    utilization: float
+    reason: str
+    at: float = field(default_factory=time.time)
+
+    def __str__(self) -> str:
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.at))
+        return (
+            f"[{stamp}] {self.action} {self.old} -> {self.new} "
+            f"(排队 {self.wait_ms:.0f}ms, 利用率 {self.utilization:.0%}, {self.reason})"
+        )
+
+
+class _WorkItem:
+    __slots__ = ("future", "fn", "args", "kwargs", "enqueued")
+
+    def __init__(self, future: Future, fn: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued = time.monotonic()
+
+    def run(self) -> None:
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class AdaptiveExecutor(Executor):
+    """在 [min_workers, max_workers] 内自动伸缩的线程池
+
+    每个采样周期统计任务的排队等待与线程忙碌比例：
+    等待超过 target_wait 时按当前规模的一半扩容；
+    利用率低于 shrink_utilization 且几乎没有等待时每周期缩减一个线程。
+    采样之间出现突发排队时也会立即补充线程，不必等到下一周期。
+    """
+
+    def __init__(
+        self,
+        min_workers: int = DEFAULT_MIN_WORKERS,
+        max_workers: Optional[int] = None,
+        *,
+        target_wait: float = 0.05,
+        shrink_utilization: float = 0.3,
+        interval: float = 1.0,
+        thread_name_prefix: str = "AdaptivePool",
+        history: int = 50,
+    ) -> None:
+        max_workers = max_workers or ADAPTIVE_MAX_WORKERS
+        if min_workers < 1 or max_workers < min_workers:
+            raise ValueError(f"线程数范围无效: [{min_workers}, {max_workers}]")
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_wait = target_wait
+        self.shrink_utilization = shrink_utilization
+        self.interval = interval
+        self._prefix = thread_name_prefix
+
+        self._cond = threading.Condition()
+        self._queue: Deque[_WorkItem] = deque()
+        self._threads: List[threading.Thread] = []
+        self._workers = 0
+        self._idle = 0
+        self._busy = 0
+        self._retire = 0
+        self._names = 0
+        self._shutdown = False
+
+        # 采样窗口内的统计
+        self._wait_sum = 0.0
+        self._wait_count = 0
+        self._busy_integral = 0.0
+        now = time.monotonic()
+        self._busy_changed = now
+        self._last_sample = now
+        self._completed = 0
+
+        self._decisions: Deque[PoolDecision] = deque(maxlen=history)
+        self._stop = threading.Event()
+        self._controller: Optional[threading.Thread] = None
+
+    # ---------- Executor 接口 ----------
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queue.append(_WorkItem(future, fn, args, kwargs))
+            if self._controller is None:
+                self._start_controller()
+            self._grow_on_burst()
+            self._cond.notify()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft().future.cancel()
+            self._cond.notify_all()
+            threads = list(self._threads)
+        self._stop.set()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    # ---------- 工作线程 ----------
+    def _spawn(self, count: int) -> None:
+        """调用方需持有 _cond"""
+        for _ in range(count):
+            name = f"{self._prefix}_{self._names}"
+            self._names += 1
+            thread = threading.Thread(target=self._work, name=name, daemon=True)
+            self._workers += 1
+            self._threads.append(thread)
+            thread.start()
+
+    def _set_busy(self, delta: int, now: float) -> None:
+        """调用方需持有 _cond；忙碌线程数对时间积分得到利用率"""
+        self._busy_integral += self._busy * (now - self._busy_changed)
+        self._busy_changed = now
+        self._busy += delta
+
+    def _work(self) -> None:
+        current = threading.current_thread()
+        while True:
+            with self._cond:
+                self._idle += 1
+                self._cond.wait_for(lambda: self._queue or self._retire or self._shutdown)
+                self._idle -= 1
+                if self._retire or (self._shutdown and not self._queue):
+                    if self._retire:
+                        self._retire -= 1
+                    self._workers -= 1
+                    self._threads.remove(current)
+                    return
+                item = self._queue.popleft()
+                now = time.monotonic()
+                self._wait_sum += now - item.enqueued
+                self._wait_count += 1
+                self._set_busy(1, now)
+            try:
+                item.run()
+            finally:
+                del item
+                with self._cond:
+                    self._set_busy(-1, time.monotonic())
+                    self._completed += 1
+
+    # ---------- 伸缩控制 ----------
+    def _grow_on_burst(self) -> None:
+        """调用方需持有 _cond：没有空闲线程且队首已等待超过目标时立即补充一个线程"""
+        if self._workers < self.min_workers:
+            self._spawn(self.min_workers - self._workers)
+            return
+        if self._workers - self._retire >= self.max_workers or not self._queue:
+            return
+        waited = time.monotonic() - self._queue[0].enqueued
+        if self._idle == 0 and waited > self.target_wait:
+            old = self._workers - self._retire
+            if self._retire:
+                self._retire -= 1  # 撤回尚未生效的缩减
+            else:
+                self._spawn(1)
+            self._record("grow", old, old + 1, waited * 1000, 1.0, "突发排队", log=False)
+
+    def _start_controller(self) -> None:
+        self._controller = threading.Thread(target=self._control, name=f"{self._prefix}Controller", daemon=True)
+        self._controller.start()
+
+    def _control(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._cond:
+                if self._shutdown:
+                    return
+                self._adjust()
+                # 等待中的任务也可能因线程全忙而迟迟得不到调度
+                self._grow_on_burst()
+
+    def _adjust(self) -> None:
+        """调用方需持有 _cond"""
+        now = time.monotonic()
+        self._set_busy(0, now)
+        elapsed = max(now - self._last_sample, 1e-6)
+        workers = self._workers - self._retire
+        utilization = self._busy_integral / (elapsed * max(workers, 1))
+        wait = self._wait_sum / self._wait_count if self._wait_count else 0.0
+        if self._queue:
+            wait = max(wait, now - self._queue[0].enqueued)
+        self._wait_sum = 0.0
+        self._wait_count = 0
+        self._busy_integral = 0.0
+        self._last_sample = now
+
+        if wait > self.target_wait and workers < self.max_workers:
+            new = min(self.max_workers, workers + max(1, workers // 2))
+            self._spawn(new - workers)
+            self._record("grow", workers, new, wait * 1000, utilization, "排队等待超过目标")
+        elif (
+            workers > self.min_workers
+            and utilization < self.shrink_utilization
+            and wait < self.target_wait / 2
+        ):
+            self._retire += 1
+            self._cond.notify_all()
+            # 缩减是逐个进行的，只记录不逐条提示
+            self._record("shrink", workers, workers - 1, wait * 1000, utilization, "利用率低", log=False)
+
+    def _record(self, action: str, old: int, new: int, wait_ms: float, utilization: float, reason: str, log: bool = True) -> None:
+        decision = PoolDecision(action, old, new, wait_ms, min(utilization, 1.0), reason)
+        self._decisions.append(decision)
+        if log:
+            logger.info("线程池 %s 调整: %s", self._prefix, decision)
+        else:
+            logger.debug("线程池 %s 调整: %s", self._prefix, decision)
+
+    # ---------- 观测 ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self._workers - self._retire,
+                "busy": self._busy,
+                "idle": self._idle,
+                "queued": len(self._queue),
+                "completed": self._completed,
+                "min_workers": self.min_workers,
+                "max_workers": self.max_workers,
+            }
+
+    def decisions(self) -> List[PoolDecision]:
+        """最近的伸缩决策，按时间先后排列"""
+        with self._cond:
+            return list(self._decisions)
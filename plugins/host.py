@@ -0,0 +1,666 @@
+# 独立进程插件：插件在子进程中运行，事件与 API 调用经套接字代理，崩溃或超出资源上限时自动重启
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from .abc import (
+    DEFAULT_PLUGIN_LOAD_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    ConfigManager,
+    Event,
+    ExecutorKind,
+    Plugin,
+    PluginContext,
+    PluginName,
+    PluginRuntimeError,
+    PluginValidationError,
+    PluginSource,
+    PluginSourceType,
+    PluginState,
+    _topological_sort,
+)
+from .loader import PluginLoader
+from .manifest import PluginManifest, Route
+from .metrics import current_metrics
+from .transport import FrameType, SocketEventBus, _Connection, _portable, _portable_results
+
+logger = logging.getLogger("PluginsSys")
+
+DEFAULT_CALL_TIMEOUT = 30.0
+RESTART_BACKOFF = (1.0, 60.0)  # 首次重启前的等待与上限（秒），连续崩溃时翻倍
+STABLE_UPTIME = 60.0           # 子进程运行超过此时长后再崩溃，重启等待从最短重新开始
+_SEEN_SIZE = 1024
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _sample_process(pid: int) -> Optional[Tuple[float, int]]:
+    """(累计 CPU 秒数, 常驻内存字节)，读取 /proc，不可用时返回 None"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # 进程名可能含空格，从最后一个右括号之后开始按字段切分
+            fields = f.read().rsplit(b")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS, int(fields[21]) * _PAGE_SIZE
+
+
+def _exit_reason(code: Optional[int]) -> str:
+    if code is None:
+        return "连接断开"
+    if code < 0:
+        try:
+            return f"被信号 {signal.Signals(-code).name} 终止"
+        except ValueError:
+            return f"被信号 {-code} 终止"
+    return f"退出码 {code}"
+
+
+# -----------------------------------------------------------------------------
+# 主进程一侧
+# -----------------------------------------------------------------------------
+
+class PluginHost:
+    """独立进程插件的宿主，运行在主进程中
+
+    子进程通过 socketpair 与主进程相连，帧格式与 SocketEventBus 相同：
+    子进程中的插件注册处理器时向主进程订阅事件，主进程在事件总线上注册转发处理器，
+    以请求帧把事件交给子进程并取回结果；子进程发布与请求的事件在主进程的事件总线上重放；
+    load_plugins 注入的对象（如 api、client）在子进程中是代理，方法调用以 CALL 帧回到主进程执行。
+
+    子进程意外退出、常驻内存超过 memory_limit 或 CPU 占用在 cpu_window 内持续超过 cpu_limit 时，
+    宿主结束子进程并按指数退避自动重启。资源监视读取 /proc，只在 Linux 上生效。
+    """
+
+    def __init__(
+        self,
+        plugin: "HostedPlugin",
+        *,
+        monitor_interval: float = 1.0,
+        cpu_window: float = 10.0,
+        start_timeout: Optional[float] = DEFAULT_PLUGIN_LOAD_TIMEOUT,
+        stop_timeout: float = 5.0,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ) -> None:
+        self.plugin = plugin
+        self.name = plugin.name
+        self.memory_limit = plugin.manifest.memory_limit
+        self.cpu_limit = plugin.manifest.cpu_limit
+        self.monitor_interval = monitor_interval
+        self.cpu_window = cpu_window
+        self.start_timeout = start_timeout
+        self.stop_timeout = stop_timeout
+        self.request_timeout = request_timeout
+        self.remote: List[str] = []
+        self.restarts = 0
+        self.last_exit: Optional[str] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cwd: Optional[Path] = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._conn: Optional[_Connection] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._forwarders: Dict[str, UUID] = {}  # 子进程订阅的事件模式 -> 转发处理器ID
+        # 子进程已经见过的事件（由它发布，或已转发给它），避免回送与多个转发处理器重复转发
+        self._seen: "OrderedDict[int, Event]" = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._stopping = False
+        self._monitor: Optional[asyncio.Task] = None
+        self._restart_task: Optional[asyncio.Task] = None
+        self._kill_reason: Optional[str] = None
+        self._started_at = 0.0
+        self._crashes = 0
+        self._cpu_samples: Deque[Tuple[float, float]] = deque()
+        self._rss = 0
+        self._cpu_usage = 0.0
+        self._cpu_recorded = 0.0  # 已计入插件计量的子进程 CPU 时间
+        self.routes: List[Route] = []  # 声明的处理器，由子进程在 on_load 前注册
+
+    @property
+    def running(self) -> bool:
+        return self._conn is not None and self._proc is not None and self._proc.poll() is None
+
+    # ---------- 生命周期 ----------
+    async def start(self, remote: List[str]) -> None:
+        """启动子进程并等待其中的插件加载完成
+
+        Args:
+            remote: 在子进程中以代理形式提供给插件的属性名
+        """
+        if os.name != "posix":
+            raise PluginRuntimeError(f"独立进程插件 {self.name} 只支持 POSIX 系统", self.name)
+        self._loop = asyncio.get_running_loop()
+        # change_cwd 为 True 时 on_load 在插件数据目录中执行，子进程使用切换前的工作目录解析相对路径
+        self._cwd = self.plugin.context.original_cwd or Path.cwd()
+        self.remote = list(remote)
+        self._stopping = False
+        await self._spawn()
+        self._monitor = self._loop.create_task(self._watch())
+
+    async def stop(self) -> None:
+        """关闭连接，子进程收到 EOF 后执行插件的 on_close 并退出，超时则强制结束"""
+        self._stopping = True
+        for task in (self._monitor, self._restart_task):
+            if task is not None:
+                task.cancel()
+        self._monitor = self._restart_task = None
+        conn, self._conn = self._conn, None
+        self._detach()
+        if conn is not None:
+            conn.close()
+        await self._reap(self.stop_timeout)
+
+    async def _spawn(self) -> None:
+        parent_sock, child_sock = socket.socketpair()
+        spec = {
+            "fd": child_sock.fileno(),
+            "name": self.name,
+            "source": [self.plugin.source.source_type.value, str(self.plugin.source.path), self.plugin.source.module_name],
+            "data_base_dir": str(self.plugin.data_base_dir),
+            "config_base_dir": str(self.plugin.config_base_dir),
+            "debug": self.plugin.debug,
+            "remote": self.remote,
+            "routes": self.routes,
+            "memory_limit": self.memory_limit,
+            "log_level": logger.getEffectiveLevel(),
+        }
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+        command = [sys.executable, "-c", f"from {__name__} import _child_main; _child_main()", json.dumps(spec)]
+        try:
+            # 独立会话：终端的 Ctrl-C 只交给主进程，子进程随主进程关闭连接而退出
+            self._proc = subprocess.Popen(
+                command, cwd=self._cwd, env=env, stdin=subprocess.DEVNULL,
+                pass_fds=(child_sock.fileno(),), start_new_session=True,
+            )
+        except BaseException:
+            parent_sock.close()
+            raise
+        finally:
+            child_sock.close()
+
+        self._ready = self._loop.create_future()
+        self._kill_reason = None
+        conn = self._conn = _Connection(parent_sock, self, f"{self.name}:{self._proc.pid}")
+        conn.send(FrameType.SUBSCRIBE, "re:.*")  # 子进程发布的事件全部交给主进程
+        conn.start()
+        try:
+            ready = await asyncio.wait_for(asyncio.shield(self._ready), self.start_timeout)
+        except asyncio.TimeoutError:
+            ready = f"{self.start_timeout} 秒内未就绪"
+        except BaseException:
+            await self._abort()
+            raise
+        if isinstance(ready, str):
+            await self._abort()
+            raise PluginRuntimeError(f"独立进程插件 {self.name} 启动失败: {ready}", self.name)
+
+        self._started_at = time.monotonic()
+        self._cpu_samples.clear()
+        self._cpu_recorded = 0.0
+        names = [meta["name"] for meta in ready]
+        if self.name not in names:
+            logger.warning(f"独立进程插件 {self.name} 的子进程中没有同名插件: {names}")
+        logger.info(f"独立进程插件已启动: {self.name} (pid {self._proc.pid}), 子进程插件 {names}")
+
+    async def _abort(self) -> None:
+        """启动失败：断开并结束子进程，不触发自动重启"""
+        conn, self._conn = self._conn, None
+        self._detach()
+        if conn is not None:
+            conn.close()
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+        await self._reap(self.stop_timeout)
+
+    async def _reap(self, timeout: float) -> Optional[int]:
+        proc = self._proc
+        if proc is None:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(proc.wait), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"独立进程插件 {self.name} 的子进程 {timeout} 秒内未退出，强制结束")
+            proc.kill()
+            return await asyncio.to_thread(proc.wait)
+
+    def _detach(self) -> None:
+        """子进程离线：放弃等待中的请求，移除转发处理器"""
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(ConnectionError(f"独立进程插件 {self.name} 的子进程已断开"))
+        self._pending.clear()
+        for handler_id in self._forwarders.values():
+            self.plugin.context.unregister_handler(handler_id)
+        self._forwarders.clear()
+        with self._seen_lock:
+            self._seen.clear()
+
+    def _on_exit(self, peer: _Connection) -> None:
+        if peer is not self._conn:
+            return
+        self._conn = None
+        self._detach()
+        if self._ready is not None and not self._ready.done():
+            self._ready.set_result("子进程在就绪前退出")
+            return
+        if not self._stopping:
+            self._restart_task = self._loop.create_task(self._restart())
+
+    async def _restart(self) -> None:
+        code = await self._reap(self.stop_timeout)
+        reason = self._kill_reason or _exit_reason(code)
+        self.last_exit = reason
+        uptime = time.monotonic() - self._started_at
+        self._crashes = 1 if uptime >= STABLE_UPTIME else self._crashes + 1
+        while not self._stopping:
+            delay = min(RESTART_BACKOFF[1], RESTART_BACKOFF[0] * 2 ** (self._crashes - 1))
+            logger.error(f"独立进程插件 {self.name} 的子进程已结束 ({reason})，{delay:.0f} 秒后重启")
+            self.plugin.context.event_bus.publish(
+                f"plugin.{self.name}.error", reason, source="PluginHost", target=self.name
+            )
+            await asyncio.sleep(delay)
+            if self._stopping:
+                return
+            try:
+                await self._spawn()
+            except Exception as e:
+                reason = f"重启失败: {e}"
+                self._crashes += 1
+                continue
+            self.restarts += 1
+            return
+
+    # ---------- 资源监视 ----------
+    async def _watch(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(self.monitor_interval)
+            proc = self._proc
+            if not self.running or self._kill_reason is not None:
+                continue
+            sample = _sample_process(proc.pid)
+            if sample is None:
+                if self.memory_limit is not None or self.cpu_limit is not None:
+                    logger.warning(f"无法读取独立进程插件 {self.name} 的资源占用，memory_limit / cpu_limit 不生效")
+                return
+            cpu, self._rss = sample
+            self.plugin.context.metrics.record_cpu(max(cpu - self._cpu_recorded, 0.0))
+            self._cpu_recorded = cpu
+            now = time.monotonic()
+            samples = self._cpu_samples
+            samples.append((now, cpu))
+            while len(samples) > 2 and now - samples[1][0] >= self.cpu_window:
+                samples.popleft()
+            span = now - samples[0][0]
+            self._cpu_usage = (cpu - samples[0][1]) / span if span > 0 else 0.0
+
+            reason = None
+            if self.memory_limit is not None and self._rss > self.memory_limit * 1024 * 1024:
+                reason = f"常驻内存 {self._rss / 2**20:.0f}MB 超过上限 {self.memory_limit}MB"
+            elif self.cpu_limit is not None and span >= self.cpu_window and self._cpu_usage > self.cpu_limit:
+                reason = f"{span:.0f} 秒内 CPU 占用 {self._cpu_usage:.2f} 核超过上限 {self.cpu_limit} 核"
+            if reason is not None:
+                self._kill_reason = reason
+                proc.kill()  # 连接随之断开，由 _on_exit 安排重启
+
+    def stats(self) -> Dict[str, Any]:
+        running = self.running
+        return {
+            "pid": self._proc.pid if running else None,
+            "state": "running" if running else ("stopped" if self._stopping else "restarting"),
+            "uptime": round(time.monotonic() - self._started_at, 1) if running else 0.0,
+            "restarts": self.restarts,
+            "rss_mb": round(self._rss / 2**20, 1) if running else 0.0,
+            "cpu": round(self._cpu_usage, 2) if running else 0.0,
+            "memory_limit": self.memory_limit,
+            "cpu_limit": self.cpu_limit,
+            "last_exit": self.last_exit,
+            "subscriptions": sorted(self._forwarders),
+        }
+
+    # ---------- 帧处理（连接的读取线程中调用） ----------
+    def _on_frame(self, peer: _Connection, kind: FrameType, obj: Any) -> None:
+        if peer is not self._conn:
+            return
+        loop = self._loop
+        if kind is FrameType.SUBSCRIBE:
+            loop.call_soon_threadsafe(self._subscribe, peer, obj)
+        elif kind is FrameType.UNSUBSCRIBE:
+            loop.call_soon_threadsafe(self._unsubscribe, peer, obj)
+        elif kind is FrameType.PUBLISH:
+            self._republish([obj])
+        elif kind is FrameType.PUBLISH_MANY:
+            self._republish(obj)
+        elif kind is FrameType.REQUEST:
+            asyncio.run_coroutine_threadsafe(self._serve_request(peer, *obj), loop)
+        elif kind is FrameType.RESPONSE:
+            request_id, results = obj
+            future = self._pending.get(request_id)
+            if future is not None and not future.done():
+                future.set_result(results)
+        elif kind is FrameType.CALL:
+            asyncio.run_coroutine_threadsafe(self._serve_call(peer, *obj), loop)
+        elif kind is FrameType.READY:
+            loop.call_soon_threadsafe(self._on_ready, peer, obj)
+
+    def _on_disconnect(self, peer: _Connection) -> None:
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._on_exit, peer)
+
+    def _on_ready(self, peer: _Connection, info: Any) -> None:
+        if peer is self._conn and self._ready is not None and not self._ready.done():
+            self._ready.set_result(info)
+
+    def _claim(self, event: Event) -> bool:
+        """标记事件已交给子进程，已标记过时返回 False"""
+        with self._seen_lock:
+            if self._seen.get(id(event)) is event:
+                return False
+            self._seen[id(event)] = event
+            if len(self._seen) > _SEEN_SIZE:
+                self._seen.popitem(last=False)
+            return True
+
+    def _subscribe(self, peer: _Connection, key: str) -> None:
+        if peer is not self._conn or key in self._forwarders:
+            return
+        async def forward(event: Event) -> Any:
+            return await self._forward(event)
+        # 处理器 ID 由限定名生成，每个转发处理器需要不同的名字
+        forward.__qualname__ = f"{type(self).__name__}.forward[{self.name}:{key}]"
+        self._forwarders[key] = self.plugin.context.register_handler(key, forward, executor=ExecutorKind.LOOP)
+
+    def _unsubscribe(self, peer: _Connection, key: str) -> None:
+        if peer is not self._conn:
+            return
+        handler_id = self._forwarders.pop(key, None)
+        if handler_id is not None:
+            self.plugin.context.unregister_handler(handler_id)
+
+    async def _forward(self, event: Event) -> Any:
+        """把事件交给子进程，返回子进程中处理器的结果；只有一个处理器时直接返回其结果"""
+        conn = self._conn
+        if conn is None or not self._claim(event):
+            return None
+        request_id = next(self._ids)
+        future: Future = Future()
+        self._pending[request_id] = future
+        try:
+            if not conn.send(FrameType.REQUEST, (request_id, event, self.request_timeout)):
+                return None
+            results = await asyncio.wait_for(asyncio.wrap_future(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"独立进程插件 {self.name} 处理事件 {event.event} 超过 {self.request_timeout} 秒")
+            return None
+        except ConnectionError:
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+        if len(results) == 1:
+            return next(iter(results.values()))
+        return results
+
+    def _republish(self, events: List[Event]) -> None:
+        for event in events:
+            self._claim(event)
+        bus = self.plugin.context.event_bus
+        if len(events) == 1:
+            bus.publish(events[0])
+        else:
+            bus.publish_many(events)
+
+    async def _serve_request(self, peer: _Connection, request_id: int, event: Event, timeout: float) -> None:
+        self._claim(event)
+        try:
+            results = await self.plugin.context.event_bus.request(event, timeout=timeout)
+        except Exception as e:
+            logger.error(f"处理独立进程插件 {self.name} 的请求失败: {e}", exc_info=True)
+            results = {}
+        peer.send(FrameType.RESPONSE, (request_id, _portable_results(results)))
+
+    async def _serve_call(self, peer: _Connection, call_id: int, target: str, path: Tuple[str, ...], args: tuple, kwargs: dict) -> None:
+        # 子进程经代理发起的 API 调用计入插件的计量
+        current_metrics.set(self.plugin.context.metrics)
+        try:
+            if target not in self.remote:
+                raise AttributeError(f"{target} 未提供给独立进程插件")
+            obj = getattr(self.plugin, target)
+            for attr in path:
+                if attr.startswith("_"):
+                    raise AttributeError(f"独立进程插件只能调用公开属性，拒绝 {attr}")
+                obj = getattr(obj, attr)
+            result = obj(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            reply = (call_id, True, _portable(result))
+        except Exception as e:
+            reply = (call_id, False, _portable(e))
+        peer.send(FrameType.RESULT, reply)
+
+
+class HostedPlugin(Plugin, ABC):
+    """独立进程插件在主进程中的代理，随插件管理器的生命周期启动与停止子进程
+
+    名称、版本与依赖取自声明文件（isolated: true）；load_plugins 注入的参数在子进程中以代理形式提供，
+    调用其方法需要 await，参数与返回值须可 pickle。
+    """
+
+    def __init__(
+        self,
+        context: PluginContext,
+        config: Dict[str, Any],
+        debug: bool,
+        source: PluginSource,
+        manifest: PluginManifest,
+        data_base_dir: Path,
+        config_base_dir: Path,
+    ) -> None:
+        super().__init__(context, config, debug)
+        self.name = PluginName(manifest.name)
+        self.version = manifest.version
+        self.dependency = dict(manifest.dependency)
+        self.source = source
+        self.manifest = manifest
+        self.data_base_dir = data_base_dir
+        self.config_base_dir = config_base_dir
+        self.host = PluginHost(self)
+        self._own_attrs = set(vars(self)) | {"_own_attrs"}
+
+    async def on_load(self) -> None:
+        # 加载后由插件管理器注入的属性，在子进程中提供同名代理
+        remote = [key for key in vars(self) if key not in self._own_attrs and not key.startswith("_")]
+        await self.host.start(remote)
+
+    async def on_close(self) -> None:
+        await self.host.stop()
+
+
+# -----------------------------------------------------------------------------
+# 子进程一侧
+# -----------------------------------------------------------------------------
+
+class _RemoteObject:
+    """主进程中对象的代理：属性访问得到下一级代理，调用时返回可等待对象"""
+    __slots__ = ("_runtime", "_target", "_path")
+
+    def __init__(self, runtime: "_ChildRuntime", target: str, path: Tuple[str, ...] = ()) -> None:
+        self._runtime = runtime
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name: str) -> "_RemoteObject":
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _RemoteObject(self._runtime, self._target, self._path + (name,))
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Awaitable[Any]:
+        return self._runtime.call(self._target, self._path, args, kwargs)
+
+    def __repr__(self) -> str:
+        return f"<远程对象 {'.'.join((self._target, *self._path))}>"
+
+
+class _ChildBus(SocketEventBus):
+    """子进程中的事件总线，唯一的对端是主进程"""
+
+    def __init__(self, sock: socket.socket, runtime: "_ChildRuntime") -> None:
+        self.runtime = runtime
+        super().__init__(sock)
+        self.hub = self._peers[0]
+
+    def _on_frame(self, peer: _Connection, kind: FrameType, obj: Any) -> None:
+        if kind is FrameType.RESULT:
+            self.runtime._on_result(*obj)
+        else:
+            super()._on_frame(peer, kind, obj)
+
+    def _on_disconnect(self, peer: _Connection) -> None:
+        with self._lock:
+            if peer in self._peers:
+                self._peers.remove(peer)
+        self.runtime._on_disconnect()
+
+
+def _start_order(plugins: List[Plugin]) -> List[Plugin]:
+    """同一插件源内按依赖排序；对其他插件的依赖已由主进程按声明文件校验"""
+    local = {p.name for p in plugins}
+    views = [
+        SimpleNamespace(name=p.name, version=p.version, plugin=p,
+                        dependency={dep: spec for dep, spec in p.dependency.items() if dep in local})
+        for p in plugins
+    ]
+    return [view.plugin for layer in _topological_sort(views) for view in layer]
+
+
+class _ChildRuntime:
+    def __init__(self, sock: socket.socket, spec: Dict[str, Any]) -> None:
+        self.sock = sock
+        self.spec = spec
+        self.bus: Optional[_ChildBus] = None
+        self._calls: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed: Optional[asyncio.Event] = None
+
+    async def run(self) -> int:
+        self._loop = asyncio.get_running_loop()
+        self._closed = asyncio.Event()
+        self.bus = _ChildBus(self.sock, self)
+        source_type, path, module_name = self.spec["source"]
+        source = PluginSource(PluginSourceType(source_type), Path(path), module_name)
+        loader = PluginLoader(
+            self.bus, ConfigManager(Path(self.spec["config_base_dir"])), Path(self.spec["data_base_dir"]), self.spec["debug"]
+        )
+        started: List[Plugin] = []
+        try:
+            plugins = await loader.load_from_source(source)
+            if not plugins:
+                raise PluginRuntimeError(f"未能从 {source.path} 加载出插件")
+            for plugin in plugins:
+                for target in self.spec["remote"]:
+                    setattr(plugin, target, _RemoteObject(self, target))
+            for plugin in _start_order(plugins):
+                if plugin.name == self.spec["name"]:
+                    _register_routes(plugin, self.spec["routes"])
+                await plugin.context.run_in_data_dir(plugin.on_load)
+                plugin._set_status(PluginState.RUNNING)
+                started.append(plugin)
+        except Exception as e:
+            logger.exception("插件加载失败")
+            self.bus.hub.send(FrameType.READY, f"{type(e).__name__}: {e}")
+            await self._close(started)
+            return 1
+
+        self.bus.hub.send(FrameType.READY, [p.meta for p in started])
+        await self._closed.wait()
+        await self._close(started)
+        return 0
+
+    async def _close(self, plugins: List[Plugin]) -> None:
+        for plugin in reversed(plugins):
+            try:
+                await plugin.context.run_in_data_dir(plugin.__close__, close=True)
+                await plugin.context.run_in_data_dir(plugin.on_close)
+            except Exception:
+                logger.exception(f"关闭插件 {plugin.name} 时出错")
+        self.bus.close()
+
+    async def call(self, target: str, path: Tuple[str, ...], args: tuple, kwargs: dict, timeout: float = DEFAULT_CALL_TIMEOUT) -> Any:
+        call_id = next(self._ids)
+        future: Future = Future()
+        self._calls[call_id] = future
+        try:
+            if not self.bus.hub.send(FrameType.CALL, (call_id, target, path, args, kwargs)):
+                raise ConnectionError("与主进程的连接已断开")
+            ok, value = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        finally:
+            self._calls.pop(call_id, None)
+        if not ok:
+            raise value
+        return value
+
+    def _on_result(self, call_id: int, ok: bool, value: Any) -> None:
+        future = self._calls.get(call_id)
+        if future is not None and not future.done():
+            future.set_result((ok, value))
+
+    def _on_disconnect(self) -> None:
+        for future in list(self._calls.values()):
+            if not future.done():
+                future.set_exception(ConnectionError("与主进程的连接已断开"))
+        self._loop.call_soon_threadsafe(self._closed.set)
+
+
+def _register_routes(plugin: Plugin, routes: List[Any]) -> None:
+    """注册主进程按声明展开的处理器"""
+    for handler_name, event, options in routes:
+        handler = getattr(plugin, handler_name, None)
+        if not callable(handler):
+            raise PluginValidationError(f"声明的处理器 {handler_name} 不是插件的方法", plugin.name)
+        plugin.context.register_handler(event, handler, **options)
+
+
+def _limit_memory(limit_mb: Optional[int]) -> None:
+    """内核兜底：数据段上限取常驻内存上限的两倍，突发分配直接失败而不拖垮整机；
+    常驻内存由主进程按 memory_limit 监视"""
+    if not limit_mb:
+        return
+    try:
+        import resource
+        limit = limit_mb * 2 * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"设置内存上限失败: {e}")
+
+
+def _child_main() -> None:
+    """子进程入口，由 PluginHost 以 python -c 启动，参数为 JSON"""
+    spec = json.loads(sys.argv[1])
+    logging.basicConfig(
+        level=spec["log_level"],
+        format=f"[%(asctime)s][{spec['name']}:%(process)d][%(levelname)s] %(message)s",
+    )
+    _limit_memory(spec.get("memory_limit"))
+    sock = socket.socket(fileno=spec["fd"])
+    sys.exit(asyncio.run(_ChildRuntime(sock, spec).run()))
@@ -0,0 +1,197 @@
+# 插件热重载：监视插件目录，只重载改动的插件源及依赖它们的插件；
+# 配置热更新：监视配置目录，把改动的配置推送给插件
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Set
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+from watchdog.observers.polling import PollingObserver
+
+from .abc import CONFIG_SUFFIXES
+from .manifest import MANIFEST_NAMES
+
+if TYPE_CHECKING:
+    from .abc import DefaultPluginManager
+
+logger = logging.getLogger("PluginsSys")
+
+# 只有这些文件的变化会触发重载，避免插件在自己目录中写入数据时反复重载
+_WATCHED_SUFFIXES = (".py", ".zip")
+_WATCHED_EVENTS = ("created", "modified", "deleted", "moved", "closed")
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, watcher: "PluginWatcher") -> None:
+        self.watcher = watcher
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in _WATCHED_EVENTS or (event.is_directory and event.event_type == "modified"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.watcher._on_change(os.fsdecode(path))
+
+
+class PluginWatcher:
+    """插件目录监视器
+
+    Linux 上使用 inotify（由 watchdog 选择各平台的原生实现），不可用时退回轮询。
+    一个插件源在 debounce 秒内的连续改动合并为一次重载。
+    """
+    label = "插件热重载"
+
+    def __init__(
+        self,
+        manager: "DefaultPluginManager",
+        plugin_dirs: Optional[Iterable[Path]] = None,
+        *,
+        debounce: float = 0.1,
+        polling: bool = False,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.manager = manager
+        self.plugin_dirs: List[Path] = [Path(d) for d in (plugin_dirs if plugin_dirs is not None else manager.plugin_dirs)]
+        self.debounce = debounce
+        self.polling = polling
+        self.poll_interval = poll_interval
+        self._roots = [(os.path.abspath(d), d) for d in self.plugin_dirs]
+        self._observer: Optional[BaseObserver] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Set[Any] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None
+
+    def start(self) -> None:
+        """在事件循环中调用"""
+        if self._observer is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        dirs = [d for d in self.plugin_dirs if d.is_dir()]
+        if not self.polling:
+            try:
+                self._observer = self._schedule(Observer(), dirs)
+                logger.info(f"{self.label}已启用 ({type(self._observer).__name__}): {[str(d) for d in dirs]}")
+                return
+            except OSError as e:
+                # 例如 inotify 监视数量达到上限
+                logger.warning(f"原生文件监视不可用，改用轮询: {e}")
+        self._observer = self._schedule(PollingObserver(timeout=self.poll_interval), dirs)
+        logger.info(f"{self.label}已启用 (轮询 {self.poll_interval} 秒): {[str(d) for d in dirs]}")
+
+    def _schedule(self, observer: BaseObserver, dirs: List[Path]) -> BaseObserver:
+        handler = _Handler(self)
+        for d in dirs:
+            observer.schedule(handler, str(d), recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def stop(self) -> None:
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join(timeout=5)
+        self._observer = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _source_path(self, path: str) -> Optional[Path]:
+        """改动的文件所属的插件源（插件目录下的顶层条目），与插件查找器给出的路径一致"""
+        name = os.path.basename(path)
+        if not (name.endswith(_WATCHED_SUFFIXES) or name in MANIFEST_NAMES or name.endswith(tuple("." + n for n in MANIFEST_NAMES))):
+            return None
+        absolute = os.path.abspath(path)
+        for root, configured in self._roots:
+            rel = os.path.relpath(absolute, root)
+            if rel.startswith(os.pardir) or rel == os.curdir:
+                continue
+            parts = Path(rel).parts
+            if "__pycache__" in parts or parts[0].startswith("."):
+                return None
+            top = parts[0]
+            # 单文件插件的声明文件 <模块名>.plugin.yaml 归属于 <模块名>.py
+            for n in MANIFEST_NAMES:
+                if len(parts) == 1 and top.endswith("." + n):
+                    top = top[: -len(n) - 1] + ".py"
+            return configured / top
+        return None
+
+    def _on_change(self, path: str) -> None:
+        """watchdog 线程中调用"""
+        source = self._source_path(path)
+        if source is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._mark, source)
+
+    def _mark(self, source: Any) -> None:
+        self._pending.add(source)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self) -> None:
+        self._timer = None
+        pending, self._pending = self._pending, set()
+        task = self._loop.create_task(self._dispatch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    async def _dispatch(self, pending: Set[Path]) -> None:
+        logger.debug(f"插件源已改动: {[str(p) for p in pending]}")
+        await self.manager.reload_sources(pending)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"{self.label}失败", exc_info=task.exception())
+
+
+class ConfigWatcher(PluginWatcher):
+    """配置目录监视器
+
+    <配置目录>/<名称>/<名称>.yaml|.yml|.json 改动后，由插件管理器重新读取（内容未变时不推送）
+    并更新对应插件的 config，见 DefaultPluginManager.reload_configs。
+    """
+    label = "配置热更新"
+
+    def __init__(
+        self,
+        manager: "DefaultPluginManager",
+        *,
+        debounce: float = 0.2,
+        polling: bool = False,
+        poll_interval: float = 1.0,
+    ) -> None:
+        super().__init__(manager, [manager.config_base_dir], debounce=debounce, polling=polling, poll_interval=poll_interval)
+
+    def start(self) -> None:
+        for d in self.plugin_dirs:
+            d.mkdir(parents=True, exist_ok=True)
+        super().start()
+
+    def _source_path(self, path: str) -> Optional[str]:
+        """改动的文件对应的配置名，不是配置文件时返回 None"""
+        absolute = os.path.abspath(path)
+        for root, _ in self._roots:
+            rel = os.path.relpath(absolute, root)
+            if rel.startswith(os.pardir):
+                continue
+            parts = Path(rel).parts
+            if len(parts) == 2 and parts[1] in tuple(parts[0] + suffix for suffix in CONFIG_SUFFIXES):
+                return parts[0]
+        return None
+
+    async def _dispatch(self, pending: Set[str]) -> None:
+        logger.debug(f"配置已改动: {sorted(pending)}")
+        await self.manager.reload_configs(pending)
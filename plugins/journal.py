@@ -0,0 +1,292 @@
+# 事件日志：分段追加写入的二进制日志与按原始节奏重放
+# 查看摘要: python -m Fcatbot.plugins.journal <目录>
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import inspect
+import json
+import logging
+import math
+import pickle
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .abc import Event
+
+logger = logging.getLogger("PluginsSys")
+
+# 段文件: 4 字节魔数 + 若干记录；记录: 1 字节类型 + 8 字节时间戳 + 4 字节负载长度（网络字节序） + 负载
+_MAGIC = b"FCJ1"
+_RECORD = struct.Struct("!BdI")
+# 索引文件: 稀疏的 (时间戳, 段内偏移)，每 index_interval 秒最多一条
+_INDEX = struct.Struct("!dQ")
+_SEGMENT_RE = re.compile(r"^segment-(\d{8})\.log$")
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+class RecordKind(IntEnum):
+    FRAME = 1  # 负载: 收到的原始 WebSocket 帧（UTF-8 JSON）
+    EVENT = 2  # 负载: pickle 后的 Event
+
+
+@dataclass(frozen=True)
+class JournalRecord:
+    kind: RecordKind
+    timestamp: float  # 记录时的墙上时间
+    payload: bytes
+
+    def decode(self) -> Union[str, Event]:
+        """帧解码为字符串，事件解码为 Event"""
+        if self.kind is RecordKind.FRAME:
+            return self.payload.decode("utf-8")
+        return pickle.loads(self.payload)
+
+
+def _segment_paths(directory: Path) -> List[Path]:
+    return sorted(p for p in directory.glob("segment-*.log") if _SEGMENT_RE.match(p.name))
+
+
+class EventJournal:
+    """追加写入的事件日志
+
+    调用方线程只负责序列化并入队，写入、分段与索引由后台线程完成。
+    每次打开都从新的段开始，已有的段文件不会被改写。
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        *,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        index_interval: float = 1.0,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.index_interval = index_interval
+        self.skipped = 0  # 无法序列化而未记录的事件数
+
+        existing = _segment_paths(self.directory)
+        self._next_segment = int(_SEGMENT_RE.match(existing[-1].name).group(1)) + 1 if existing else 0
+        self._queue: "queue.SimpleQueue[Optional[Tuple[int, float, bytes]]]" = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="EventJournal", daemon=True)
+        self._writer.start()
+
+    def record_frame(self, data: Union[str, bytes, dict]) -> None:
+        """记录一条收到的原始帧"""
+        if isinstance(data, dict):
+            payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        elif isinstance(data, str):
+            payload = data.encode("utf-8")
+        else:
+            payload = bytes(data)
+        self._put(RecordKind.FRAME, payload)
+
+    def record_event(self, event: Event) -> None:
+        """记录一个已发布的事件；数据无法序列化时跳过并计数"""
+        try:
+            payload = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            self.skipped += 1
+            logger.debug("事件 %s 无法写入日志: %s", event.event, e)
+            return
+        self._put(RecordKind.EVENT, payload)
+
+    def _put(self, kind: RecordKind, payload: bytes) -> None:
+        if not self._closed:
+            self._queue.put((kind, time.time(), payload))
+
+    def _open_segment(self) -> Tuple[Any, Any]:
+        name = f"segment-{self._next_segment:08d}"
+        self._next_segment += 1
+        log = open(self.directory / f"{name}.log", "xb", buffering=1024 * 1024)
+        index = open(self.directory / f"{name}.idx", "xb", buffering=0)
+        log.write(_MAGIC)
+        return log, index
+
+    def _write_loop(self) -> None:
+        log = index = None
+        last_indexed = -math.inf
+        try:
+            while True:
+                item = self._queue.get()
+                # 顺带写出已积累的记录，整批写完再刷新
+                while item is not None:
+                    kind, timestamp, payload = item
+                    if log is None or log.tell() >= self.segment_size:
+                        if log is not None:
+                            log.close()
+                            index.close()
+                        log, index = self._open_segment()
+                        last_indexed = -math.inf
+                    if timestamp - last_indexed >= self.index_interval:
+                        index.write(_INDEX.pack(timestamp, log.tell()))
+                        last_indexed = timestamp
+                    log.write(_RECORD.pack(kind, timestamp, len(payload)))
+                    log.write(payload)
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if log is not None:
+                    log.flush()
+                if item is None:
+                    return
+        except OSError as e:
+            logger.error("写入事件日志 %s 失败，停止记录: %s", self.directory, e)
+            self._closed = True
+        finally:
+            if log is not None:
+                log.close()
+                index.close()
+
+    def close(self) -> None:
+        """写完已入队的记录后关闭"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+
+
+class JournalReader:
+    """按时间顺序读取事件日志目录"""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f"事件日志目录不存在: {self.directory}")
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        return self.read()
+
+    def read(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[JournalRecord]:
+        """读取 [start, end) 时间范围内的记录，借助索引跳过之前的部分"""
+        for path in _segment_paths(self.directory):
+            # 早于 start 的段只需从最后一个索引点开始扫描
+            offset = self._seek(self._load_index(path.with_suffix(".idx")), start)
+            for record in self._read_segment(path, offset):
+                if start is not None and record.timestamp < start:
+                    continue
+                if end is not None and record.timestamp >= end:
+                    return
+                yield record
+
+    @staticmethod
+    def _load_index(path: Path) -> List[Tuple[float, int]]:
+        try:
+            raw = path.read_bytes()
+        except OSError:
+            return []
+        usable = len(raw) - len(raw) % _INDEX.size
+        return list(_INDEX.iter_unpack(raw[:usable]))
+
+    @staticmethod
+    def _seek(entries: List[Tuple[float, int]], start: Optional[float]) -> int:
+        if start is None or not entries:
+            return len(_MAGIC)
+        i = bisect.bisect_right([t for t, _ in entries], start) - 1
+        return entries[i][1] if i >= 0 else len(_MAGIC)
+
+    @staticmethod
+    def _read_segment(path: Path, offset: int) -> Iterator[JournalRecord]:
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                logger.warning("跳过无法识别的事件日志段: %s", path)
+                return
+            f.seek(offset)
+            while True:
+                header = f.read(_RECORD.size)
+                if not header:
+                    return
+                if len(header) < _RECORD.size:
+                    logger.warning("事件日志段 %s 末尾记录不完整，已忽略", path.name)
+                    return
+                kind, timestamp, length = _RECORD.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    logger.warning("事件日志段 %s 末尾记录不完整，已忽略", path.name)
+                    return
+                yield JournalRecord(RecordKind(kind), timestamp, payload)
+
+
+async def replay_journal(
+    directory: Union[str, Path],
+    *,
+    on_frame: Optional[Callable[[str], Any]] = None,
+    on_event: Optional[Callable[[Event], Any]] = None,
+    speed: Optional[float] = 1.0,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> int:
+    """按记录顺序逐条重放，返回重放的记录数
+
+    Args:
+        on_frame: 接收原始帧，例如 BotClient.on_message；None 时跳过帧记录
+        on_event: 接收事件，例如 bus.publish；None 时跳过事件记录
+        speed: 1 为原速，N 为 N 倍速，None / 0 / inf 为不等待全速重放
+        start, end: 只重放该墙上时间范围内的记录
+
+    回调可以是协程函数，会在处理下一条记录前等待其完成，保证顺序确定。
+    各记录按与首条记录的时间差定时，不会累积 sleep 误差。
+    """
+    sinks: Dict[RecordKind, Optional[Callable[[Any], Any]]] = {
+        RecordKind.FRAME: on_frame,
+        RecordKind.EVENT: on_event,
+    }
+    paced = speed is not None and 0 < speed < math.inf
+    loop = asyncio.get_running_loop()
+    origin: Optional[Tuple[float, float]] = None
+    count = 0
+    for record in JournalReader(directory).read(start, end):
+        sink = sinks.get(record.kind)
+        if sink is None:
+            continue
+        if paced:
+            if origin is None:
+                origin = (record.timestamp, loop.time())
+            else:
+                delay = origin[1] + (record.timestamp - origin[0]) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        elif count % 256 == 0:
+            await asyncio.sleep(0)
+        result = sink(record.decode())
+        if inspect.isawaitable(result):
+            await result
+        count += 1
+    return count
+
+
+def main(directory: str) -> None:
+    counts = {kind: 0 for kind in RecordKind}
+    first = last = None
+    for record in JournalReader(directory):
+        counts[record.kind] += 1
+        first = record.timestamp if first is None else first
+        last = record.timestamp
+    print(f"目录: {directory}  段数: {len(_segment_paths(Path(directory)))}")
+    for kind, count in counts.items():
+        print(f"{kind.name:<8}{count:>12,}")
+    if first is not None:
+        fmt = "%Y-%m-%d %H:%M:%S"
+        print(f"时间范围: {time.strftime(fmt, time.localtime(first))} ~ {time.strftime(fmt, time.localtime(last))} ({last - first:.1f} 秒)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python -m Fcatbot.plugins.journal <目录>")
+        sys.exit(1)
+    main(sys.argv[1])
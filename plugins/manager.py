@@ -2,7 +2,8 @@
 from pathlib import Path
 from .abc import EventBus, DefaultPluginManager
 from .loader import PluginLoader
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Union
+from .abc import DEFAULT_PLUGIN_LOAD_TIMEOUT
 
 class PluginManager(DefaultPluginManager):
     def __init__(
@@ -11,12 +12,30 @@ class PluginManager(DefaultPluginManager):
         config_base_dir: Path,
         data_base_dir: Path,
         event_bus: Optional[EventBus] = None,
+        load_timeout: Optional[float] = DEFAULT_PLUGIN_LOAD_TIMEOUT,
+        load_concurrency: int = 0,
+        lazy_load: bool = True,
+        command_events: Iterable[str] = (),
+        command_prefixes: Iterable[str] = (),
+        trace_memory: int = 0,
+        bundle_keys: Optional[Dict[str, Union[str, bytes]]] = None,
+        require_signed_bundles: bool = False,
     ) -> None:
         super().__init__(
             plugin_dirs,
             config_base_dir,
             data_base_dir,
             event_bus,
-            False
+            False,
+            load_timeout,
+            load_concurrency,
+            lazy_load,
+            command_events,
+            command_prefixes,
+            trace_memory,
+            bundle_keys,
+            require_signed_bundles,
         )
-        self.loader = PluginLoader(self.event_bus, self.config_manager, data_base_dir, False)
\ No newline at end of file
+        self.loader = PluginLoader(
+            self.event_bus, self.config_manager, data_base_dir, False, bundle_keys, require_signed_bundles,
+        )
\ No newline at end of file
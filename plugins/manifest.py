@@ -0,0 +1,232 @@
+# 插件声明文件：不导入插件代码即可得知插件名、依赖与订阅的事件
+# 目录插件: <插件目录>/plugin.yaml | plugin.yml | plugin.json
+# 单文件插件: 同目录下的 <模块名>.plugin.yaml | .plugin.yml | .plugin.json
+# zip 插件: 包内 <模块名>/plugin.yaml 等，或根目录下的 plugin.yaml 等
+# 也可以在插件类上以 manifest 属性声明（映射，字段同声明文件，lazy 与 isolated 除外）
+
+from __future__ import annotations
+
+import json
+import logging
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import yaml
+
+logger = logging.getLogger("PluginsSys")
+
+MANIFEST_NAMES = ("plugin.yaml", "plugin.yml", "plugin.json")
+EXECUTORS = ("thread", "loop", "process")
+# 处理器声明中可用的事件数据过滤条件，含义同 EventBus.register_handler
+FILTERS = {"group_id": int, "user_id": int, "message_type": str, "prefix": str, "keyword": str}
+
+
+class ManifestError(ValueError):
+    """声明文件内容无效"""
+
+
+def _str_tuple(data: Dict[str, Any], key: str) -> Tuple[str, ...]:
+    value = data.get(key, ())
+    if isinstance(value, str):
+        value = (value,)
+    if not isinstance(value, (list, tuple)) or not all(isinstance(v, str) and v for v in value):
+        raise ManifestError(f"{key} 必须是非空字符串列表")
+    return tuple(value)
+
+
+def _filter_values(key: str, value: Any) -> Tuple[Union[int, str], ...]:
+    kind = FILTERS[key]
+    values = value if isinstance(value, (list, tuple)) else (value,)
+    if not values or not all(isinstance(v, kind) and not isinstance(v, bool) for v in values):
+        raise ManifestError(f"{key} 必须是{'整数' if kind is int else '字符串'}或其列表")
+    return tuple(values)
+
+
+class Route(NamedTuple):
+    """展开后的一条处理器注册：插件方法名、事件名与传给 register_handler 的选项"""
+    handler: str
+    event: str
+    options: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class HandlerDecl:
+    """声明的事件处理器，插件加载后、on_load 之前由插件管理器注册"""
+    handler: str                        # 插件的方法名；executor 为 process 时须为静态方法或类方法，
+                                        # 子进程中没有插件实例，普通方法会在加载时被拒绝
+    event: Optional[str] = None         # 事件名，"re:" 开头为正则
+    command: Optional[str] = None       # 命令名（不含命令前缀），与 event 二选一
+    executor: str = "thread"            # thread / loop / process，见 ExecutorKind
+    batch: bool = False
+    timeout: Optional[float] = None
+    filters: Tuple[Tuple[str, Tuple[Union[int, str], ...]], ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "HandlerDecl":
+        if not isinstance(data, dict):
+            raise ManifestError("handlers 的每一项必须是映射")
+        unknown = set(data) - {"handler", "event", "command", "executor", "batch", "timeout", *FILTERS}
+        if unknown:
+            raise ManifestError(f"处理器声明中有未知字段: {sorted(unknown)}")
+        handler = data.get("handler")
+        if not isinstance(handler, str) or not handler.isidentifier() or handler.startswith("_"):
+            raise ManifestError(f"handler 必须是插件的公开方法名: {handler!r}")
+        event, command = data.get("event"), data.get("command")
+        if (event is None) == (command is None):
+            raise ManifestError(f"处理器 {handler} 必须声明 event 或 command 之一")
+        if not isinstance(event or command, str) or not (event or command):
+            raise ManifestError(f"处理器 {handler} 的 event / command 必须是非空字符串")
+        if command is not None and "prefix" in data:
+            raise ManifestError(f"命令处理器 {handler} 不能再声明 prefix")
+        executor = data.get("executor", "thread")
+        if executor not in EXECUTORS:
+            raise ManifestError(f"处理器 {handler} 的 executor 必须是 {' / '.join(EXECUTORS)} 之一")
+        batch = data.get("batch", False)
+        if not isinstance(batch, bool):
+            raise ManifestError(f"处理器 {handler} 的 batch 必须是布尔值")
+        timeout = data.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise ManifestError(f"处理器 {handler} 的 timeout 必须是正数")
+        filters = tuple((key, _filter_values(key, data[key])) for key in FILTERS if key in data)
+        return cls(handler, event, command, executor, batch, timeout, filters)
+
+    def routes(self, command_events: Iterable[str], command_prefixes: Iterable[str]) -> List[Route]:
+        options: Dict[str, Any] = dict(self.filters)
+        options["executor"] = self.executor
+        if self.batch:
+            options["batch"] = True
+        if self.timeout is not None:
+            options["timeout"] = self.timeout
+        if self.event is not None:
+            return [Route(self.handler, self.event, options)]
+        options["prefix"] = tuple(p + self.command for p in (tuple(command_prefixes) or ("",)))
+        return [Route(self.handler, event, dict(options)) for event in command_events]
+
+
+@dataclass(frozen=True)
+class PluginManifest:
+    name: str
+    version: str = ""
+    lazy: bool = False                  # 为 True 时首个匹配事件到达才导入并加载
+    events: Tuple[str, ...] = ()        # 订阅的事件名，"re:" 开头为正则
+    commands: Tuple[str, ...] = ()      # 处理的命令名（不含命令前缀）
+    idle_timeout: Optional[float] = None  # 延迟加载的插件空闲多少秒后卸载，None 不卸载
+    dependency: Dict[str, str] = field(default_factory=dict)
+    isolated: bool = False              # 为 True 时在独立子进程中运行，见 plugins/host.py
+    memory_limit: Optional[int] = None  # 独立进程的常驻内存上限（MB），超出后重启
+    cpu_limit: Optional[float] = None   # 独立进程的 CPU 占用上限（核数，如 0.5），持续超出后重启
+    handlers: Tuple[HandlerDecl, ...] = ()  # 声明的事件处理器，加载时即可建立路由
+    path: Optional[str] = None          # 声明文件位置，用于提示
+
+    @classmethod
+    def from_dict(cls, data: Any, path: Optional[str] = None) -> "PluginManifest":
+        if not isinstance(data, dict):
+            raise ManifestError("声明文件顶层必须是映射")
+        name = data.get("name")
+        if not isinstance(name, str) or not name:
+            raise ManifestError("缺少非空的 name")
+        lazy = data.get("lazy", False)
+        if not isinstance(lazy, bool):
+            raise ManifestError("lazy 必须是布尔值")
+        idle_timeout = data.get("idle_timeout")
+        if idle_timeout is not None and (isinstance(idle_timeout, bool) or not isinstance(idle_timeout, (int, float)) or idle_timeout <= 0):
+            raise ManifestError("idle_timeout 必须是正数")
+        dependency = data.get("dependency", {}) or {}
+        if not isinstance(dependency, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in dependency.items()):
+            raise ManifestError("dependency 必须是 插件名 -> 版本要求 的映射")
+        isolated = data.get("isolated", False)
+        if not isinstance(isolated, bool):
+            raise ManifestError("isolated 必须是布尔值")
+        memory_limit = data.get("memory_limit")
+        if memory_limit is not None and (isinstance(memory_limit, bool) or not isinstance(memory_limit, int) or memory_limit <= 0):
+            raise ManifestError("memory_limit 必须是正整数（MB）")
+        cpu_limit = data.get("cpu_limit")
+        if cpu_limit is not None and (isinstance(cpu_limit, bool) or not isinstance(cpu_limit, (int, float)) or cpu_limit <= 0):
+            raise ManifestError("cpu_limit 必须是正数（核数）")
+        handlers = data.get("handlers", ()) or ()
+        if not isinstance(handlers, (list, tuple)):
+            raise ManifestError("handlers 必须是列表")
+        manifest = cls(
+            name=name,
+            version=str(data.get("version", "")),
+            lazy=lazy,
+            events=_str_tuple(data, "events"),
+            commands=_str_tuple(data, "commands"),
+            idle_timeout=idle_timeout,
+            dependency=dict(dependency),
+            isolated=isolated,
+            memory_limit=memory_limit,
+            cpu_limit=cpu_limit,
+            handlers=tuple(HandlerDecl.from_dict(h) for h in handlers),
+            path=path,
+        )
+        if manifest.lazy and not (manifest.events or manifest.commands or manifest.handlers):
+            raise ManifestError("延迟加载的插件至少需要声明 events、commands 或 handlers")
+        if not manifest.isolated and (memory_limit is not None or cpu_limit is not None):
+            raise ManifestError("memory_limit 与 cpu_limit 只对 isolated 插件有效")
+        if manifest.isolated and not manifest.version:
+            # 主进程不导入插件代码，依赖校验只能使用声明的版本
+            raise ManifestError("独立进程运行的插件需要声明 version")
+        return manifest
+
+    @classmethod
+    def from_class(cls, plugin_cls: Any, data: Any) -> "PluginManifest":
+        """插件类上的 manifest 属性，name、version 与 dependency 缺省取自插件类"""
+        if not isinstance(data, dict):
+            raise ManifestError("manifest 属性必须是映射")
+        for key in ("lazy", "isolated", "memory_limit", "cpu_limit", "idle_timeout"):
+            if key in data:
+                raise ManifestError(f"{key} 只能在声明文件中设置，插件类被导入时已无法生效")
+        data = {"name": plugin_cls.name, "version": plugin_cls.version, "dependency": dict(plugin_cls.dependency), **data}
+        return cls.from_dict(data, f"{plugin_cls.__module__}.{plugin_cls.__qualname__}.manifest")
+
+    def routes(self, command_events: Iterable[str], command_prefixes: Iterable[str]) -> List[Route]:
+        """声明的处理器展开为注册项，命令处理器展开为各命令事件上的前缀过滤"""
+        command_events, command_prefixes = tuple(command_events), tuple(command_prefixes)
+        return [route for decl in self.handlers for route in decl.routes(command_events, command_prefixes)]
+
+
+def _parse(text: str, filename: str) -> Any:
+    try:
+        return json.loads(text) if filename.endswith(".json") else yaml.safe_load(text)
+    except (ValueError, yaml.YAMLError) as e:
+        raise ManifestError(f"无法解析: {e}") from e
+
+
+def read_manifest(path: Path, source_type: str, module_name: str) -> Optional[PluginManifest]:
+    """读取插件源的声明文件，没有声明文件时返回 None，内容无效时抛出 ManifestError"""
+    if source_type == "zip":
+        try:
+            with zipfile.ZipFile(path) as zf:
+                names = set(zf.namelist())
+                for name in MANIFEST_NAMES:
+                    for member in (f"{module_name}/{name}", name):
+                        if member in names:
+                            location = f"{path}:{member}"
+                            return _load(zf.read(member).decode("utf-8"), member, location)
+        except (zipfile.BadZipFile, OSError, UnicodeDecodeError) as e:
+            raise ManifestError(f"读取 {path} 中的声明文件失败: {e}") from e
+        return None
+
+    if source_type == "directory":
+        candidates = [path / name for name in MANIFEST_NAMES]
+    else:
+        candidates = [path.with_name(f"{module_name}.{name}") for name in MANIFEST_NAMES]
+    for candidate in candidates:
+        try:
+            text = candidate.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        except (OSError, UnicodeDecodeError) as e:
+            raise ManifestError(f"读取 {candidate} 失败: {e}") from e
+        return _load(text, candidate.name, str(candidate))
+    return None
+
+
+def _load(text: str, filename: str, location: str) -> PluginManifest:
+    try:
+        return PluginManifest.from_dict(_parse(text, filename), location)
+    except ManifestError as e:
+        raise ManifestError(f"{location}: {e}") from None
@@ -0,0 +1,177 @@
+# 插件资源计量：处理器耗时与 CPU 时间、处理的事件数、API 调用次数与延迟
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Deque, Dict, Generator, Iterable, Iterator, Optional, Tuple
+
+# 当前执行代码所属插件的计量对象，由事件总线在处理器执行期间、插件上下文在 on_load/on_close 期间设置
+current_metrics: ContextVar[Optional["PluginMetrics"]] = ContextVar("fcatbot_plugin_metrics", default=None)
+
+_LATENCY_SAMPLES = 256
+
+
+class PluginMetrics:
+    """一个插件的累计计量，插件重载后继续累计
+
+    协程处理器的 CPU 时间按其每一步在线程中的执行时间累加，不含等待；
+    进程池处理器只计墙上时间。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events = 0          # 处理的事件数
+            self.calls = 0           # 处理器执行次数（批量处理一次计一次）
+            self.errors = 0          # 处理失败的事件数
+            self.wall_time = 0.0     # 处理器墙上时间（秒）
+            self.cpu_time = 0.0      # 处理器（及独立进程插件的子进程）CPU 时间（秒）
+            self.max_wall = 0.0
+            self.api_calls = 0
+            self.api_errors = 0
+            self.api_time = 0.0
+            self.api_max = 0.0
+            self._api_latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+            self.since = time.time()
+
+    def record_handler(self, events: int, wall: float, cpu: Optional[float], errors: int) -> None:
+        with self._lock:
+            self.events += events
+            self.calls += 1
+            self.errors += errors
+            self.wall_time += wall
+            if wall > self.max_wall:
+                self.max_wall = wall
+            if cpu is not None:
+                self.cpu_time += cpu
+
+    def record_cpu(self, seconds: float) -> None:
+        """记录不经过处理器测量的 CPU 时间，如独立进程插件的子进程"""
+        with self._lock:
+            self.cpu_time += seconds
+
+    def record_api(self, latency: float, failed: bool) -> None:
+        with self._lock:
+            self.api_calls += 1
+            self.api_errors += failed
+            self.api_time += latency
+            if latency > self.api_max:
+                self.api_max = latency
+            self._api_latencies.append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._api_latencies)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+            return {
+                "events": self.events,
+                "calls": self.calls,
+                "errors": self.errors,
+                "wall_ms": round(self.wall_time * 1000, 1),
+                "cpu_ms": round(self.cpu_time * 1000, 1),
+                "max_wall_ms": round(self.max_wall * 1000, 1),
+                "api_calls": self.api_calls,
+                "api_errors": self.api_errors,
+                "api_avg_ms": round(self.api_time / self.api_calls * 1000, 1) if self.api_calls else 0.0,
+                "api_p95_ms": round(p95 * 1000, 1),
+                "api_max_ms": round(self.api_max * 1000, 1),
+                "since": self.since,
+            }
+
+
+class ApiCall:
+    """一次 API 调用的结果，调用方在响应表示失败时设置 failed"""
+    __slots__ = ("failed",)
+
+    def __init__(self) -> None:
+        self.failed = False
+
+
+@contextmanager
+def metered_api_call() -> Iterator[ApiCall]:
+    """计入当前插件的一次 API 调用，不在插件代码中时不做任何事；抛出异常视为失败"""
+    call = ApiCall()
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield call
+        return
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.failed = True
+        raise
+    finally:
+        metrics.record_api(time.perf_counter() - started, call.failed)
+
+
+class CpuTimedCoroutine:
+    """包装协程，累加其每一步的线程 CPU 时间，挂起等待的时间不计入"""
+    __slots__ = ("_coro", "cpu")
+
+    def __init__(self, coro: Awaitable[Any]) -> None:
+        self._coro = coro
+        self.cpu = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        it = self._coro.__await__()
+        send: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            started = time.thread_time()
+            try:
+                yielded = it.throw(error) if error is not None else it.send(send)
+            except StopIteration as stop:
+                self.cpu += time.thread_time() - started
+                return stop.value
+            except BaseException:
+                self.cpu += time.thread_time() - started
+                raise
+            self.cpu += time.thread_time() - started
+            try:
+                send, error = (yield yielded), None
+            except BaseException as e:
+                send, error = None, e
+
+
+def directory_size(path: Path) -> int:
+    """目录下所有文件的总大小（字节），目录不存在时为 0"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def traced_memory(prefixes: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+    """按 tracemalloc 记录的分配位置统计各插件源占用的内存（字节）
+
+    Args:
+        prefixes: (键, 插件源路径前缀)；分配归属于调用栈中最近一帧所在的插件源
+    """
+    if not tracemalloc.is_tracing():
+        return {}
+    prefixes = list(prefixes)
+    totals = {key: 0 for key, _ in prefixes}
+    snapshot = tracemalloc.take_snapshot()
+    for stat in snapshot.statistics("traceback"):
+        # 帧从最早到最近排列
+        for frame in reversed(stat.traceback):
+            key = next((k for k, prefix in prefixes if frame.filename.startswith(prefix)), None)
+            if key is not None:
+                totals[key] += stat.size
+                break
+    return totals
@@ -7,10 +7,10 @@
 # @Copyright (c) 2025 by Fish-LP, Fcatbot使用许可协议 
 # -------------------------
 from re import Pattern
-from typing import Any, Dict, Optional, Union
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple, Union
 from uuid import UUID
 
-from Fcatbot.plugins.abc import DEFAULT_REQUEST_TIMEOUT, EventHandler
+from ..abc import DEFAULT_REQUEST_TIMEOUT, Event, EventHandler
 from .base import BaseMixin
 
 
@@ -18,10 +18,11 @@ class EventBusApiMixin(BaseMixin):
     def register_handler(
         self, 
         event: Union[str, Pattern[str]],  # 支持字符串或正则表达式
-        handler: EventHandler
+        handler: EventHandler,
+        **options: Any
     ) -> UUID: 
         """注册事件处理器"""
-        return self.context.register_handler(event, handler)
+        return self.context.register_handler(event, handler, **options)
     
     def register_handlers(
         self, 
@@ -45,7 +46,31 @@ class EventBusApiMixin(BaseMixin):
         timeout: float = DEFAULT_REQUEST_TIMEOUT
     ) -> Dict[UUID, Union[Any, Exception]]: 
         """请求-响应模式"""
-        return self.context.event_bus.request(event,data,source=source,target=target,timeout=timeout)
+        return await self.context.event_bus.request(event,data,source=source,target=target,timeout=timeout)
+
+    async def request_first(
+        self,
+        event: str,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ) -> Any:
+        """返回第一个成功的响应"""
+        return await self.context.event_bus.request_first(event,data,source=source,target=target,timeout=timeout)
+
+    def request_stream(
+        self,
+        event: str,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ) -> AsyncIterator[Tuple[UUID, Union[Any, Exception]]]:
+        """按完成顺序产出各处理器的结果"""
+        return self.context.event_bus.request_stream(event,data,source=source,target=target,timeout=timeout)
 
     def publish(
         self,
@@ -57,3 +82,11 @@ class EventBusApiMixin(BaseMixin):
     ) -> None:
         """发布-订阅模式"""
         self.context.event_bus.publish(event,data,source=source,target=target)
+
+    def publish_many(self, events: Iterable[Event]) -> None:
+        """批量发布"""
+        self.context.event_bus.publish_many(events)
+
+    def last_value(self, event: str) -> Optional[Event]:
+        """粘性事件（如生命周期、心跳）最后一次发布的值"""
+        return self.context.event_bus.last_value(event)
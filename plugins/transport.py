@@ -0,0 +1,608 @@
+# 跨进程事件总线传输
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import itertools
+import logging
+import os
+import pickle
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterable, List, Optional, Pattern, Tuple, Union
+from uuid import UUID
+
+from .abc import (
+    DEFAULT_REQUEST_TIMEOUT,
+    ConcurrentEventBus,
+    Event,
+    EventBus,
+    EventHandler,
+    ExecutorKind,
+    OverflowPolicy,
+    _compile_event_pattern,
+)
+
+logger = logging.getLogger("PluginsSys")
+
+Address = Union[str, Path, Tuple[str, int]]
+
+# 帧格式: 1 字节帧类型 + 4 字节负载长度（网络字节序） + pickle 负载
+_HEADER = struct.Struct("!BI")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+# 握手: 双方各发随机数，再以共享密钥对 角色+对方随机数 做 HMAC-SHA256 互相证明，之后才开始收发 pickle 帧
+_NONCE_SIZE = 32
+_DIGEST_SIZE = hashlib.sha256().digest_size
+HANDSHAKE_TIMEOUT = 5.0
+
+
+class HandshakeError(ConnectionError):
+    """对端未通过认证"""
+
+
+class FrameType(IntEnum):
+    SUBSCRIBE = 1     # 负载: 事件模式
+    UNSUBSCRIBE = 2   # 负载: 事件模式
+    PUBLISH = 3       # 负载: Event
+    PUBLISH_MANY = 4  # 负载: List[Event]
+    REQUEST = 5       # 负载: (请求ID, Event, 超时)
+    RESPONSE = 6      # 负载: (请求ID, Dict[UUID, 结果])
+    # 以下只用于独立进程插件与主进程之间，见 plugins/host.py
+    CALL = 7          # 负载: (调用ID, 目标名, 属性路径, args, kwargs)
+    RESULT = 8        # 负载: (调用ID, 是否成功, 返回值或异常)
+    READY = 9         # 负载: 插件元数据列表，或加载失败的原因
+
+
+def _pattern_key(event: Union[str, Pattern[str]]) -> str:
+    """事件模式的可传输形式，正则统一为 re: 前缀"""
+    if isinstance(event, Pattern):
+        return f"re:{event.pattern}"
+    return event
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            return None
+        received += n
+    return bytes(buf)
+
+
+def _proof(secret: bytes, role: bytes, nonce: bytes) -> bytes:
+    return hmac.new(secret, role + nonce, hashlib.sha256).digest()
+
+
+def _handshake(sock: socket.socket, secret: bytes, server: bool) -> None:
+    """共享密钥双向认证，失败时抛出 HandshakeError；不传输密钥本身"""
+    sock.settimeout(HANDSHAKE_TIMEOUT)
+    try:
+        nonce = os.urandom(_NONCE_SIZE)
+        sock.sendall(nonce)
+        peer_nonce = _recv_exact(sock, _NONCE_SIZE)
+        if peer_nonce is None:
+            raise HandshakeError("对端在握手时断开")
+        mine, theirs = (b"server", b"client") if server else (b"client", b"server")
+        sock.sendall(_proof(secret, mine, peer_nonce))
+        proof = _recv_exact(sock, _DIGEST_SIZE)
+        if proof is None or not hmac.compare_digest(proof, _proof(secret, theirs, nonce)):
+            raise HandshakeError("对端密钥不匹配")
+    except socket.timeout:
+        raise HandshakeError("握手超时") from None
+    finally:
+        sock.settimeout(None)
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """Unix 套接字对端进程的 uid，平台不支持时返回 None"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _portable(value: Any) -> Any:
+    """无法 pickle 的值与异常替换为其文本表示"""
+    try:
+        pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return value
+    except Exception:
+        return RuntimeError(repr(value)) if isinstance(value, BaseException) else repr(value)
+
+
+def _portable_results(results: Dict[UUID, Any]) -> Dict[UUID, Any]:
+    return {handler_id: _portable(value) for handler_id, value in results.items()}
+
+
+class _Connection:
+    """与一个对端进程的连接，记录对端订阅的事件模式"""
+
+    def __init__(self, sock: socket.socket, bus: "SocketEventBus", name: str) -> None:
+        self.sock = sock
+        self.bus = bus
+        self.name = name
+        self.closed = False
+        self._send_lock = threading.Lock()
+        # 模式 -> 引用计数；精确模式与正则分开，精确匹配走哈希
+        self._exact: Dict[str, int] = {}
+        self._regex: Dict[str, Tuple[Pattern[str], int]] = {}
+        self._reader = threading.Thread(target=self._read_loop, name=f"EventBusPeer-{name}", daemon=True)
+
+    def start(self) -> None:
+        self._reader.start()
+
+    def send(self, kind: FrameType, obj: Any) -> bool:
+        if self.closed:
+            return False
+        payload = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        try:
+            with self._send_lock:
+                self.sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+            return True
+        except OSError as e:
+            logger.warning(f"向对端 {self.name} 发送失败: {e}")
+            self.close()
+            return False
+
+    def subscribe(self, key: str) -> None:
+        pattern, is_regex = _compile_event_pattern(key)
+        if is_regex:
+            _, count = self._regex.get(key, (pattern, 0))
+            self._regex[key] = (pattern, count + 1)
+        else:
+            self._exact[key] = self._exact.get(key, 0) + 1
+
+    def unsubscribe(self, key: str) -> None:
+        if key in self._exact:
+            self._exact[key] -= 1
+            if self._exact[key] <= 0:
+                del self._exact[key]
+        elif key in self._regex:
+            pattern, count = self._regex[key]
+            if count <= 1:
+                del self._regex[key]
+            else:
+                self._regex[key] = (pattern, count - 1)
+
+    def keys(self) -> List[str]:
+        return [*self._exact, *self._regex]
+
+    def matches(self, event_name: str) -> bool:
+        if event_name in self._exact:
+            return True
+        return any(pattern.match(event_name) for pattern, _ in self._regex.values())
+
+    def _read_loop(self) -> None:
+        try:
+            while not self.closed:
+                header = _recv_exact(self.sock, _HEADER.size)
+                if header is None:
+                    break
+                kind, size = _HEADER.unpack(header)
+                if size > MAX_FRAME_SIZE:
+                    logger.error(f"对端 {self.name} 帧过大 ({size} 字节)，断开连接")
+                    break
+                payload = _recv_exact(self.sock, size)
+                if payload is None:
+                    break
+                try:
+                    self.bus._on_frame(self, FrameType(kind), pickle.loads(payload))
+                except Exception as e:
+                    logger.error(f"处理对端 {self.name} 的帧失败: {e}", exc_info=True)
+        except OSError:
+            pass
+        finally:
+            self.close()
+            self.bus._on_disconnect(self)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class SocketEventBus(EventBus):
+    """跨进程事件总线
+
+    在本地 ConcurrentEventBus 之上，通过 Unix 套接字（或本机 TCP）把
+    publish/request 转发给订阅了对应事件的其他进程。拓扑为星型：
+    一个进程以 serve=True 监听地址，其余进程连接该地址；
+    监听端负责在各连接之间转发。
+
+    帧负载使用 pickle，能连上的对端即可在本进程中执行任意代码，因此：
+    Unix 套接字权限为 0600，并拒绝其他用户的进程（平台支持 SO_PEERCRED 时）；
+    TCP 只允许回环地址，且必须提供 secret，连接后先完成 HMAC 握手才收发帧。
+    """
+
+    def __init__(
+        self,
+        address: Union[Address, socket.socket],
+        *,
+        serve: bool = False,
+        local_bus: Optional[ConcurrentEventBus] = None,
+        connect_timeout: float = 5.0,
+        secret: Optional[Union[str, bytes]] = None,
+        **bus_options: Any,
+    ) -> None:
+        """
+        Args:
+            address: Unix 套接字路径，或 (host, port) 使用本机 TCP；
+                也可以是已连接的套接字（如 socketpair 的一端），此时对端视为监听端
+            serve: 是否作为监听端
+            local_bus: 本进程内使用的事件总线，默认按 bus_options 新建
+            connect_timeout: 连接端等待监听端就绪的最长时间
+            secret: 握手使用的共享密钥，TCP 必须提供；Unix 套接字提供时同样握手
+        """
+        if isinstance(address, tuple):
+            if secret is None:
+                raise ValueError("TCP 跨进程事件总线必须提供 secret")
+            if not _is_loopback(address[0]):
+                raise ValueError(f"跨进程事件总线只能使用回环地址: {address[0]}")
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self.address = address
+        self.serve = serve
+        self._local = local_bus or ConcurrentEventBus(**bus_options)
+        self._peers: List[_Connection] = []
+        self._lock = threading.RLock()
+        self._patterns: Dict[UUID, str] = {}  # 本地处理器 -> 事件模式
+        self._local_keys: Dict[str, int] = {}  # 本地事件模式引用计数
+        self._pending: Dict[int, Future] = {}
+        self._request_ids = itertools.count(1)
+        self._closed = False
+        self._server: Optional[socket.socket] = None
+
+        if isinstance(address, socket.socket):
+            self._add_peer(_Connection(address, self, "hub"))
+        elif serve:
+            self._listen()
+        else:
+            self._connect(connect_timeout)
+
+    @property
+    def local_bus(self) -> ConcurrentEventBus:
+        return self._local
+
+    # ---------- 连接管理 ----------
+    def _socket(self) -> socket.socket:
+        if isinstance(self.address, tuple):
+            return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    def _listen(self) -> None:
+        server = self._socket()
+        if isinstance(self.address, tuple):
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(self.address)
+        else:
+            path = str(self.address)
+            if os.path.exists(path):
+                os.unlink(path)
+            # 绑定时即以 0600 创建，避免 bind 与 chmod 之间被其他用户连上
+            umask = os.umask(0o177)
+            try:
+                server.bind(path)
+            finally:
+                os.umask(umask)
+            os.chmod(path, 0o600)
+        server.listen()
+        server.settimeout(0.5)
+        self._server = server
+        threading.Thread(target=self._accept_loop, name="EventBusAccept", daemon=True).start()
+        logger.info(f"跨进程事件总线监听于 {self.address}")
+
+    def _accept_loop(self) -> None:
+        counter = itertools.count(1)
+        while not self._closed:
+            try:
+                sock, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.settimeout(None)
+            # 握手在单独的线程中进行，慢速对端不影响其他连接
+            threading.Thread(
+                target=self._admit, args=(sock, f"peer-{next(counter)}"), name="EventBusAdmit", daemon=True,
+            ).start()
+
+    def _admit(self, sock: socket.socket, name: str) -> None:
+        """认证新连接，通过后加入对端"""
+        try:
+            if sock.family == getattr(socket, "AF_UNIX", None):
+                uid = _peer_uid(sock)
+                if uid is not None and uid not in (os.getuid(), 0):
+                    raise HandshakeError(f"拒绝 uid {uid} 的进程")
+            if self._secret is not None:
+                _handshake(sock, self._secret, server=True)
+        except (HandshakeError, OSError) as e:
+            logger.warning(f"跨进程事件总线拒绝连接 {name}: {e}")
+            sock.close()
+            return
+        if self._closed:
+            sock.close()
+            return
+        self._add_peer(_Connection(sock, self, name))
+
+    def _connect(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while True:
+            sock = self._socket()
+            try:
+                sock.connect(str(self.address) if not isinstance(self.address, tuple) else self.address)
+                break
+            except OSError:
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"无法连接跨进程事件总线 {self.address}")
+                time.sleep(0.1)
+        if self._secret is not None:
+            try:
+                _handshake(sock, self._secret, server=False)
+            except (HandshakeError, OSError):
+                sock.close()
+                raise
+        self._add_peer(_Connection(sock, self, "hub"))
+
+    def _add_peer(self, peer: _Connection) -> None:
+        with self._lock:
+            # 告知新对端：本地模式，以及（监听端）其他对端订阅的模式
+            for key in self._local_keys:
+                peer.send(FrameType.SUBSCRIBE, key)
+            for other in self._peers:
+                for key in other.keys():
+                    peer.send(FrameType.SUBSCRIBE, key)
+            self._peers.append(peer)
+        peer.start()
+        logger.debug(f"跨进程事件总线对端已连接: {peer.name}")
+
+    def _on_disconnect(self, peer: _Connection) -> None:
+        with self._lock:
+            if peer not in self._peers:
+                return
+            self._peers.remove(peer)
+            for key in peer.keys():
+                self._broadcast(FrameType.UNSUBSCRIBE, key, exclude=peer)
+        if not self._closed:
+            logger.warning(f"跨进程事件总线对端已断开: {peer.name}")
+
+    def _broadcast(self, kind: FrameType, obj: Any, exclude: Optional[_Connection] = None) -> None:
+        for peer in list(self._peers):
+            if peer is not exclude:
+                peer.send(kind, obj)
+
+    # ---------- 帧处理 ----------
+    def _on_frame(self, peer: _Connection, kind: FrameType, obj: Any) -> None:
+        if kind is FrameType.SUBSCRIBE:
+            with self._lock:
+                peer.subscribe(obj)
+                self._broadcast(kind, obj, exclude=peer)
+        elif kind is FrameType.UNSUBSCRIBE:
+            with self._lock:
+                peer.unsubscribe(obj)
+                self._broadcast(kind, obj, exclude=peer)
+        elif kind is FrameType.PUBLISH:
+            self._local.publish(obj)
+            self._forward([obj], origin=peer)
+        elif kind is FrameType.PUBLISH_MANY:
+            self._local.publish_many(obj)
+            self._forward(obj, origin=peer)
+        elif kind is FrameType.REQUEST:
+            request_id, event, timeout = obj
+            asyncio.run_coroutine_threadsafe(
+                self._serve_request(peer, request_id, event, timeout),
+                self._local._ensure_loop(),
+            )
+        elif kind is FrameType.RESPONSE:
+            request_id, results = obj
+            with self._lock:
+                future = self._pending.get(request_id)
+            if future is not None and not future.done():
+                future.set_result(results)
+
+    async def _serve_request(self, peer: _Connection, request_id: int, event: Event, timeout: float) -> None:
+        try:
+            results = await self._request(event, timeout, origin=peer)
+        except Exception as e:
+            logger.error(f"处理对端 {peer.name} 的请求失败: {e}", exc_info=True)
+            results = {}
+        peer.send(FrameType.RESPONSE, (request_id, _portable_results(results)))
+
+    def _forward(self, events: List[Event], origin: Optional[_Connection] = None) -> None:
+        """把事件转发给订阅了它们的对端，每个对端一帧"""
+        for peer in list(self._peers):
+            if peer is origin:
+                continue
+            matched = [e for e in events if peer.matches(e.event)]
+            if len(matched) == 1:
+                peer.send(FrameType.PUBLISH, matched[0])
+            elif matched:
+                peer.send(FrameType.PUBLISH_MANY, matched)
+
+    # ---------- EventBus 接口 ----------
+    def register_handler(self, handler: EventHandler, event: Union[str, Pattern[str]], **options: Any) -> UUID:
+        """注册事件处理器，并向对端订阅该事件模式"""
+        handler_id = self._local.register_handler(handler, event, **options)
+        key = _pattern_key(event)
+        with self._lock:
+            previous = self._patterns.get(handler_id)
+            if previous == key:
+                return handler_id
+            if previous is not None:
+                self._release_key(previous)
+            self._patterns[handler_id] = key
+            self._local_keys[key] = self._local_keys.get(key, 0) + 1
+            if self._local_keys[key] == 1:
+                self._broadcast(FrameType.SUBSCRIBE, key)
+        return handler_id
+
+    def register_handlers(self, event_handlers: Dict[Union[str, Pattern[str]], EventHandler]) -> Dict[Union[str, Pattern[str]], UUID]:
+        """批量注册事件处理器"""
+        return {event: self.register_handler(handler, event) for event, handler in event_handlers.items()}
+
+    def unregister_handler(self, handler_id: UUID) -> bool:
+        """取消注册事件处理器"""
+        result = self._local.unregister_handler(handler_id)
+        with self._lock:
+            key = self._patterns.pop(handler_id, None)
+            if key is not None:
+                self._release_key(key)
+        return result
+
+    def _release_key(self, key: str) -> None:
+        self._local_keys[key] -= 1
+        if self._local_keys[key] <= 0:
+            del self._local_keys[key]
+            self._broadcast(FrameType.UNSUBSCRIBE, key)
+
+    def publish(
+        self,
+        event: str | Event,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None
+    ) -> None:
+        """发布到本地处理器及订阅了该事件的对端"""
+        if self._closed:
+            raise RuntimeError("事件总线已关闭")
+        event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
+        self._local.publish(event_obj)
+        self._forward([event_obj])
+
+    async def wait_capacity(self, slots: int = 1, timeout: Optional[float] = None) -> bool:
+        return await self._local.wait_capacity(slots, timeout)
+
+    async def publish_async(
+        self,
+        event: str | Event,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None
+    ) -> None:
+        """等待本地入口容纳本事件后发布，对端按各自的入口处理"""
+        if self._closed:
+            raise RuntimeError("事件总线已关闭")
+        event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
+        await self._local.publish_async(event_obj)
+        self._forward([event_obj])
+
+    def publish_many(self, events: Iterable[Event]) -> None:
+        """批量发布，每个对端只发送一帧"""
+        if self._closed:
+            raise RuntimeError("事件总线已关闭")
+        events = list(events)
+        self._local.publish_many(events)
+        self._forward(events)
+
+    def last_value(self, event: str) -> Optional[Event]:
+        """本地与对端发布的粘性事件都会在本地总线保留"""
+        return self._local.last_value(event)
+
+    def create_bulkhead(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: Optional[int] = None,
+        overflow: Optional[OverflowPolicy] = None,
+    ) -> Optional[str]:
+        return self._local.create_bulkhead(name, max_workers, max_queue, overflow)
+
+    def remove_bulkhead(self, name: str) -> None:
+        self._local.remove_bulkhead(name)
+
+    def prepare_executors(self, kinds: Iterable[ExecutorKind]) -> None:
+        self._local.prepare_executors(kinds)
+
+    def redeliver(self, event: Event, handler_ids: Collection[UUID]) -> int:
+        return self._local.redeliver(event, handler_ids)
+
+    async def request(
+        self,
+        event: str | Event,
+        data: Any = None,
+        *,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ) -> Dict[UUID, Union[Any, Exception]]:
+        """请求本地及对端处理器，合并结果；超时未响应的对端不计入结果"""
+        if self._closed:
+            raise RuntimeError("事件总线已关闭")
+        event_obj = event if isinstance(event, Event) else Event(event, data, source, target)
+        return await self._request(event_obj, timeout)
+
+    async def _request(self, event: Event, timeout: float, origin: Optional[_Connection] = None) -> Dict[UUID, Any]:
+        waits = []
+        for peer in list(self._peers):
+            if peer is not origin and peer.matches(event.event):
+                request_id = next(self._request_ids)
+                future: Future = Future()
+                with self._lock:
+                    self._pending[request_id] = future
+                if peer.send(FrameType.REQUEST, (request_id, event, timeout)):
+                    waits.append(self._wait_response(request_id, future, timeout))
+                else:
+                    with self._lock:
+                        self._pending.pop(request_id, None)
+
+        local_results, *remote_results = await asyncio.gather(
+            self._local.request(event, timeout=timeout), *waits
+        )
+        results = dict(local_results)
+        for remote in remote_results:
+            results.update(remote)
+        return results
+
+    async def _wait_response(self, request_id: int, future: Future, timeout: float) -> Dict[UUID, Any]:
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def close(self) -> None:
+        """关闭连接与本地事件总线"""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            peers = list(self._peers)
+        for peer in peers:
+            peer.close()
+        if self._server is not None:
+            self._server.close()
+            if isinstance(self.address, (str, Path)) and os.path.exists(str(self.address)):
+                os.unlink(str(self.address))
+        self._local.close()
+
+    def is_closed(self) -> bool:
+        """检查是否已关闭"""
+        return self._closed
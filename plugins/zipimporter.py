@@ -0,0 +1,383 @@
+# 插件包导入：zip 插件由专用的导入器加载，不再经由 sys.path 与 zipimport
+# 挂载时一次读入中央目录与包内文件，编译结果缓存在 <数据目录>/.bytecode 中，
+# 并记录每个包导入过的模块，卸载时只移除这些模块。
+# 缓存按成员内容的 SHA-256 复用，签名包的缓存以其签名密钥做 HMAC，校验通过才会反序列化。
+# 签名：包根目录的 plugin.sig 记录密钥名与包内容摘要的 HMAC-SHA256，见 sign_bundle
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import json
+import logging
+import marshal
+import os
+import sys
+import threading
+import zipfile
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Set, Tuple, Union
+
+logger = logging.getLogger("PluginsSys")
+
+SIGNATURE_NAME = "plugin.sig"
+BYTECODE_DIR = ".bytecode"
+_CACHE_VERSION = 2
+_CACHE_TAG_SIZE = hashlib.sha256().digest_size
+
+Fingerprint = Tuple[int, int]
+
+
+class BundleError(ImportError):
+    """插件包无法挂载：无法读取、签名无效或缺少要求的签名"""
+
+
+def _key_bytes(key: Union[str, bytes]) -> bytes:
+    """配置中的密钥写作十六进制字符串"""
+    return key if isinstance(key, bytes) else bytes.fromhex(key)
+
+
+def _bundle_digest(files: Mapping[str, bytes]) -> bytes:
+    """包内容摘要：按成员名排序，逐个计入 成员名 与 内容的 SHA-256，不含签名本身"""
+    h = hashlib.sha256()
+    for name in sorted(files):
+        if name == SIGNATURE_NAME or name.endswith("/"):
+            continue
+        h.update(name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(hashlib.sha256(files[name]).digest())
+    return h.digest()
+
+
+def _read_bundle(path: Path) -> Dict[str, bytes]:
+    """读取包内全部文件，读取时会校验 CRC"""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return {info.filename: zf.read(info) for info in zf.infolist() if not info.is_dir()}
+    except (OSError, zipfile.BadZipFile) as e:
+        raise BundleError(f"无法读取插件包 {path}: {e}") from e
+
+
+def _check_signature(path: Path, files: Mapping[str, bytes], keys: Mapping[str, bytes], required: bool) -> Optional[str]:
+    raw = files.get(SIGNATURE_NAME)
+    if raw is None:
+        if required:
+            raise BundleError(f"插件包 {path} 未签名")
+        return None
+    try:
+        signature = json.loads(raw)
+        key_id, algorithm, digest = signature["key"], signature.get("alg"), signature["digest"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise BundleError(f"插件包 {path} 的签名无法解析: {e}") from e
+    if algorithm != "hmac-sha256":
+        raise BundleError(f"插件包 {path} 使用了不支持的签名算法: {algorithm}")
+    key = keys.get(key_id)
+    if key is None:
+        if required:
+            raise BundleError(f"插件包 {path} 的签名密钥 {key_id} 不受信任")
+        logger.warning(f"插件包 {path} 的签名密钥 {key_id} 未配置，按未签名处理")
+        return None
+    expected = hmac.new(key, _bundle_digest(files), hashlib.sha256).hexdigest()
+    if not isinstance(digest, str) or not hmac.compare_digest(digest, expected):
+        raise BundleError(f"插件包 {path} 的签名不符，内容可能已被篡改")
+    return key_id
+
+
+def verify_bundle(path: Union[str, Path], keys: Mapping[str, bytes], required: bool = False) -> Optional[str]:
+    """校验插件包的签名，返回签名所用的密钥名，未签名时返回 None
+
+    签名无效时总是抛出 BundleError；required 为 True 时未签名或密钥不受信任同样抛出
+    """
+    path = Path(path)
+    return _check_signature(path, _read_bundle(path), keys, required)
+
+
+def sign_bundle(path: Union[str, Path], key_id: str, key: Union[str, bytes]) -> None:
+    """为插件包写入签名，替换已有的签名"""
+    path = Path(path)
+    with zipfile.ZipFile(path) as zf:
+        infos = [info for info in zf.infolist() if info.filename != SIGNATURE_NAME]
+        contents = {info.filename: zf.read(info) for info in infos}
+    signature = {
+        "key": key_id,
+        "alg": "hmac-sha256",
+        "digest": hmac.new(_key_bytes(key), _bundle_digest(contents), hashlib.sha256).hexdigest(),
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w") as out:
+        for info in infos:
+            out.writestr(info, contents[info.filename])
+        out.writestr(SIGNATURE_NAME, json.dumps(signature))
+    os.replace(tmp, path)
+
+
+def _fingerprint(path: Path) -> Optional[Fingerprint]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ZipBundle(importlib.abc.InspectLoader):
+    """一个已挂载的插件包，同时是其中模块的加载器
+
+    包内文件在挂载时全部读入内存，之后不再打开 zip，插件包可以随时被替换。
+    签名包的字节码缓存以 signing_key 认证，未签名的包没有可信的密钥，缓存只防损坏。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        files: Dict[str, bytes],
+        fingerprint: Optional[Fingerprint],
+        signed_by: Optional[str] = None,
+        cache_file: Optional[Path] = None,
+        signing_key: Optional[bytes] = None,
+    ) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.signed_by = signed_by  # 签名所用的密钥名，未签名为 None
+        self.cache_file = cache_file
+        self.modules: Set[str] = set()  # 由本包导入的模块
+        self._files = files
+        # 缓存认证密钥由签名密钥派生，与签名本身分开
+        self._cache_key = hmac.new(signing_key, b"fcatbot-bytecode-cache", hashlib.sha256).digest() if signing_key is not None else None
+        self._root = os.path.abspath(path)
+        self._code: Dict[str, CodeType] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        # 模块全名 -> (成员名, 是否为包)
+        self._index: Dict[str, Tuple[str, bool]] = {}
+        for member in files:
+            if not member.endswith(".py"):
+                continue
+            parts = member[:-3].split("/")
+            is_package = parts[-1] == "__init__"
+            if is_package:
+                parts.pop()
+            if parts and all(part.isidentifier() for part in parts):
+                self._index[".".join(parts)] = (member, is_package)
+        self.top_level: FrozenSet[str] = frozenset(name for name in self._index if "." not in name)
+        self._load_cache()
+
+    @classmethod
+    def open(
+        cls,
+        path: Path,
+        keys: Optional[Mapping[str, bytes]] = None,
+        require_signature: bool = False,
+        cache_dir: Optional[Path] = None,
+    ) -> "ZipBundle":
+        fingerprint = _fingerprint(path)
+        files = _read_bundle(path)
+        keys = keys or {}
+        signed_by = _check_signature(path, files, keys, require_signature)
+        cache_file = Path(cache_dir) / f"{path.stem}.zipcache" if cache_dir is not None else None
+        return cls(path, files, fingerprint, signed_by, cache_file, keys[signed_by] if signed_by is not None else None)
+
+    def _origin(self, member: str) -> str:
+        # 与 zipimport 相同的形式 <zip 路径>/<成员路径>，便于追踪与内存统计按插件源归属
+        return os.path.join(self._root, *member.split("/"))
+
+    # ---------- 导入协议 ----------
+    def find_spec(self, fullname: str) -> Optional[importlib.machinery.ModuleSpec]:
+        entry = self._index.get(fullname)
+        if entry is None:
+            return None
+        member, is_package = entry
+        origin = self._origin(member)
+        spec = importlib.machinery.ModuleSpec(fullname, self, origin=origin, is_package=is_package)
+        spec.has_location = True
+        if is_package:
+            spec.submodule_search_locations = [os.path.dirname(origin)]
+        return spec
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> None:
+        return None
+
+    def exec_module(self, module: ModuleType) -> None:
+        name = module.__spec__.name
+        code = self.get_code(name)
+        self.modules.add(name)
+        exec(code, module.__dict__)
+
+    def _member(self, fullname: str) -> Tuple[str, bool]:
+        try:
+            return self._index[fullname]
+        except KeyError:
+            raise ImportError(f"插件包 {self.path} 中没有模块 {fullname}", name=fullname) from None
+
+    def is_package(self, fullname: str) -> bool:
+        return self._member(fullname)[1]
+
+    def get_source(self, fullname: str) -> str:
+        return importlib.util.decode_source(self._files[self._member(fullname)[0]])
+
+    def get_filename(self, fullname: str) -> str:
+        return self._origin(self._member(fullname)[0])
+
+    def get_code(self, fullname: str) -> CodeType:
+        member = self._member(fullname)[0]
+        with self._lock:
+            code = self._code.get(member)
+        if code is not None:
+            return code
+        code = compile(self._files[member], self._origin(member), "exec", dont_inherit=True)
+        with self._lock:
+            self._code[member] = code
+            self._dirty = True
+        return code
+
+    def get_data(self, path: str) -> bytes:
+        """pkgutil.get_data 等通过 __file__ 拼出的包内路径读取数据"""
+        member = os.path.relpath(os.path.abspath(path), self._root).replace(os.sep, "/")
+        try:
+            return self._files[member]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+    # ---------- 字节码缓存 ----------
+    def _cache_tag(self, payload: bytes) -> bytes:
+        """缓存内容的认证码：签名包为 HMAC，未签名的包只是校验和"""
+        if self._cache_key is not None:
+            return hmac.new(self._cache_key, payload, hashlib.sha256).digest()
+        return hashlib.sha256(payload).digest()
+
+    def _member_digest(self, member: str) -> str:
+        return hashlib.sha256(self._files[member]).hexdigest()
+
+    def _load_cache(self) -> None:
+        if self.cache_file is None:
+            return
+        try:
+            raw = self.cache_file.read_bytes()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.debug(f"忽略无法读取的字节码缓存 {self.cache_file}: {e}")
+            return
+        tag, payload = raw[:_CACHE_TAG_SIZE], raw[_CACHE_TAG_SIZE:]
+        # 认证通过之前不反序列化，marshal 不能处理不可信的数据
+        if not hmac.compare_digest(tag, self._cache_tag(payload)):
+            logger.warning(f"字节码缓存 {self.cache_file} 校验失败，已忽略")
+            return
+        try:
+            data = marshal.loads(payload)
+        except (ValueError, EOFError, TypeError) as e:
+            logger.debug(f"忽略无法读取的字节码缓存 {self.cache_file}: {e}")
+            return
+        if not (
+            isinstance(data, dict)
+            and data.get("version") == _CACHE_VERSION
+            and data.get("magic") == importlib.util.MAGIC_NUMBER
+            and data.get("path") == self._root
+        ):
+            return
+        for member, (digest, code) in data.get("entries", {}).items():
+            # 内容不变的模块直接复用编译结果
+            if member in self._files and isinstance(code, CodeType) and digest == self._member_digest(member):
+                self._code[member] = code
+
+    def flush_cache(self) -> None:
+        """把新编译的模块写入缓存，原子替换"""
+        with self._lock:
+            if not self._dirty or self.cache_file is None:
+                return
+            entries = {member: (self._member_digest(member), code) for member, code in self._code.items()}
+            self._dirty = False
+        payload = marshal.dumps({
+            "version": _CACHE_VERSION,
+            "magic": importlib.util.MAGIC_NUMBER,
+            "path": self._root,
+            "entries": entries,
+        })
+        data = self._cache_tag(payload) + payload
+        tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            logger.warning(f"写入字节码缓存 {self.cache_file} 失败: {e}")
+
+    def close(self) -> None:
+        """写入缓存并从 sys.modules 中移除本包导入的模块"""
+        self.flush_cache()
+        for name in self.modules:
+            module = sys.modules.get(name)
+            if module is not None and getattr(module, "__loader__", None) is self:
+                del sys.modules[name]
+        self.modules.clear()
+
+
+class ZipPluginFinder(importlib.abc.MetaPathFinder):
+    """按顶层模块名把导入分派给已挂载的插件包，位于 sys.meta_path 最前"""
+
+    def __init__(self) -> None:
+        self._bundles: Dict[str, ZipBundle] = {}  # 绝对路径 -> 插件包
+        self._top_level: Dict[str, ZipBundle] = {}  # 顶层模块名 -> 插件包
+        self._lock = threading.Lock()
+
+    def find_spec(self, fullname: str, path: Any = None, target: Optional[ModuleType] = None) -> Optional[importlib.machinery.ModuleSpec]:
+        bundle = self._top_level.get(fullname.partition(".")[0])
+        return bundle.find_spec(fullname) if bundle is not None else None
+
+    def get(self, path: Union[str, Path]) -> Optional[ZipBundle]:
+        return self._bundles.get(os.path.abspath(path))
+
+    def mount(
+        self,
+        path: Union[str, Path],
+        keys: Optional[Mapping[str, bytes]] = None,
+        require_signature: bool = False,
+        cache_dir: Optional[Path] = None,
+    ) -> ZipBundle:
+        """挂载插件包；已挂载且文件未改动时直接返回，改动过则替换旧包（旧包导入的模块随之移除）"""
+        path = Path(path)
+        key = os.path.abspath(path)
+        current = self._bundles.get(key)
+        if current is not None and current.fingerprint == _fingerprint(path):
+            return current
+        bundle = ZipBundle.open(path, keys, require_signature, cache_dir)
+        with self._lock:
+            old = self._bundles.get(key)
+            for name in bundle.top_level:
+                other = self._top_level.get(name)
+                if other is not None and other is not old:
+                    raise BundleError(f"插件包 {path} 中的模块 {name} 与已挂载的 {other.path} 冲突")
+            if old is not None:
+                self._detach(key, old)
+            self._bundles[key] = bundle
+            for name in bundle.top_level:
+                self._top_level[name] = bundle
+        if old is not None:
+            old.close()
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return bundle
+
+    def unmount(self, path: Union[str, Path]) -> bool:
+        """卸载插件包并移除它导入的模块"""
+        key = os.path.abspath(path)
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is None:
+                return False
+            self._detach(key, bundle)
+        bundle.close()
+        return True
+
+    def _detach(self, key: str, bundle: ZipBundle) -> None:
+        del self._bundles[key]
+        for name in bundle.top_level:
+            if self._top_level.get(name) is bundle:
+                del self._top_level[name]
+
+
+# 进程内唯一的插件包导入器
+zip_finder = ZipPluginFinder()
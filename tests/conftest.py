@@ -0,0 +1,97 @@
+import asyncio
+import textwrap
+import time
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from ..plugins.abc import ConcurrentEventBus, DefaultPluginManager, Plugin
+
+
+def _plugin_stub(name, version="1.0.0", **dependency):
+    """只带依赖排序与发现清单所需字段的插件替身"""
+    return SimpleNamespace(
+        name=name, version=version, dependency=dependency, protocol_version=1,
+        context=SimpleNamespace(event_handlers={}),
+    )
+
+
+async def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    return predicate()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def plugin_stub():
+    return _plugin_stub
+
+
+@pytest.fixture
+def wait_until():
+    """在协程中轮询直到条件成立或超时"""
+    return _wait_until
+
+
+@pytest.fixture
+def wait_for():
+    """在线程中轮询直到条件成立或超时"""
+    return _wait_for
+
+
+@pytest.fixture
+def plugin_dir(tmp_path):
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def write_plugin(plugin_dir):
+    """在插件目录中写入单文件插件，manifest 为映射时一并写入声明文件"""
+    def write(name, on_load="pass", *, dependency=None, body="", manifest=None, sync_load=False, version="1.0.0"):
+        source = textwrap.dedent(f"""
+            import asyncio
+            import os
+            import time
+            from pathlib import Path
+            from {Plugin.__module__} import Plugin
+
+            class P(Plugin):
+                name = {name!r}
+                version = {version!r}
+                dependency = {dependency or {}!r}
+
+                {"def" if sync_load else "async def"} on_load(self):
+            @ON_LOAD@
+
+                async def on_close(self):
+                    pass
+
+            @BODY@
+        """)
+        source = source.replace("@ON_LOAD@", textwrap.indent(textwrap.dedent(on_load).strip(), " " * 8))
+        source = source.replace("@BODY@", textwrap.indent(textwrap.dedent(body).strip(), " " * 4))
+        (plugin_dir / f"{name}.py").write_text(source, encoding="utf-8")
+        if manifest is not None:
+            (plugin_dir / f"{name}.plugin.yaml").write_text(yaml.safe_dump({"name": name, "version": version, **manifest}), encoding="utf-8")
+    return write
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    """以 tmp_path 下的 plugins / config / data 目录创建插件管理器，默认立即加载"""
+    def make(**options):
+        options.setdefault("event_bus", ConcurrentEventBus(adaptive=False))
+        options.setdefault("lazy_load", False)
+        return DefaultPluginManager([tmp_path / "plugins"], tmp_path / "config", tmp_path / "data", **options)
+    return make
@@ -0,0 +1,64 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ..plugins import executor as executor_module
+from ..plugins.executor import AdaptiveExecutor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """替换执行器模块中的单调时钟，由测试手动推进"""
+    now = [100.0]
+    monkeypatch.setattr(executor_module, "time", SimpleNamespace(
+        monotonic=lambda: now[0], time=time.time, strftime=time.strftime, localtime=time.localtime,
+    ))
+    return now
+
+
+@pytest.fixture
+def pool(clock):
+    pool = AdaptiveExecutor(min_workers=2, max_workers=8, target_wait=0.05, shrink_utilization=0.3, interval=3600)
+    with pool._cond:
+        pool._spawn(4)
+    yield pool
+    pool.shutdown()
+
+
+def _adjust(pool, clock, *, wait=None, utilization=0.0):
+    """推进一秒后按给定的平均排队与利用率执行一次决策"""
+    with pool._cond:
+        workers = pool._workers - pool._retire
+        clock[0] += 1.0
+        pool._busy_integral = utilization * workers
+        if wait is not None:
+            pool._wait_sum, pool._wait_count = wait * 2, 2
+        before = len(pool._decisions)
+        pool._adjust()
+        return list(pool._decisions)[before:]
+
+
+def test_long_waits_grow_the_pool_by_half(pool, clock):
+    (decision,) = _adjust(pool, clock, wait=0.2, utilization=1.0)
+    assert (decision.action, decision.old, decision.new, decision.wait_ms) == ("grow", 4, 6, 200.0)
+    assert pool.stats()["workers"] == 6
+    (decision,) = _adjust(pool, clock, wait=0.2, utilization=1.0)
+    assert (decision.old, decision.new) == (6, 8)
+    # 已到上限
+    assert _adjust(pool, clock, wait=0.2, utilization=1.0) == []
+
+
+def test_idle_pool_shrinks_one_worker_per_sample_down_to_min(pool, clock, wait_for):
+    for expected in (3, 2):
+        (decision,) = _adjust(pool, clock, utilization=0.1)
+        assert (decision.action, decision.new) == ("shrink", expected)
+        assert wait_for(lambda: pool._workers == expected)
+    assert _adjust(pool, clock, utilization=0.0) == []
+
+
+def test_busy_pool_without_waits_keeps_its_size(pool, clock):
+    assert _adjust(pool, clock, wait=0.01, utilization=0.9) == []
+    # 利用率低但仍有排队，不缩减
+    assert _adjust(pool, clock, wait=0.04, utilization=0.1) == []
+    assert pool.stats()["workers"] == 4
@@ -0,0 +1,84 @@
+import logging
+import threading
+
+from ..plugins.abc import Bulkhead, ConcurrentEventBus, Event, OverflowPolicy, _bulkhead_options
+
+
+def test_bulkhead_rejects_when_queue_is_full():
+    bulkhead = Bulkhead("p", max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    try:
+        assert bulkhead.submit(work) is not None
+        assert started.wait(5)
+        assert bulkhead.submit(work) is not None  # 排队
+        assert bulkhead.submit(work) is None
+        assert bulkhead.stats()["rejected"] == 1
+    finally:
+        release.set()
+        bulkhead.shutdown()
+
+
+def test_bulkhead_shed_cancels_lower_priority_queued_task():
+    bulkhead = Bulkhead("p", max_workers=1, max_queue=1, overflow=OverflowPolicy.SHED)
+    release = threading.Event()
+    started = threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    try:
+        bulkhead.submit(work)
+        assert started.wait(5)
+        low = bulkhead.submit(work, priority=0)
+        high = bulkhead.submit(work, priority=5)
+        assert low.cancelled() and high is not None
+        assert bulkhead.submit(work, priority=0) is None
+        stats = bulkhead.stats()
+        assert (stats["shed"], stats["rejected"], stats["queued"]) == (1, 1, 1)
+    finally:
+        release.set()
+        bulkhead.shutdown()
+
+
+def test_bulkhead_tasks_do_not_hold_bus_intake_slots(wait_for):
+    bus = ConcurrentEventBus(max_workers=2, max_pending=2, overflow=OverflowPolicy.DROP, adaptive=False)
+    bus.create_bulkhead("slow", 1, max_queue=2)
+    release = threading.Event()
+    fast = []
+
+    def slow_handler(event):
+        release.wait(5)
+
+    def fast_handler(event):
+        fast.append(event.data)
+
+    bus.register_handler(slow_handler, "slow", bulkhead="slow")
+    bus.register_handler(fast_handler, "fast")
+    try:
+        for i in range(5):
+            bus.publish(Event("slow", i))
+        # 慢插件只填满了自己的排队，其余插件的事件仍能进入事件总线
+        assert bus.bulkhead_stats()["slow"]["rejected"] == 2
+        assert bus.stats()["dropped"] == 0
+        for i in range(3):
+            bus.publish(Event("fast", i))
+        assert wait_for(lambda: len(fast) == 3)
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_bulkhead_options_log_invalid_values(caplog):
+    with caplog.at_level(logging.ERROR, logger="PluginsSys"):
+        options = _bulkhead_options({"bulkhead_workers": "many", "bulkhead_queue": -1, "bulkhead_overflow": "block"})
+    assert options == {"max_workers": 4, "max_queue": None, "overflow": None}
+    assert len(caplog.records) == 3
+    assert _bulkhead_options({"bulkhead_workers": "0"})["max_workers"] is None
+    assert _bulkhead_options({"bulkhead_overflow": "shed"})["overflow"] is OverflowPolicy.SHED
@@ -0,0 +1,27 @@
+import threading
+
+from ..plugins.abc import ConfigManager
+
+
+def test_concurrent_reads_and_writes_keep_cache_consistent(tmp_path):
+    manager = ConfigManager(tmp_path)
+    manager._write_file("demo", {"n": 0})
+    reads_per_thread, threads = 200, 4
+
+    def reader():
+        for _ in range(reads_per_thread):
+            data, _ = manager._read("demo")
+            assert set(data) == {"n"}
+
+    def writer():
+        for n in range(1, 50):
+            manager._write_file("demo", {"n": n})
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)] + [threading.Thread(target=writer)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert manager.hits + manager.misses == reads_per_thread * threads
+    assert manager._read("demo") == ({"n": 49}, False)
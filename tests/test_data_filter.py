@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from ..plugins.abc import ConcurrentEventBus, DataFilter
+
+
+def test_ids_match_across_int_and_str():
+    assert DataFilter(group_id=123456).matches({"group_id": "123456"})
+    assert DataFilter(group_id="123456").matches({"group_id": 123456})
+    assert not DataFilter(user_id=1).matches({"user_id": "2"})
+    assert not DataFilter(user_id=1).matches({"user_id": True})
+
+
+def test_unhashable_values_do_not_match():
+    assert not DataFilter(group_id=1).matches({"group_id": [1]})
+    assert not DataFilter(message_type="group").matches({"message_type": {"group": 1}})
+
+
+def test_invalid_id_condition_is_rejected():
+    with pytest.raises(ValueError):
+        DataFilter(group_id="abc")
+
+
+def test_index_lookup_normalizes_ids():
+    bus = ConcurrentEventBus(max_workers=2, adaptive=False)
+
+    def handler(event):
+        return event.data["group_id"]
+
+    try:
+        bus.register_handler(handler, "msg", group_id=10)
+        assert list(asyncio.run(bus.request("msg", {"group_id": "10"})).values()) == ["10"]
+        assert asyncio.run(bus.request("msg", {"group_id": [10]})) == {}
+        assert asyncio.run(bus.request("msg", {"group_id": {"a": 1}})) == {}
+    finally:
+        bus.close()
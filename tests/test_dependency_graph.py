@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from ..plugins.abc import (
+    PluginRuntimeError,
+    PluginState,
+    _DependencyGraph,
+)
+
+
+def test_graph_orders_by_depth_and_rejects_duplicates(plugin_stub):
+    graph = _DependencyGraph()
+    for node in (plugin_stub("core"), plugin_stub("other"), plugin_stub("mid", core=">=1.0"), plugin_stub("top", mid=">=1.0")):
+        graph.add(node)
+    assert graph.order() == ["core", "other", "mid", "top"]
+    assert graph.subtree(["core"]) == ["core", "mid", "top"]
+    assert graph.requirements("top") == ["core", "mid"]
+    with pytest.raises(PluginRuntimeError):
+        graph.add(plugin_stub("core"))
+    # 被拒绝的重复加入不影响依赖它的插件
+    assert graph.subtree(["core"]) == ["core", "mid", "top"]
+
+
+@pytest.fixture
+def run(write_plugin, make_manager):
+    for name, dependency in (("core", {}), ("mid", {"core": ">=1.0"}), ("top", {"mid": ">=1.0"}), ("other", {})):
+        write_plugin(name, dependency=dependency)
+
+    def run(scenario):
+        async def main():
+            manager = make_manager()
+            try:
+                await manager.load_plugins()
+                await scenario(manager)
+            finally:
+                await manager.close()
+
+        asyncio.run(main())
+    return run
+
+
+def _states(manager):
+    return {name: status.state for name, status in manager.list_plugins_with_status().items()}
+
+
+def test_unload_cascades_to_dependents(run):
+    async def scenario(manager):
+        assert await manager.unload_plugin("core")
+        assert sorted(manager.list_plugins()) == ["other"]
+
+    run(scenario)
+
+
+def test_start_restarts_dependents_stopped_by_the_cascade(run):
+    async def scenario(manager):
+        await manager.stop_plugin("core")
+        states = _states(manager)
+        assert [states[n] for n in ("core", "mid", "top", "other")] == [PluginState.STOPPED] * 3 + [PluginState.RUNNING]
+
+        assert await manager.start_plugin("core")
+        assert set(_states(manager).values()) == {PluginState.RUNNING}
+
+    run(scenario)
+
+
+def test_explicitly_stopped_dependents_stay_stopped(run):
+    async def scenario(manager):
+        await manager.stop_plugin("top")
+        await manager.stop_plugin("core")
+        assert await manager.start_plugin("core")
+        states = _states(manager)
+        assert (states["mid"], states["top"]) == (PluginState.RUNNING, PluginState.STOPPED)
+        # 依赖已停止的插件时，先启动依赖
+        await manager.stop_plugin("core")
+        assert await manager.start_plugin("top")
+        assert set(_states(manager).values()) == {PluginState.RUNNING}
+
+    run(scenario)
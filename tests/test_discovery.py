@@ -0,0 +1,68 @@
+import asyncio
+
+from ..plugins.abc import _checkable_records
+from ..plugins.discovery import DiscoveryManifest, PluginRecord
+
+
+def test_source_without_records_only_skips_itself(tmp_path, plugin_stub):
+    recorded, fresh = tmp_path / "recorded.py", tmp_path / "fresh.py"
+    recorded.write_text("x = 1")
+    fresh.write_text("y = 1")
+    manifest = DiscoveryManifest(tmp_path / "manifest.json")
+    manifest.refresh(recorded, "file", "recorded")
+    manifest.refresh(fresh, "file", "fresh")
+    manifest.record_plugins(recorded, [plugin_stub("core")])
+
+    records = manifest.cached_plugins([recorded, fresh])
+    assert [r.name for r in records] == ["core"]
+
+
+def test_records_depending_on_unknown_plugins_are_left_for_import():
+    records = [
+        PluginRecord("A", "core", "1.0.0"),
+        PluginRecord("B", "app", "1.0.0", {"core": ">=1.0"}),
+        PluginRecord("C", "ext", "1.0.0", {"fresh": ">=1.0"}),
+        PluginRecord("D", "top", "1.0.0", {"ext": ">=1.0"}),
+    ]
+    assert sorted(r.name for r in _checkable_records(records)) == ["app", "core"]
+
+
+def test_warm_start_imports_each_source_when_its_layer_starts(tmp_path, write_plugin, make_manager):
+    log = tmp_path / "order.log"
+    for name, dependency in (("core", {}), ("app", {"core": ">=1.0"})):
+        write_plugin(
+            name, f"open({str(log)!r}, 'a').write('load {name}\\n')",
+            dependency=dependency, body=f"open({str(log)!r}, 'a').write('import {name}\\n')",
+        )
+
+    async def start():
+        manager = make_manager()
+        try:
+            assert sorted(p.name for p in await manager.load_plugins()) == ["app", "core"]
+        finally:
+            await manager.close()
+        return manager.manifest.timings
+
+    assert set(asyncio.run(start())) == {"cold"}
+    log.unlink()
+    assert set(asyncio.run(start())) == {"cold", "warm"}
+    assert log.read_text().split("\n")[:-1] == ["import core", "load core", "import app", "load app"]
+
+
+def test_stale_records_fall_back_to_importing_up_front(tmp_path, write_plugin, make_manager):
+    write_plugin("core")
+    write_plugin("app", dependency={"core": ">=1.0"})
+
+    async def start():
+        manager = make_manager()
+        try:
+            return sorted(p.name for p in await manager.load_plugins()), manager.manifest.timings
+        finally:
+            await manager.close()
+
+    asyncio.run(start())
+    # 改动的插件源没有记录，依赖它的记录也要先导入
+    write_plugin("core", version="1.1.0")
+    names, timings = asyncio.run(start())
+    assert names == ["app", "core"]
+    assert set(timings) == {"cold"}
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import threading
+import time
+
+from ..plugins.abc import ConcurrentEventBus, Event, OverflowPolicy
+
+
+def _blocking_bus(max_pending, overflow, **options):
+    bus = ConcurrentEventBus(max_workers=4, max_pending=max_pending, overflow=overflow, adaptive=False, **options)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    done = []
+
+    def handler(event):
+        started.release()
+        release.wait(5)
+        done.append(event.data)
+
+    bus.register_handler(handler, "work")
+    return bus, release, started, done
+
+
+def test_drop_policy_counts_rejected_tasks():
+    bus, release, _, done = _blocking_bus(2, OverflowPolicy.DROP)
+    try:
+        for i in range(5):
+            bus.publish("work", i)
+        assert bus.stats()["dropped"] == 3
+        release.set()
+        deadline = time.monotonic() + 5
+        while len(done) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sorted(done) == [0, 1]
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_shed_policy_cancels_lower_priority_queued_task():
+    bus = ConcurrentEventBus(max_workers=1, max_pending=2, overflow="shed", adaptive=False)
+    release = threading.Event()
+    started = threading.Event()
+    seen = []
+
+    def handler(event):
+        started.set()
+        release.wait(5)
+        seen.append(event.data)
+
+    bus.register_handler(handler, "work")
+    try:
+        bus.publish(Event("work", "running", priority=0))
+        assert started.wait(5)
+        bus.publish(Event("work", "low", priority=0))      # 排队中
+        bus.publish(Event("work", "high", priority=5))     # 挤出 low
+        assert bus.stats()["shed"] == 1
+        release.set()
+        deadline = time.monotonic() + 5
+        while len(seen) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert seen == ["running", "high"]
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_block_policy_waits_for_capacity_off_loop():
+    bus, release, started, done = _blocking_bus(1, OverflowPolicy.BLOCK, block_timeout=5)
+    try:
+        bus.publish("work", 0)
+        assert started.acquire(timeout=5)
+        threading.Timer(0.1, release.set).start()
+        began = time.monotonic()
+        bus.publish("work", 1)  # 等待第一个任务完成
+        assert time.monotonic() - began >= 0.05
+        assert bus.stats()["blocked"] == 1
+        assert bus.stats()["dropped"] == 0
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_block_policy_does_not_freeze_event_loop(caplog):
+    bus, release, started, _ = _blocking_bus(1, OverflowPolicy.BLOCK, loop_block_timeout=0.01)
+
+    async def main():
+        bus.publish("work", 0)
+        began = time.monotonic()
+        bus.publish("work", 1)  # 事件循环线程上只等待 loop_block_timeout
+        return time.monotonic() - began
+
+    try:
+        with caplog.at_level(logging.WARNING, logger="PluginsSys"):
+            assert asyncio.run(main()) < 1
+        stats = bus.stats()
+        assert (stats["dropped"], stats["loop_dropped"]) == (1, 1)
+        assert any("publish_async" in r.getMessage() for r in caplog.records if r.levelno == logging.WARNING)
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_publish_async_waits_for_whole_fan_out():
+    bus = ConcurrentEventBus(max_workers=4, max_pending=2, overflow="block", adaptive=False)
+    release = threading.Event()
+    calls = []
+    for i in range(2):
+        def handler(event, i=i):
+            release.wait(5)
+            calls.append((i, event.data))
+        handler.__qualname__ = f"handler{i}"
+        bus.register_handler(handler, "work")
+
+    async def main():
+        bus.publish("work", 0)  # 占满两个名额
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.1, release.set)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while not release.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        await bus.publish_async("work", 1)
+        await ticker
+        return ticks
+
+    try:
+        # 等待期间事件循环仍在运行
+        assert asyncio.run(main()) > 1
+        deadline = time.monotonic() + 5
+        while len(calls) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sorted(calls) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+        assert bus.stats()["dropped"] == 0
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_fixed_executor_reports_configured_size():
+    bus = ConcurrentEventBus(max_workers=3, adaptive=False)
+    try:
+        assert bus.executor_stats() == {"max_workers": 3}
+    finally:
+        bus.close()
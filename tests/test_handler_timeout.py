@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import threading
+
+from ..plugins.abc import ConcurrentEventBus
+
+
+def _bus(handler_timeout):
+    return ConcurrentEventBus(handler_timeout=handler_timeout, watchdog_interval=0.05, adaptive=False)
+
+
+def test_coroutine_handler_is_cancelled_at_its_deadline(wait_for):
+    bus = _bus(0.1)
+    cancelled = []
+
+    async def slow(event):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(event.data)
+            raise
+
+    bus.register_handler(slow, "job")
+    try:
+        bus.publish("job", 1)
+        assert wait_for(lambda: len(bus.dead_letters) == 1)
+        assert cancelled == [1]
+        (letter,) = bus.dead_letters.list()
+        assert isinstance(letter.error, TimeoutError) and "已取消" in str(letter.error)
+        assert bus.stats()["stuck"] == 0 and bus.stuck_handlers() == []
+    finally:
+        bus.close()
+
+
+def test_sync_handler_is_reported_as_stuck_and_left_running(wait_for, caplog):
+    bus = _bus(0.1)
+    release = threading.Event()
+    finished = []
+
+    def blocking(event):
+        release.wait(5)
+        finished.append(event.data)
+
+    bus.register_handler(blocking, "job")
+    try:
+        with caplog.at_level(logging.WARNING, logger="PluginsSys"):
+            bus.publish("job", 1)
+            assert wait_for(lambda: bus.stuck_handlers())
+            (running,) = bus.stuck_handlers()
+            assert (running.event, running.handler_name, running.cancellable) == ("job", blocking.__qualname__, False)
+            assert bus.stats()["stuck"] == 1 and finished == []
+            assert "超过时限仍未结束" in caplog.text
+
+            # 线程不会被中断，处理器结束后释放
+            release.set()
+            assert wait_for(lambda: finished == [1] and not bus.stuck_handlers())
+        assert "线程" in caplog.records[-1].getMessage()
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_per_handler_timeout_overrides_the_bus_default(wait_for):
+    bus = _bus(5.0)
+    results = []
+
+    async def short_limit(event):
+        await asyncio.sleep(1)
+        results.append("short")
+
+    async def long_limit(event):
+        await asyncio.sleep(0.3)
+        results.append("long")
+
+    bus.register_handler(short_limit, "job", timeout=0.1)
+    try:
+        bus.publish("job")
+        assert wait_for(lambda: len(bus.dead_letters) == 1, timeout=0.8)
+    finally:
+        bus.close()
+
+    bus = _bus(0.1)
+    bus.register_handler(long_limit, "job", timeout=5.0)
+    try:
+        bus.publish("job")
+        assert wait_for(lambda: results == ["long"])
+        assert len(bus.dead_letters) == 0
+    finally:
+        bus.close()
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from ..plugins.hotreload import PluginWatcher
+
+
+def _watcher(plugin_dir, **options):
+    return PluginWatcher(SimpleNamespace(plugin_dirs=[plugin_dir]), [plugin_dir], **options)
+
+
+def test_changed_files_map_to_their_plugin_source(tmp_path, plugin_dir):
+    watcher = _watcher(plugin_dir)
+    cases = {
+        plugin_dir / "echo.py": plugin_dir / "echo.py",
+        plugin_dir / "echo.plugin.yaml": plugin_dir / "echo.py",
+        plugin_dir / "bundle.zip": plugin_dir / "bundle.zip",
+        plugin_dir / "pkg" / "sub" / "mod.py": plugin_dir / "pkg",
+        plugin_dir / "pkg" / "plugin.json": plugin_dir / "pkg",
+        plugin_dir / "pkg" / "data.json": None,
+        plugin_dir / "pkg" / "__pycache__" / "mod.py": None,
+        plugin_dir / ".cache" / "mod.py": None,
+        tmp_path / "elsewhere" / "echo.py": None,
+    }
+    assert {path: watcher._source_path(str(path)) for path in cases} == cases
+
+
+def test_changes_within_debounce_are_coalesced(plugin_dir):
+    watcher = _watcher(plugin_dir, debounce=0.05)
+    batches = []
+
+    async def dispatch(pending):
+        batches.append(pending)
+
+    watcher._dispatch = dispatch
+
+    async def main():
+        watcher._loop = asyncio.get_running_loop()
+        # 来自 watchdog 线程的改动
+        changes = [plugin_dir / "a.py", plugin_dir / "b.plugin.yaml", plugin_dir / "a.py", plugin_dir / "notes.txt"]
+        thread = threading.Thread(target=lambda: [watcher._on_change(str(p)) for p in changes])
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0.2)
+        watcher._on_change(str(plugin_dir / "c.py"))
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    assert batches == [{plugin_dir / "a.py", plugin_dir / "b.py"}, {plugin_dir / "c.py"}]
+
+
+def test_reload_sources_restarts_dependents_in_order_and_keeps_others(tmp_path, plugin_dir, write_plugin, make_manager):
+    log = tmp_path / "lifecycle.log"
+
+    def write(name, dependency=None, revision=1):
+        write_plugin(name, f"open({str(log)!r}, 'a').write('load {name}\\n')", dependency=dependency, body=f"""
+            revision = {revision}
+
+            async def on_close(self):
+                open({str(log)!r}, 'a').write('close {name}\\n')
+
+            def __snapshot__(self):
+                return getattr(self, "state", None)
+
+            def __restore__(self, state):
+                self.restored = state
+        """)
+
+    write("core")
+    write("mid", {"core": ">=1.0"})
+    write("other")
+
+    async def main():
+        manager = make_manager()
+        try:
+            await manager.load_plugins()
+            before = {name: manager.get_plugin(name) for name in ("core", "mid", "other")}
+            before["core"].state = {"count": 3}
+            log.unlink()
+
+            write("core", revision=2)
+            reloaded = await manager.reload_sources([plugin_dir / "core.py"])
+            after = {name: manager.get_plugin(name) for name in ("core", "mid", "other")}
+            return reloaded, log.read_text().split("\n")[:-1], before, after
+        finally:
+            await manager.close()
+
+    reloaded, lifecycle, before, after = asyncio.run(main())
+    assert reloaded == ["core", "mid"]
+    assert lifecycle == ["close mid", "close core", "load core", "load mid"]
+    assert (after["core"].revision, after["core"].restored) == (2, {"count": 3})
+    # __snapshot__ 返回 None 的插件不延续状态
+    assert after["mid"] is not before["mid"] and not hasattr(after["mid"], "restored")
+    assert after["other"] is before["other"]
@@ -0,0 +1,34 @@
+import asyncio
+import os
+
+import pytest
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="独立进程插件只支持 POSIX 系统")
+
+
+def test_isolated_plugin_answers_requests_from_a_child_process(write_plugin, make_manager, wait_until):
+    write_plugin("echo", 'self.context.register_handler("ping", self.on_ping)', body="""
+        def on_ping(self, event):
+            self.context.event_bus.publish("pinged", event.data)
+            return os.getpid()
+    """, manifest={"isolated": True})
+    pinged = []
+
+    def on_pinged(event):
+        pinged.append(event.data)
+
+    async def main():
+        manager = make_manager()
+        bus = manager.event_bus
+        bus.register_handler(on_pinged, "pinged")
+        try:
+            await manager.load_plugins()
+            results = await bus.request("ping", 1)
+            pids = list(results.values())
+            assert len(pids) == 1 and isinstance(pids[0], int) and pids[0] != os.getpid()
+            # 子进程发布的事件在主进程的事件总线上重放
+            assert await wait_until(lambda: pinged == [1], timeout=10.0)
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+
+from ..plugins.abc import Event
+from ..plugins.journal import EventJournal, JournalReader, RecordKind, replay_journal
+
+
+def test_events_across_segments_read_back_through_the_index(tmp_path):
+    journal = EventJournal(tmp_path, segment_size=200, index_interval=0)
+    for i in range(20):
+        journal.record_event(Event("tick", i))
+    journal.close()
+
+    assert len(list(tmp_path.glob("segment-*.log"))) > 1
+    assert len(list(tmp_path.glob("segment-*.idx"))) == len(list(tmp_path.glob("segment-*.log")))
+    records = list(JournalReader(tmp_path))
+    assert [r.decode().data for r in records] == list(range(20))
+
+    start = records[10].timestamp
+    expected = [r.decode().data for r in records if r.timestamp >= start]
+    assert [r.decode().data for r in JournalReader(tmp_path).read(start)] == expected
+    # 索引把起点之前的段定位到段内最后一个索引点
+    segment = sorted(tmp_path.glob("segment-*.log"))[-1]
+    entries = JournalReader._load_index(segment.with_suffix(".idx"))
+    assert JournalReader._seek(entries, entries[-1][0]) == entries[-1][1]
+
+
+def test_truncated_tail_record_is_ignored(tmp_path, caplog):
+    journal = EventJournal(tmp_path)
+    for i in range(3):
+        journal.record_event(Event("tick", i))
+    journal.close()
+    (segment,) = tmp_path.glob("segment-*.log")
+    segment.write_bytes(segment.read_bytes()[:-5])
+
+    with caplog.at_level(logging.WARNING, logger="PluginsSys"):
+        assert [r.decode().data for r in JournalReader(tmp_path)] == [0, 1]
+    assert "不完整" in caplog.text
+
+    # 重新打开时从新的段继续写，不改写已损坏的段
+    journal = EventJournal(tmp_path)
+    journal.record_event(Event("tick", 3))
+    journal.close()
+    assert len(list(tmp_path.glob("segment-*.log"))) == 2
+    assert [r.decode().data for r in JournalReader(tmp_path)] == [0, 1, 3]
+
+
+def _write_paced(directory, gap=0.2):
+    journal = EventJournal(directory)
+    for i, frame in enumerate(("a", "b", "c")):
+        if i:
+            time.sleep(gap)
+        journal.record_frame(frame)
+        journal.record_event(Event("tick", i))
+    journal.close()
+
+
+def _replay(directory, speed):
+    seen = []
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        count = await replay_journal(directory, on_frame=lambda f: seen.append((f, loop.time())), speed=speed)
+        return count
+
+    count = asyncio.run(main())
+    return count, [f for f, _ in seen], seen[-1][1] - seen[0][1]
+
+
+def test_replay_at_full_speed_keeps_order(tmp_path):
+    _write_paced(tmp_path)
+    events = []
+
+    async def on_event(event):
+        await asyncio.sleep(0)
+        events.append(event.data)
+
+    count, frames, elapsed = _replay(tmp_path, None)
+    assert (count, frames) == (3, ["a", "b", "c"])
+    assert elapsed < 0.1
+    assert asyncio.run(replay_journal(tmp_path, on_event=on_event, speed=0)) == 3
+    assert events == [0, 1, 2]
+    assert [r.kind for r in JournalReader(tmp_path)] == [RecordKind.FRAME, RecordKind.EVENT] * 3
+
+
+def test_replay_keeps_relative_pacing_at_nx_speed(tmp_path):
+    _write_paced(tmp_path)
+    count, frames, elapsed = _replay(tmp_path, 2)
+    assert (count, frames) == (3, ["a", "b", "c"])
+    # 原始间隔共 0.4 秒，两倍速约 0.2 秒
+    assert 0.18 <= elapsed < 0.35
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from ..plugins.abc import Event
+
+
+@pytest.fixture
+def write_lazy_plugin(write_plugin):
+    def write(idle_timeout=None):
+        manifest = {"lazy": True, "events": ["ping"]}
+        if idle_timeout is not None:
+            manifest["idle_timeout"] = idle_timeout
+        write_plugin("echo", """
+            self.received = []
+            self.context.register_handler("ping", self.on_ping)
+        """, body="""
+            def on_ping(self, event):
+                self.received.append(event.data)
+                return "pong"
+        """, manifest=manifest)
+    return write
+
+
+def test_first_event_activates_plugin_and_is_redelivered(write_lazy_plugin, make_manager, wait_until):
+    write_lazy_plugin()
+
+    async def main():
+        manager = make_manager(lazy_load=True)
+        try:
+            assert await manager.load_plugins() == []
+            assert manager.get_plugin("echo") is None
+            manager.event_bus.publish(Event("ping", 1))
+            assert await wait_until(lambda: manager.get_plugin("echo") is not None)
+            plugin = manager.get_plugin("echo")
+            assert await wait_until(lambda: plugin.received == [1])
+            # 激活后存根保留，但不会重复触发
+            manager.event_bus.publish(Event("ping", 2))
+            assert await wait_until(lambda: plugin.received == [1, 2])
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
+
+
+def test_lazy_stub_is_not_a_request_result(write_lazy_plugin, make_manager, wait_until):
+    write_lazy_plugin()
+
+    async def main():
+        manager = make_manager(lazy_load=True)
+        try:
+            await manager.load_plugins()
+            # 只有存根匹配时没有任何结果，请求同时触发了激活
+            assert await manager.event_bus.request("ping", 1) == {}
+            assert await wait_until(lambda: manager.get_plugin("echo") is not None)
+            results = await manager.event_bus.request("ping", 2)
+            assert list(results.values()) == ["pong"]
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
+
+
+def test_idle_plugin_is_unloaded_and_reactivated(write_lazy_plugin, make_manager, wait_until):
+    write_lazy_plugin(idle_timeout=0.1)
+
+    async def main():
+        manager = make_manager(lazy_load=True)
+        try:
+            await manager.load_plugins()
+            await manager.activate_plugin("echo")
+            assert manager.get_plugin("echo") is not None
+            assert await wait_until(lambda: manager.get_plugin("echo") is None, timeout=5.0)
+            manager.event_bus.publish(Event("ping", 3))
+            assert await wait_until(lambda: manager.get_plugin("echo") is not None)
+            plugin = manager.get_plugin("echo")
+            assert await wait_until(lambda: plugin.received == [3])
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+
+import pytest
+
+from ..plugins.abc import PluginRuntimeError, PluginValidationError
+from ..plugins.manifest import HandlerDecl, ManifestError, PluginManifest
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"event": "x"}, "公开方法名"),
+    ({"handler": "_private", "event": "x"}, "公开方法名"),
+    ({"handler": "h"}, "event 或 command"),
+    ({"handler": "h", "event": "x", "command": "y"}, "event 或 command"),
+    ({"handler": "h", "command": "y", "prefix": "/"}, "prefix"),
+    ({"handler": "h", "event": "x", "executor": "fiber"}, "executor"),
+    ({"handler": "h", "event": "x", "timeout": 0}, "timeout"),
+    ({"handler": "h", "event": "x", "group_id": "1"}, "group_id"),
+    ({"handler": "h", "event": "x", "colour": "red"}, "未知字段"),
+])
+def test_invalid_handler_declarations_are_rejected(data, message):
+    with pytest.raises(ManifestError, match=message):
+        HandlerDecl.from_dict(data)
+
+
+def test_routes_expand_commands_over_command_events():
+    manifest = PluginManifest.from_dict({"name": "p", "handlers": [
+        {"handler": "on_msg", "event": "message", "group_id": [1, 2], "timeout": 3},
+        {"handler": "on_help", "command": "help", "executor": "loop"},
+    ]})
+    routes = manifest.routes(["group_message", "private_message"], ["/", "!"])
+    assert routes[0] == ("on_msg", "message", {"group_id": (1, 2), "executor": "thread", "timeout": 3})
+    assert [(r.event, r.options["prefix"]) for r in routes[1:]] == [
+        ("group_message", ("/help", "!help")), ("private_message", ("/help", "!help")),
+    ]
+    assert manifest.routes([], []) == routes[:1]
+
+
+def test_declared_handler_without_method_is_not_loaded(write_plugin, make_manager, caplog):
+    write_plugin("broken", manifest={"handlers": [{"handler": "missing", "event": "ping"}]})
+    write_plugin("fine")
+
+    async def main():
+        manager = make_manager()
+        try:
+            with caplog.at_level(logging.ERROR, logger="PluginsSys"):
+                return [p.name for p in await manager.load_plugins()]
+        finally:
+            await manager.close()
+
+    assert asyncio.run(main()) == ["fine"]
+    assert "声明的处理器 missing 不是插件的方法" in caplog.text
+
+
+@pytest.mark.parametrize("declared, message", [
+    ({"version": "2.0.0"}, "声明的版本"),
+    ({"dependency": {"core": ">=2.0"}}, "声明的依赖"),
+])
+def test_version_or_dependency_mismatch_raises(write_plugin, make_manager, declared, message):
+    write_plugin("core")
+    write_plugin("app", dependency={"core": ">=1.0"})
+
+    async def main():
+        manager = make_manager()
+        try:
+            await manager.load_plugins()
+            manifest = PluginManifest.from_dict({"name": "app", "version": "1.0.0", **declared})
+            with pytest.raises(PluginValidationError, match=message):
+                manager._apply_manifest(manager.get_plugin("app"), manifest)
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
+
+
+def test_declared_handlers_register_before_on_load_and_roll_back(tmp_path, write_plugin, make_manager):
+    log = tmp_path / "seen.log"
+    for name, fail in (("good", False), ("bad", True)):
+        write_plugin(name, f"""
+            matched = [h.handler_id for h in self.context.event_bus._get_matching_handlers("{name}.ping")]
+            open({str(log)!r}, "a").write(f"{name} {{len(matched)}} {{len(self.context.event_handlers)}}\\n")
+            if {fail}:
+                raise RuntimeError("boom")
+        """, body="""
+            def on_ping(self, event):
+                return "pong"
+        """, manifest={"handlers": [{"handler": "on_ping", "event": f"{name}.ping"}]})
+
+    async def main():
+        manager = make_manager()
+        try:
+            with pytest.raises(PluginRuntimeError):
+                await manager.load_plugins()
+            bus = manager.event_bus
+            return bus._get_matching_handlers("good.ping"), bus._get_matching_handlers("bad.ping")
+        finally:
+            await manager.close()
+
+    good, bad = asyncio.run(main())
+    assert sorted(log.read_text().splitlines()) == ["bad 1 1", "good 1 1"]
+    # 失败的插件注销了声明的处理器，同批成功的插件随回滚一并卸载
+    assert good == [] and bad == []
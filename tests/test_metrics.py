@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+
+from ..plugins.abc import ConcurrentEventBus, Event
+from ..plugins.metrics import CpuTimedCoroutine, PluginMetrics, current_metrics, metered_api_call
+
+
+def _spin(seconds):
+    deadline = time.thread_time() + seconds
+    while time.thread_time() < deadline:
+        pass
+
+
+def test_cancelled_coroutine_keeps_its_cpu_time():
+    cleaned = []
+
+    async def work():
+        _spin(0.02)
+        try:
+            await asyncio.sleep(5)
+        finally:
+            cleaned.append(True)
+
+    async def main():
+        timed = CpuTimedCoroutine(work())
+
+        async def run():
+            return await timed
+
+        task = asyncio.create_task(run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return timed.cpu
+
+    cpu = asyncio.run(main())
+    assert cleaned == [True]
+    # 挂起等待的时间不计入
+    assert 0.015 <= cpu < 0.5
+
+
+def test_handler_failures_are_counted(wait_for):
+    bus = ConcurrentEventBus(adaptive=False)
+    metrics, loop_metrics = PluginMetrics(), PluginMetrics()
+
+    def handler(event):
+        if event.data == "bad":
+            raise ValueError("bad")
+
+    async def loop_handler(event):
+        raise ValueError("bad")
+
+    bus.register_handler(handler, "job", metrics=metrics)
+    bus.register_handler(loop_handler, "loop", executor="loop", metrics=loop_metrics)
+    try:
+        bus.publish("job", "ok")
+        bus.publish("job", "bad")
+        assert wait_for(lambda: metrics.calls == 2)
+        # publish_many 在同一次执行中逐个处理，一次调用计多个事件
+        bus.publish_many([Event("job", "ok"), Event("job", "bad"), Event("job", "ok")])
+        bus.publish("loop")
+        assert wait_for(lambda: metrics.calls == 3 and loop_metrics.calls == 1)
+    finally:
+        bus.close()
+    snapshot = metrics.snapshot()
+    assert (snapshot["events"], snapshot["calls"], snapshot["errors"]) == (5, 3, 2)
+    assert (loop_metrics.events, loop_metrics.errors) == (1, 1)
+
+
+def test_api_calls_are_metered_only_inside_plugin_code():
+    metrics = PluginMetrics()
+    with metered_api_call() as call:
+        call.failed = True
+    token = current_metrics.set(metrics)
+    try:
+        with metered_api_call():
+            pass
+        with metered_api_call() as call:
+            call.failed = True
+        with pytest.raises(RuntimeError):
+            with metered_api_call():
+                raise RuntimeError("timeout")
+    finally:
+        current_metrics.reset(token)
+    assert (metrics.api_calls, metrics.api_errors) == (3, 2)
+
+
+def test_manager_reports_per_plugin_metrics(tmp_path, write_plugin, make_manager, wait_until):
+    write_plugin("counter", """
+        self.context.register_handler("count", self.on_count)
+        (self.context.data_dir / "state.bin").parent.mkdir(parents=True, exist_ok=True)
+        (self.context.data_dir / "state.bin").write_bytes(b"x" * 128)
+    """, body="""
+        def on_count(self, event):
+            if event.data < 0:
+                raise ValueError(event.data)
+    """)
+    write_plugin("idle")
+
+    async def main():
+        manager = make_manager()
+        try:
+            await manager.load_plugins()
+            for value in (1, -1, 2):
+                manager.event_bus.publish("count", value)
+            counter = manager.get_plugin("counter")
+            assert await wait_until(lambda: counter.context.metrics.calls == 3)
+            return await manager.plugin_metrics()
+        finally:
+            await manager.close()
+
+    result = asyncio.run(main())
+    assert (result["counter"]["events"], result["counter"]["errors"], result["counter"]["data_bytes"]) == (3, 1, 128)
+    assert (result["idle"]["events"], result["idle"]["data_bytes"]) == (0, 0)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from ..plugins.abc import PluginRuntimeError, _cwd_lock, _topological_sort
+
+
+def test_topological_sort_groups_independent_plugins_into_layers(plugin_stub):
+    plugins = [
+        plugin_stub("app", db=">=1.0", cache=">=1.0"), plugin_stub("cache", core=">=1.0"),
+        plugin_stub("db", core=">=1.0"), plugin_stub("core"),
+    ]
+    layers = [sorted(p.name for p in layer) for layer in _topological_sort(plugins)]
+    assert layers == [["core"], ["cache", "db"], ["app"]]
+
+
+def test_topological_sort_resolves_already_loaded_dependencies(plugin_stub):
+    layers = _topological_sort([plugin_stub("app", core=">=1.0")], {"core": "1.2.0"})
+    assert [[p.name for p in layer] for layer in layers] == [["app"]]
+
+
+def test_failed_plugin_rolls_back_the_whole_batch(write_plugin, make_manager):
+    write_plugin("core", "await asyncio.sleep(0)")
+    write_plugin("good", "await asyncio.sleep(0.01)", dependency={"core": ">=1.0"})
+    write_plugin("bad", "raise RuntimeError('boom')", dependency={"core": ">=1.0"})
+
+    async def main():
+        manager = make_manager()
+        try:
+            with pytest.raises(PluginRuntimeError):
+                await manager.load_plugins()
+            return dict(manager._plugins)
+        finally:
+            await manager.close()
+
+    assert asyncio.run(main()) == {}
+
+
+def test_plugins_in_one_layer_load_concurrently(write_plugin, make_manager):
+    for name in ("first", "second", "third"):
+        write_plugin(name, "await asyncio.sleep(0.2)")
+
+    async def main():
+        manager = make_manager()
+        try:
+            started = time.perf_counter()
+            assert len(await manager.load_plugins()) == 3
+            return time.perf_counter() - started
+        finally:
+            await manager.close()
+
+    assert asyncio.run(main()) < 0.5
+
+
+def test_on_load_sees_its_own_data_dir_across_awaits(write_plugin, make_manager):
+    for name in ("first", "second", "third"):
+        write_plugin(name, """
+            await asyncio.sleep(0.01)
+            self.seen = Path.cwd()
+        """, body="change_cwd = True")
+
+    async def main():
+        manager = make_manager()
+        try:
+            plugins = await manager.load_plugins()
+            return {p.name: (p.seen, p.context.data_dir) for p in plugins}
+        finally:
+            await manager.close()
+
+    cwd = Path.cwd()
+    seen = asyncio.run(main())
+    assert Path.cwd() == cwd
+    assert len(seen) == 3
+    for actual, expected in seen.values():
+        assert actual == expected.resolve()
+
+
+def test_sync_on_load_timeout_reports_it_keeps_running(write_plugin, make_manager):
+    write_plugin("slow", "time.sleep(0.3)", sync_load=True)
+
+    async def main():
+        manager = make_manager(load_timeout=0.05)
+        try:
+            with pytest.raises(PluginRuntimeError, match="后台线程"):
+                await manager.load_plugins()
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
+
+
+def test_timed_out_sync_on_load_keeps_its_data_dir_until_it_finishes(tmp_path, write_plugin, make_manager):
+    write_plugin("slow", """
+        time.sleep(0.3)
+        Path("marker").touch()
+    """, body="change_cwd = True", sync_load=True)
+    cwd = Path.cwd()
+
+    async def main():
+        manager = make_manager(load_timeout=0.05)
+        try:
+            with pytest.raises(PluginRuntimeError, match="后台线程"):
+                await manager.load_plugins()
+            # 线程结束后才释放工作目录
+            async with _cwd_lock():
+                return Path.cwd()
+        finally:
+            await manager.close()
+
+    assert asyncio.run(main()) == cwd
+    assert [p.parent.name for p in (tmp_path / "data").rglob("marker")] == ["slow"]
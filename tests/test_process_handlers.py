@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+import pytest
+
+from ..plugins.abc import ConcurrentEventBus, ExecutorKind, _ProcessHandlerRef
+
+
+class Worker:
+    @staticmethod
+    def static_handler(event):
+        return ("static", event.data, os.getpid())
+
+    @classmethod
+    def class_handler(cls, event):
+        return (cls.__name__, event.data, os.getpid())
+
+    def bound_handler(self, event):
+        return event.data
+
+
+def test_instance_methods_are_rejected_with_guidance():
+    with pytest.raises(ValueError, match="staticmethod"):
+        _ProcessHandlerRef.of(Worker().bound_handler)
+
+
+def test_classmethod_ref_resolves_to_class():
+    ref = _ProcessHandlerRef.of(Worker.class_handler)
+    assert ref.qualname == "Worker.class_handler"
+    assert ref.resolve().__self__ is Worker
+
+
+def test_static_and_class_methods_run_in_child_process():
+    bus = ConcurrentEventBus(max_workers=2, process_workers=1, adaptive=False)
+    try:
+        bus.register_handler(Worker.static_handler, "calc", executor=ExecutorKind.PROCESS)
+        bus.register_handler(Worker.class_handler, "calc", executor=ExecutorKind.PROCESS)
+        results = sorted(asyncio.run(bus.request("calc", 7, timeout=60)).values())
+        assert [r[:2] for r in results] == [("Worker", 7), ("static", 7)]
+        assert all(r[2] != os.getpid() for r in results)
+        assert bus._process_pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        bus.close()
@@ -0,0 +1,34 @@
+from collections import Counter
+
+from ..plugins.abc import ConcurrentEventBus, Event
+
+
+def test_publish_many_matches_each_name_once_and_batches(monkeypatch, wait_for):
+    bus = ConcurrentEventBus(adaptive=False)
+    lookups = Counter()
+    matching = bus._get_matching_handlers
+
+    def counting(name):
+        lookups[name] += 1
+        return matching(name)
+
+    monkeypatch.setattr(bus, "_get_matching_handlers", counting)
+    batches, singles = [], []
+
+    def on_batch(events):
+        batches.append([e.data for e in events])
+
+    def on_single(event):
+        singles.append(event.data)
+
+    bus.register_handler(on_batch, "a", batch=True)
+    bus.register_handler(on_single, "re:[ab]")
+    try:
+        bus.publish_many([Event("a", 1), Event("b", 2), Event("a", 3), Event("a", 4), Event("b", 5)])
+        assert wait_for(lambda: len(singles) == 5 and batches)
+        assert lookups == {"a": 1, "b": 1}
+        # batch 处理器一次收到整批事件，普通处理器在同一个任务中逐个处理
+        assert batches == [[1, 3, 4]]
+        assert singles == [1, 3, 4, 2, 5]
+    finally:
+        bus.close()
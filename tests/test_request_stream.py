@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..plugins.abc import ConcurrentEventBus, PluginContext
+from ..plugins.mixin.server import ServerMixin
+
+
+def _bus():
+    return ConcurrentEventBus(adaptive=False)
+
+
+def test_request_first_returns_early_and_cancels_the_rest(wait_for):
+    bus = _bus()
+    cancelled = []
+
+    def fast(event):
+        return "fast"
+
+    async def slow(event):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(event.data)
+            raise
+        return "slow"
+
+    bus.register_handler(fast, "ask")
+    bus.register_handler(slow, "ask", executor="loop")
+    try:
+        started = time.perf_counter()
+        assert asyncio.run(bus.request_first("ask", 1)) == "fast"
+        assert time.perf_counter() - started < 1
+        assert wait_for(lambda: cancelled == [1])
+    finally:
+        bus.close()
+
+
+def test_request_first_skips_failures_until_a_success():
+    bus = _bus()
+    release = threading.Event()
+
+    def broken(event):
+        raise ValueError("broken")
+
+    def late(event):
+        release.wait(5)
+        return "late"
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        # 失败先于成功出现
+        loop.call_later(0.1, release.set)
+        return await bus.request_first("ask")
+
+    bus.register_handler(broken, "ask")
+    bus.register_handler(late, "ask")
+    try:
+        assert asyncio.run(main()) == "late"
+    finally:
+        release.set()
+        bus.close()
+
+
+def test_request_first_raises_the_first_error_when_all_fail():
+    bus = _bus()
+
+    def broken(event):
+        raise ValueError("broken")
+
+    bus.register_handler(broken, "ask")
+    try:
+        with pytest.raises(ValueError, match="broken"):
+            asyncio.run(bus.request_first("ask"))
+        assert asyncio.run(bus.request_first("nobody")) is None
+    finally:
+        bus.close()
+
+
+def test_request_stream_yields_in_completion_order_and_times_out():
+    bus = _bus()
+    ids = {}
+
+    def make(delay, name):
+        def handler(event):
+            time.sleep(delay)
+            return name
+        handler.__qualname__ = f"handler_{name}"
+        return handler
+
+    for delay, name in ((0.2, "second"), (0.05, "first"), (2, "stuck")):
+        ids[bus.register_handler(make(delay, name), "ask")] = name
+
+    async def main():
+        return [(ids[handler_id], result) async for handler_id, result in bus.request_stream("ask", timeout=0.5)]
+
+    try:
+        results = asyncio.run(main())
+        assert results[:2] == [("first", "first"), ("second", "second")]
+        name, error = results[2]
+        assert name == "stuck" and isinstance(error, asyncio.TimeoutError)
+    finally:
+        bus.close()
+
+
+def test_request_server_returns_the_first_success(tmp_path):
+    bus = _bus()
+
+    class Server(ServerMixin):
+        pass
+
+    def broken(event):
+        raise ValueError("broken")
+
+    def echo(event):
+        time.sleep(0.05)
+        return event.data
+
+    server, client = Server(), Server()
+    server.context = PluginContext(bus, "server", tmp_path / "server")
+    client.context = PluginContext(bus, "client", tmp_path / "client")
+    server.register_server(echo, "echo")
+    bus.register_handler(broken, "server.echo")
+    try:
+        assert asyncio.run(client.request_server("echo", 42)) == 42
+        with pytest.raises(RuntimeError, match="已经注册"):
+            server.register_server(echo, "echo")
+    finally:
+        bus.close()
@@ -0,0 +1,75 @@
+import time
+
+from ..plugins.abc import ConcurrentEventBus, DeadLetterStore, Event, OverflowPolicy, RetryPolicy
+
+
+def test_backoff_grows_to_max_delay_within_jitter_bounds():
+    policy = RetryPolicy(max_attempts=6, base_delay=1.0, max_delay=5.0, multiplier=2.0, jitter=0.1)
+    for attempt, expected in zip(range(1, 6), (1.0, 2.0, 4.0, 5.0, 5.0)):
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(expected * 0.9 <= d <= expected * 1.1 for d in delays)
+    assert RetryPolicy(base_delay=0.5, jitter=0).delay(2) == 1.0
+    assert policy.should_retry(5, ValueError()) and not policy.should_retry(6, ValueError())
+    assert not RetryPolicy(retry_on=(KeyError,)).should_retry(1, ValueError())
+
+
+def test_dead_letter_store_evicts_oldest_at_its_bound():
+    store = DeadLetterStore(maxlen=2)
+    for i in range(3):
+        store.add(event=Event("e", i), handler_id=None, handler_name="h", error=ValueError(), attempts=1)
+    assert [letter.letter_id for letter in store.list()] == [2, 3]
+    assert [letter.event.data for letter in store.pop(3)] == [2]
+    assert len(store) == 1
+
+
+def test_exhausted_retries_go_to_dead_letters_and_replay(wait_for):
+    bus = ConcurrentEventBus(adaptive=False)
+    calls, fixed = [], []
+
+    def flaky(event):
+        calls.append(event.data)
+        if not fixed:
+            raise ValueError("flaky")
+
+    bus.register_handler(flaky, "job", retry=RetryPolicy(max_attempts=3, base_delay=0.01, jitter=0))
+    try:
+        bus.publish("job", 1)
+        assert wait_for(lambda: len(bus.dead_letters) == 1)
+        (letter,) = bus.dead_letters.list()
+        assert (letter.event.data, letter.attempts, calls) == (1, 3, [1, 1, 1])
+        assert (bus.stats()["retried"], bus.stats()["dead_lettered"]) == (2, 1)
+
+        fixed.append(True)
+        assert bus.replay_dead_letters() == 1
+        assert wait_for(lambda: len(calls) == 4)
+        assert len(bus.dead_letters) == 0
+    finally:
+        bus.close()
+
+
+def test_pending_retries_do_not_block_dispatch(wait_for):
+    bus = ConcurrentEventBus(max_pending=1, overflow=OverflowPolicy.DROP, adaptive=False)
+    failures, handled = [], []
+
+    def failing(event):
+        failures.append(time.monotonic())
+        raise ValueError("failing")
+
+    def other(event):
+        handled.append(event.data)
+
+    bus.register_handler(failing, "job", retry=RetryPolicy(max_attempts=2, base_delay=1.0, jitter=0))
+    bus.register_handler(other, "other")
+    try:
+        bus.publish("job")
+        assert wait_for(lambda: bus.stats()["retried"] == 1)
+        # 等待重试期间不占用入口的名额
+        for i in range(3):
+            assert wait_for(lambda: bus.stats()["pending"] == 0)
+            bus.publish("other", i)
+            assert wait_for(lambda: len(handled) == i + 1, timeout=0.5)
+        assert len(failures) == 1 and bus.stats()["dropped"] == 0
+        assert wait_for(lambda: len(bus.dead_letters) == 1)
+        assert failures[1] - failures[0] >= 0.9
+    finally:
+        bus.close()
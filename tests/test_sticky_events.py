@@ -0,0 +1,49 @@
+import time
+
+from ..plugins.abc import ConcurrentEventBus
+
+
+def test_late_subscriber_receives_the_last_sticky_value(wait_for):
+    bus = ConcurrentEventBus(sticky_events=["status"], adaptive=False)
+    late, fresh_only = [], []
+
+    def on_status(event):
+        late.append(event.data)
+
+    def on_status_fresh(event):
+        fresh_only.append(event.data)
+
+    try:
+        bus.publish("status", "starting")
+        bus.publish("status", "online")
+        bus.publish("other", "ignored")
+        assert bus.last_value("status").data == "online"
+        assert bus.last_value("other") is None
+
+        bus.register_handler(on_status, "status")
+        bus.register_handler(on_status_fresh, "status", sticky=False)
+        assert wait_for(lambda: late == ["online"])
+        time.sleep(0.05)
+        assert fresh_only == []
+
+        bus.publish("status", "offline")
+        assert wait_for(lambda: late == ["online", "offline"] and fresh_only == ["offline"])
+    finally:
+        bus.close()
+
+
+def test_add_sticky_retains_values_published_afterwards(wait_for):
+    bus = ConcurrentEventBus(adaptive=False)
+    seen = []
+
+    def on_status(event):
+        seen.append(event.data)
+
+    try:
+        bus.publish("status", "before")
+        bus.add_sticky("status")
+        bus.publish("status", "after")
+        bus.register_handler(on_status, "re:stat.*")
+        assert wait_for(lambda: seen == ["after"])
+    finally:
+        bus.close()
@@ -0,0 +1,41 @@
+import threading
+
+from ..plugins.abc import ConcurrentEventBus, Event, SubscriptionGate
+
+
+def test_sample_counters_are_capped(monkeypatch):
+    monkeypatch.setattr(SubscriptionGate, "_MAX_KEYS", 8)
+    gate = SubscriptionGate(sample=2, key=lambda e: e.data)
+    for i in range(100):
+        gate.offer(Event("msg", i))
+    assert len(gate._counts) == 8
+
+
+def test_throttle_records_are_capped(monkeypatch):
+    monkeypatch.setattr(SubscriptionGate, "_MAX_KEYS", 8)
+    gate = SubscriptionGate(throttle=60, key=lambda e: e.data)
+    assert all(gate.offer(Event("msg", i)) for i in range(100))
+    assert len(gate._last) == 8
+    assert not gate.offer(Event("msg", 99))  # 最近的键仍在节流
+
+
+def test_failing_key_skips_only_that_handler():
+    bus = ConcurrentEventBus(max_workers=2, adaptive=False)
+    received = threading.Event()
+
+    def broken(event):
+        raise AssertionError("不应被调用")
+
+    def healthy(event):
+        received.set()
+
+    try:
+        bus.register_handler(broken, "msg", throttle=1, key=lambda e: e.data.missing)
+        bus.register_handler(healthy, "msg")
+        bus.publish("msg", object())
+        assert received.wait(5)
+        bus.register_handler(broken, "msg", sample=2, key=lambda e: [e.data])  # 不可哈希
+        bus.publish("msg", 1)
+        assert bus.stats()["suppressed"] == 1
+    finally:
+        bus.close()
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from ..plugins.abc import ConcurrentEventBus
+from ..utils.tracing import Tracer, current_span, tracer
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.fixture
+def global_tracer(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer.configure(path, 1.0)
+    try:
+        yield path
+    finally:
+        tracer.close()
+        tracer.configure(None, 0.0)
+
+
+def test_handler_spans_are_children_of_the_publishing_span(global_tracer, wait_for):
+    bus = ConcurrentEventBus(adaptive=False)
+    done = []
+
+    def handler(event):
+        with tracer.span("inner", step=1):
+            done.append(current_span.get() is not None)
+
+    bus.register_handler(handler, "ping")
+    try:
+        with tracer.trace("root") as root:
+            bus.publish("ping", 1)
+        assert wait_for(lambda: done == [True])
+    finally:
+        bus.close()
+    tracer.close()
+
+    spans = {record["name"]: record for record in _read(global_tracer)}
+    assert set(spans) == {"root", "bus.queue", "bus.handler", "inner"}
+    assert {record["trace_id"] for record in spans.values()} == {root.trace_id}
+    assert spans["root"]["parent_id"] is None
+    assert spans["bus.queue"]["parent_id"] == spans["bus.handler"]["parent_id"] == root.span_id
+    assert spans["inner"]["parent_id"] == spans["bus.handler"]["span_id"]
+    assert (spans["bus.handler"]["event"], spans["inner"]["step"]) == ("ping", 1)
+
+
+def test_sample_rate_zero_emits_nothing(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    local = Tracer(path, 0.0)
+    assert not local.enabled
+    with local.trace("root") as root:
+        assert root is None and current_span.get() is None
+        with local.span("child") as child:
+            assert child is None
+    local.close()
+    assert not path.exists()
+
+
+def test_spans_are_exported_as_json_lines(tmp_path):
+    path = tmp_path / "nested" / "trace.jsonl"
+    local = Tracer(path, 1.0)
+    with local.trace("root", request="r1"):
+        local.record("wait", 10.0, 10.25)
+        with pytest.raises(ValueError):
+            with local.span("child"):
+                raise ValueError("boom")
+    local.close()
+
+    records = _read(path)
+    assert [r["name"] for r in records] == ["wait", "child", "root"]
+    wait, child, root = records
+    assert wait["duration_ms"] == 250.0
+    assert child["error"] == "ValueError('boom')"
+    assert root["request"] == "r1"
+    assert all(set(r) >= {"trace_id", "span_id", "parent_id", "start", "duration_ms"} for r in records)
@@ -0,0 +1,70 @@
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from ..plugins.transport import HandshakeError, SocketEventBus
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _relay(hub, client):
+    """client 发布的事件经 hub 投递到 hub 的本地处理器"""
+    received = threading.Event()
+    hub.register_handler(lambda event: received.set(), "ping")
+    # 等待订阅到达 client
+    for _ in range(100):
+        if client._peers and client._peers[0].matches("ping"):
+            break
+        time.sleep(0.02)
+    client.publish("ping")
+    return received.wait(5)
+
+
+def test_tcp_requires_secret_and_loopback():
+    with pytest.raises(ValueError, match="secret"):
+        SocketEventBus(("127.0.0.1", _free_port()), serve=True)
+    with pytest.raises(ValueError, match="回环"):
+        SocketEventBus(("0.0.0.0", _free_port()), serve=True, secret="s")
+
+
+def test_tcp_handshake_accepts_matching_secret():
+    address = ("127.0.0.1", _free_port())
+    hub = SocketEventBus(address, serve=True, secret="s3cret")
+    client = SocketEventBus(address, secret="s3cret")
+    try:
+        assert _relay(hub, client)
+    finally:
+        client.close()
+        hub.close()
+
+
+def test_tcp_handshake_rejects_wrong_secret():
+    address = ("127.0.0.1", _free_port())
+    hub = SocketEventBus(address, serve=True, secret="right")
+    try:
+        with pytest.raises(HandshakeError):
+            SocketEventBus(address, secret="wrong")
+        assert hub._peers == []
+    finally:
+        hub.close()
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix 套接字")
+def test_unix_socket_is_private(tmp_path):
+    path = tmp_path / "bus.sock"
+    hub = SocketEventBus(path, serve=True)
+    client = SocketEventBus(path)
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert _relay(hub, client)
+    finally:
+        client.close()
+        hub.close()
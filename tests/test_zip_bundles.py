@@ -0,0 +1,76 @@
+import hashlib
+import marshal
+import zipfile
+
+import pytest
+
+from ..plugins.zipimporter import BundleError, ZipBundle, sign_bundle, verify_bundle
+
+KEY = bytes(range(32))
+
+
+def _make_bundle(path, source="VALUE = 1\n"):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("zp/__init__.py", source)
+    return path
+
+
+def _rewrite_member(path, member, content):
+    with zipfile.ZipFile(path) as zf:
+        files = {info.filename: zf.read(info) for info in zf.infolist()}
+    files[member] = content
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+
+
+def test_signed_bundle_verifies_and_tampering_is_rejected(tmp_path):
+    path = _make_bundle(tmp_path / "zp.zip")
+    with pytest.raises(BundleError):
+        verify_bundle(path, {"main": KEY}, required=True)
+    sign_bundle(path, "main", KEY.hex())
+    assert verify_bundle(path, {"main": KEY}, required=True) == "main"
+
+    _rewrite_member(path, "zp/__init__.py", b"VALUE = 2\n")
+    with pytest.raises(BundleError, match="篡改"):
+        ZipBundle.open(path, {"main": KEY})
+
+
+def _cached_bundle(tmp_path):
+    path = _make_bundle(tmp_path / "zp.zip")
+    sign_bundle(path, "main", KEY)
+    cache_dir = tmp_path / "cache"
+    bundle = ZipBundle.open(path, {"main": KEY}, True, cache_dir)
+    bundle.get_code("zp")
+    bundle.flush_cache()
+    return path, cache_dir, bundle.cache_file
+
+
+def test_signed_bundle_reuses_its_authenticated_cache(tmp_path):
+    path, cache_dir, _ = _cached_bundle(tmp_path)
+    assert "zp/__init__.py" in ZipBundle.open(path, {"main": KEY}, True, cache_dir)._code
+
+
+def test_tampered_cache_is_ignored(tmp_path):
+    path, cache_dir, cache_file = _cached_bundle(tmp_path)
+    raw = cache_file.read_bytes()
+    tag, payload = raw[:32], raw[32:]
+    data = marshal.loads(payload)
+    data["entries"]["zp/__init__.py"] = (data["entries"]["zp/__init__.py"][0], compile("VALUE = 'evil'", "x", "exec"))
+    forged = marshal.dumps(data)
+
+    for content in (tag + forged, hashlib.sha256(forged).digest() + forged):
+        cache_file.write_bytes(content)
+        bundle = ZipBundle.open(path, {"main": KEY}, True, cache_dir)
+        assert bundle._code == {}
+        namespace = {}
+        exec(bundle.get_code("zp"), namespace)
+        assert namespace["VALUE"] == 1
+
+
+def test_cache_is_not_shared_with_a_different_key(tmp_path):
+    path, cache_dir, _ = _cached_bundle(tmp_path)
+    other = bytes(32)
+    sign_bundle(path, "other", other)
+    assert ZipBundle.open(path, {"other": other}, True, cache_dir)._code == {}
+
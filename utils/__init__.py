@@ -14,6 +14,7 @@ from .test_suite import TestSuite
 from .pip_tool import PipTool
 from .visualize_data import visualize_tree
 from .time_task_scheduler import AsyncTaskScheduler
+from .tracing import Tracer, tracer, configure_tracing
 
 __all__ = [
     'UniversalLoader',
@@ -24,4 +25,7 @@ __all__ = [
     'PipTool',
     'visualize_tree',
     'AsyncTaskScheduler',
+    'Tracer',
+    'tracer',
+    'configure_tracing',
 ]
\ No newline at end of file
@@ -0,0 +1,165 @@
+# 轻量级链路追踪：span 通过 contextvars 传递，以 JSON lines 导出
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from .logger import get_log
+
+LOG = get_log("Tracing")
+
+# 当前 span；未被采样的请求始终为 None，所有追踪操作都会直接跳过
+current_span: ContextVar[Optional["Span"]] = ContextVar("fcatbot_current_span", default=None)
+
+# 单调时钟到墙上时间的偏移
+_MONOTONIC_TO_WALL = time.time() - time.monotonic()
+
+
+@dataclass
+class Span:
+    """一段计时区间"""
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start: float  # 单调时钟
+    end: Optional[float] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start + _MONOTONIC_TO_WALL, 6),
+            "duration_ms": round(((self.end or self.start) - self.start) * 1000, 3),
+            **self.attrs,
+        }
+
+
+class Tracer:
+    """追踪器
+
+    在入口处用 trace() 开启一条按 sample_rate 采样的追踪，
+    之后同一上下文中的 span()/record() 自动成为其子 span。
+    完成的 span 交给后台线程追加写入 JSON lines 文件，不阻塞调用方。
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, sample_rate: float = 0.0) -> None:
+        self.path: Optional[Path] = None
+        self.sample_rate = 0.0
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.configure(path, sample_rate)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None and self.sample_rate > 0
+
+    def configure(self, path: Optional[Union[str, Path]] = None, sample_rate: float = 0.0) -> None:
+        """设置导出文件与采样率，path 为空或采样率为 0 时关闭追踪"""
+        self.path = Path(path) if path else None
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        if self.enabled:
+            self._ensure_writer()
+
+    @contextmanager
+    def trace(self, name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+        """开启一条新的追踪（根 span），未被采样时产出 None"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield None
+            return
+        span = Span(uuid.uuid4().hex, uuid.uuid4().hex[:16], None, name, time.monotonic(), attrs=attrs)
+        token = current_span.set(span)
+        try:
+            yield span
+        finally:
+            current_span.reset(token)
+            self._finish(span)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+        """在当前追踪下开启子 span，不在追踪中时产出 None"""
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace_id, uuid.uuid4().hex[:16], parent.span_id, name, time.monotonic(), attrs=attrs)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = repr(e)
+            raise
+        finally:
+            current_span.reset(token)
+            self._finish(span)
+
+    def record(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """记录一段事后测得的区间（单调时钟），例如排队等待"""
+        parent = current_span.get()
+        if parent is None:
+            return
+        span = Span(parent.trace_id, uuid.uuid4().hex[:16], parent.span_id, name, start, end, attrs)
+        self._queue.put(span.to_dict())
+
+    def _finish(self, span: Span) -> None:
+        span.end = time.monotonic()
+        self._queue.put(span.to_dict())
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="TraceWriter", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            path = self.path
+            if path is None:
+                continue
+            try:
+                os.makedirs(path.parent, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    # 顺带写出队列中已积累的记录，减少打开文件的次数
+                    while True:
+                        try:
+                            record = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if record is None:
+                            return
+                        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                LOG.warning(f"写入追踪文件 {path} 失败: {e}")
+
+    def close(self) -> None:
+        """写完已完成的 span 后停止后台线程"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+
+# 全局追踪器，默认关闭
+tracer = Tracer()
+
+
+def configure_tracing(path: Optional[Union[str, Path]] = None, sample_rate: float = 0.0) -> Tracer:
+    """配置全局追踪器"""
+    tracer.configure(path, sample_rate)
+    return tracer
@@ -12,7 +12,9 @@ from logging import Logger
 from typing import Any, Optional, Dict, Union
 import uuid
 from ..utils import get_log
+from ..utils import tracer
 from ..data_models import MessageChain
+from ..plugins.metrics import metered_api_call
 from .wsclient import WebSocketClient
 from .api import Apis
 
@@ -113,10 +115,12 @@ class NcatbotClient(WebSocketClient, Apis):
         if self.request_interceptor is not None:
             return await self.request_interceptor(action, param or pack)
 
-        data: str = self.request(
-            send_data,
-            self._api_hardler(echo)
-        )
+        with tracer.span("api", action=action), metered_api_call() as call:
+            data: str = self.request(
+                send_data,
+                self._api_hardler(echo)
+            )
+            call.failed = data is None
         if data is None:
             _LOG.error(f"API请求失败: {send_data}")
             return None